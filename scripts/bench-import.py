@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+COLD_START_CODE = "import sitehub.main as main; main.app"
+
+
+def measure(python: str, code: str) -> tuple[int, dict[str, int]]:
+    env = dict(os.environ)
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    env["PYTHONPATH"] = src + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    total_us = 0
+    modules: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        cumulative = int(match.group(2))
+        if match.group(3) == " ":
+            total_us += cumulative
+        modules[match.group(4)] = cumulative
+    return total_us, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--python", default=sys.executable)
+    args = parser.parse_args()
+
+    runs = [measure(args.python, COLD_START_CODE) for _ in range(max(args.rounds, 1))]
+    total_us, modules = min(runs, key=lambda run: run[0])
+    heaviest = sorted(
+        ((name, value) for name, value in modules.items() if name.startswith("sitehub")),
+        key=lambda item: item[1],
+        reverse=True,
+    )[: args.top]
+    for name, value in heaviest:
+        print(f"  {name:<45} {value / 1000:8.1f}ms")
+    total_ms = total_us / 1000
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import sitehub.main total_ms={total_ms:.1f} budget_ms={args.budget_ms:.0f}")
+        return 1
+    print(f"OK: import sitehub.main total_ms={total_ms:.1f} budget_ms={args.budget_ms:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
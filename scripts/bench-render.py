@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from sitehub.models.site_config import SiteConfig
+from sitehub.nginx_templates import TemplateEngine
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    configs = [
+        SiteConfig.model_construct(
+            name=f"site-{i}",
+            port=8000 + i % 100,
+            mode="static" if i % 3 == 0 else "proxy",
+            external_port=8400 + i % 100 if i % 7 == 0 else None,
+            nginx_template=None,
+        )
+        for i in range(args.count)
+    ]
+    engine = TemplateEngine()
+    timings = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        engine.render_all(configs)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"OK: render_all count={args.count} best_ms={best * 1000:.1f} per_conf_us={best / args.count * 1e6:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,9 +13,8 @@ if [[ -z "${CACHE_SERVER:-}" ]]; then
     *) CACHE_SERVER="" ;;
   esac
 fi
-LOG_FILE="${PWD}/sitehub.log"
-ts() { date +"%Y-%m-%dT%H:%M:%S%z"; }
-log() { echo "$(ts) [$1] $2" >> "$LOG_FILE"; }
+LOG_FILE="${SITEHUB_LOG_FILE:-${PWD}/sitehub.log}"
+source "$(dirname "${BASH_SOURCE[0]}")/lib/log.sh"
 MODE=""
 trap 'log "DEPENDENCY" "status=failed pm=${PM:-} mode=${MODE:-}";' ERR
 if [[ -z "$PM" ]]; then
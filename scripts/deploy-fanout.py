@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from sitehub.config import load_settings
+from sitehub.services.fanout_service import FanoutDeployer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--site", required=True)
+    parser.add_argument("--remote-root", required=False)
+    parser.add_argument("--hosts", required=False, help="comma separated [user@]host[:port] list")
+    parser.add_argument("--policy", required=False, help="all, quorum or a minimum host count")
+    parser.add_argument("--relay", action="store_true")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    hosts = [item.strip() for item in args.hosts.split(",") if item.strip()] if args.hosts else None
+    remote_root = args.remote_root or settings.app_root_dir or "/vol1/1000/MyDocker/web-cluster/sites"
+    remote_path = f"{remote_root.rstrip('/')}/{args.site}"
+    try:
+        deployer = FanoutDeployer(settings, hosts=hosts, policy=args.policy, relay=args.relay)
+    except ValueError as exc:
+        raise SystemExit(f"ERR {exc}")
+    result = asyncio.run(deployer.deploy(Path(args.source).expanduser().resolve(), remote_path))
+    for item in result.hosts:
+        detail = f" step={item.failed_step} error={item.error}" if item.status != "ok" else ""
+        print(f"{item.host}\t{item.status}\t{item.duration_ms}ms{detail}")
+    status = {"ok": "OK", "partial": "PARTIAL", "failed": "ERR"}[result.status]
+    print(
+        f"{status}: succeeded={result.succeeded}/{len(result.hosts)} required={result.required} policy={result.policy}"
+    )
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,21 +4,18 @@ import argparse
 import shlex
 from pathlib import Path
 
-import yaml
-
 from sitehub.config import load_settings
 from sitehub.services.deploy_service import SyncEngine, NginxEngine
-from sitehub.sitehub_yaml import SitehubYaml
+from sitehub.sitehub_yaml import load_sitehub_config
 
 
 def _parse_local_sitehub_yaml(source: Path) -> dict | None:
     yaml_path = source / "sitehub.yaml"
     if not yaml_path.exists():
         return None
-    data = yaml.safe_load(yaml_path.read_text(encoding="utf-8"))
-    if data is None or not isinstance(data, dict):
+    validated = load_sitehub_config(yaml_path)
+    if validated is None:
         return None
-    validated = SitehubYaml.model_validate(data)
     return validated.model_dump(mode="python", exclude_none=True)
 
 
@@ -2,10 +2,9 @@
 set -euo pipefail
 
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-LOG_FILE="${ROOT_DIR}/sitehub.log"
+LOG_FILE="${SITEHUB_LOG_FILE:-${ROOT_DIR}/sitehub.log}"
 
-ts() { date +"%Y-%m-%dT%H:%M:%S%z"; }
-log() { echo "$(ts) [$1] $2" >> "$LOG_FILE"; }
+source "$(dirname "${BASH_SOURCE[0]}")/lib/log.sh"
 
 usage() {
   cat <<'USAGE'
@@ -22,6 +21,7 @@ Options:
 USAGE
 }
 
+PYTHON_BIN="${PYTHON_BIN:-python3}"
 SOURCE_DIR="$ROOT_DIR"
 SITE_ROOT="$ROOT_DIR"
 KEEP="5"
@@ -77,6 +77,8 @@ if [[ ! -d "$SITE_ROOT" ]]; then
   exit 2
 fi
 
+SITE_NAME="$(basename "$SITE_ROOT")"
+
 require_file() {
   local path="$1"
   if [[ ! -e "$path" ]]; then
@@ -89,15 +91,6 @@ require_file "${SOURCE_DIR}/src"
 require_file "${SOURCE_DIR}/src/sitehub/main.py"
 require_file "${SOURCE_DIR}/scripts/run.sh"
 
-atomic_symlink() {
-  local target="$1"
-  local link_path="$2"
-  local tmp_link="${link_path}.tmp"
-  rm -f "$tmp_link"
-  ln -s "$target" "$tmp_link"
-  mv -Tf "$tmp_link" "$link_path"
-}
-
 rollback() {
   local ts_id="$1"
   local release_dir="${SITE_ROOT}/releases/${ts_id}"
@@ -111,8 +104,11 @@ rollback() {
     exit 0
   fi
 
-  atomic_symlink "$release_dir" "${SITE_ROOT}/current"
-  log "DEPLOY" "action=rollback status=success release=${ts_id} site_root=${SITE_ROOT}"
+  if ! PYTHONPATH="${ROOT_DIR}/src${PYTHONPATH:+:${PYTHONPATH}}" \
+    "$PYTHON_BIN" "${ROOT_DIR}/scripts/release.py" --site-root "$SITE_ROOT" rollback "$ts_id"; then
+    log "DEPLOY" "action=rollback status=failed release=${ts_id} site_root=${SITE_ROOT}" "$SITE_NAME"
+    exit 5
+  fi
 }
 
 deploy() {
@@ -121,47 +117,20 @@ deploy() {
   local release_dir="${SITE_ROOT}/releases/${ts_id}"
 
   echo "Plan: create release ${release_dir}"
-  echo "Plan: copy source ${SOURCE_DIR} -> ${release_dir}"
+  echo "Plan: link unchanged files from current release, copy changed files from ${SOURCE_DIR}"
   echo "Plan: switch current -> ${release_dir}"
+  echo "Plan: prune releases beyond ${KEEP}"
 
   if [[ "$DRY_RUN" == "true" ]]; then
     exit 0
   fi
 
-  mkdir -p "${SITE_ROOT}/releases"
-  mkdir -p "$release_dir"
-
-  (
-    cd "$SOURCE_DIR"
-    tar \
-      --exclude=".git" \
-      --exclude=".venv" \
-      --exclude="releases" \
-      --exclude="current" \
-      --exclude="openspec" \
-      --exclude=".trae" \
-      --exclude="sitehub.log" \
-      -cf - .
-  ) | (cd "$release_dir" && tar -xf -)
-
-  atomic_symlink "$release_dir" "${SITE_ROOT}/current"
-  log "DEPLOY" "action=deploy status=success release=${ts_id} site_root=${SITE_ROOT} source=${SOURCE_DIR}"
-
-  local releases
-  releases="$(ls -1 "${SITE_ROOT}/releases" | sort)"
-  local count
-  count="$(echo "$releases" | sed '/^$/d' | wc -l | tr -d ' ')"
-  if [[ "$count" -le "$KEEP" ]]; then
-    exit 0
+  if ! PYTHONPATH="${ROOT_DIR}/src${PYTHONPATH:+:${PYTHONPATH}}" \
+    "$PYTHON_BIN" "${ROOT_DIR}/scripts/release.py" --site-root "$SITE_ROOT" \
+    deploy --source "$SOURCE_DIR" --keep "$KEEP"; then
+    log "DEPLOY" "action=deploy status=failed site_root=${SITE_ROOT} source=${SOURCE_DIR}" "$SITE_NAME"
+    exit 5
   fi
-
-  local to_delete
-  to_delete="$(echo "$releases" | head -n "$(($count - $KEEP))")"
-  while read -r rel; do
-    [[ -z "$rel" ]] && continue
-    rm -rf "${SITE_ROOT}/releases/${rel}"
-    log "DEPLOY" "action=cleanup status=success release=${rel} site_root=${SITE_ROOT}"
-  done <<< "$to_delete"
 }
 
 if [[ -n "$ROLLBACK_TS" ]]; then
@@ -0,0 +1,21 @@
+# Shared JSON event-log helpers for the SiteHub shell scripts.
+# Callers set LOG_FILE before sourcing; log() appends one JSON line per call.
+
+ts() { date +"%Y-%m-%dT%H:%M:%S%z"; }
+json_escape() {
+  local s="$1"
+  s="${s//\\/\\\\}"
+  s="${s//\"/\\\"}"
+  s="${s//$'\n'/\\n}"
+  s="${s//$'\r'/\\r}"
+  s="${s//$'\t'/\\t}"
+  printf '%s' "$s"
+}
+log() {
+  local site_field=""
+  if [[ -n "${3:-}" ]]; then
+    site_field=",\"site\":\"$(json_escape "$3")\""
+  fi
+  printf '{"ts":"%s","category":"%s"%s,"message":"%s"}\n' \
+    "$(ts)" "$1" "$site_field" "$(json_escape "$2")" >> "$LOG_FILE"
+}
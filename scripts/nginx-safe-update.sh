@@ -2,11 +2,10 @@
 set -euo pipefail
 
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-LOG_FILE="${ROOT_DIR}/sitehub.log"
+LOG_FILE="${SITEHUB_LOG_FILE:-${ROOT_DIR}/sitehub.log}"
 NGINX_BIN="${NGINX_BIN:-nginx}"
 
-ts() { date +"%Y-%m-%dT%H:%M:%S%z"; }
-log() { echo "$(ts) [$1] $2" >> "$LOG_FILE"; }
+source "$(dirname "${BASH_SOURCE[0]}")/lib/log.sh"
 
 usage() {
   cat <<'USAGE'
@@ -56,15 +55,17 @@ if [[ -z "$SRC" || -z "$DEST" ]]; then
   exit 2
 fi
 
+SITE_NAME="$(basename "$DEST" .conf)"
+
 if [[ ! -f "$SRC" ]]; then
   echo "ERR src not found: $SRC" >&2
   exit 2
 fi
 
 if [[ "$DRY_RUN" == "true" ]]; then
-  log "NGINX" "action=dry_run status=begin src=${SRC}"
+  log "NGINX" "action=dry_run status=begin src=${SRC}" "$SITE_NAME"
   "$NGINX_BIN" -t -c "$SRC"
-  log "NGINX" "action=dry_run status=success src=${SRC}"
+  log "NGINX" "action=dry_run status=success src=${SRC}" "$SITE_NAME"
   echo "OK: dry-run validated: $SRC"
   exit 0
 fi
@@ -76,23 +77,23 @@ fi
 
 backup="${DEST}.bak.$(date +"%Y%m%d%H%M%S")"
 cp -a "$DEST" "$backup"
-log "NGINX" "action=backup status=success dest=${DEST} backup=${backup}"
+log "NGINX" "action=backup status=success dest=${DEST} backup=${backup}" "$SITE_NAME"
 
 cp -a "$SRC" "$DEST"
 chmod 644 "$DEST"
 
 if ! "$NGINX_BIN" -t; then
   cp -a "$backup" "$DEST"
-  log "NGINX" "action=apply status=failed dest=${DEST} restored_from=${backup}"
+  log "NGINX" "action=apply status=failed dest=${DEST} restored_from=${backup}" "$SITE_NAME"
   echo "ERR nginx -t failed; restored backup: $backup" >&2
   exit 3
 fi
 
 if ! "$NGINX_BIN" -s reload; then
-  log "NGINX" "action=reload status=failed dest=${DEST}"
+  log "NGINX" "action=reload status=failed dest=${DEST}" "$SITE_NAME"
   echo "ERR nginx reload failed" >&2
   exit 4
 fi
 
-log "NGINX" "action=apply status=success dest=${DEST}"
+log "NGINX" "action=apply status=success dest=${DEST}" "$SITE_NAME"
 echo "OK: applied config and reloaded nginx"
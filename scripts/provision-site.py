@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sitehub.config import load_settings
+from sitehub.pocketbase import PocketBaseClient
+from sitehub.services.provision_service import ProvisionService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--site", required=True)
+    parser.add_argument("--port", required=False, type=int)
+    parser.add_argument("--sites-base", required=False)
+    parser.add_argument("--no-registry", action="store_true")
+    parser.add_argument("--venv", action="store_true")
+    parser.add_argument("--requirements", required=False)
+    args = parser.parse_args()
+
+    settings = load_settings()
+    pocketbase = None if args.no_registry else PocketBaseClient.from_settings(settings)
+    service = ProvisionService(settings, pocketbase=pocketbase, sites_base=args.sites_base)
+    try:
+        result = asyncio.run(
+            service.provision(args.site, args.port, init_venv=args.venv, requirements=args.requirements)
+        )
+    except (ValueError, RuntimeError, OSError) as exc:
+        raise SystemExit(f"ERR {exc}")
+    print(f"OK: provisioned site_dir={result.site_dir} port={result.port} method={result.method}")
+    if result.venv:
+        print(f"OK: venv={result.venv} layer={result.venv_layer}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
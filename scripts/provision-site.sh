@@ -2,21 +2,20 @@
 set -euo pipefail
 
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
-LOG_FILE="${ROOT_DIR}/sitehub.log"
+LOG_FILE="${SITEHUB_LOG_FILE:-${ROOT_DIR}/sitehub.log}"
 
-ts() { date +"%Y-%m-%dT%H:%M:%S%z"; }
-log() { echo "$(ts) [$1] $2" >> "$LOG_FILE"; }
+source "$(dirname "${BASH_SOURCE[0]}")/lib/log.sh"
 
 usage() {
   cat <<'USAGE'
 Usage:
-  bash scripts/provision-site.sh --site <name> [--port <8085-8095>] [--sites-base <path>] [--no-venv]
+  bash scripts/provision-site.sh --site <name> [--port <8081-8090>] [--sites-base <path>] [--no-venv]
 
 Options:
   --site NAME        Site identifier (directory name)
-  --port PORT        Explicit port in 8085-8095 (optional)
+  --port PORT        Explicit port in 8081-8090 (optional)
   --sites-base PATH  Base directory (default: /vol1/1000/MyDocker/web-cluster/sites)
-  --no-venv          Skip virtualenv initialization
+  --no-venv          Skip virtualenv initialization (venvs are cloned from a cached template)
 USAGE
 }
 
@@ -68,7 +67,6 @@ fi
 
 site_dir="${SITES_BASE}/${SITE_NAME}"
 env_file="${site_dir}/sitehub.env"
-venv_dir="${site_dir}/.venv"
 
 mkdir -p "$site_dir"
 
@@ -85,23 +83,40 @@ read_existing_port() {
 }
 
 PYTHON_BIN="${PYTHON_BIN:-python3}"
+PORT_MIN=8081
+PORT_MAX=8090
 
-port_available() {
-  local port="$1"
-  "$PYTHON_BIN" - "$port" <<'PY'
+# Prints the subset of the given ports that are free, reading all listening
+# sockets from /proc/net/tcp{,6} in one pass (bind probe only as a fallback).
+available_ports() {
+  "$PYTHON_BIN" - "$@" <<'PY'
 import socket
 import sys
 
-p = int(sys.argv[1])
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-try:
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind(("0.0.0.0", p))
-except OSError:
-    sys.exit(1)
-finally:
-    s.close()
-sys.exit(0)
+ports = [int(p) for p in sys.argv[1:]]
+busy = set()
+scanned = False
+for name in ("/proc/net/tcp", "/proc/net/tcp6"):
+    try:
+        with open(name, encoding="ascii") as handle:
+            scanned = True
+            for line in handle:
+                parts = line.split()
+                if len(parts) > 3 and parts[3] == "0A":
+                    busy.add(int(parts[1].rsplit(":", 1)[1], 16))
+    except (OSError, ValueError):
+        continue
+if not scanned:
+    for p in ports:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind(("0.0.0.0", p))
+        except OSError:
+            busy.add(p)
+        finally:
+            s.close()
+print(" ".join(str(p) for p in ports if p not in busy))
 PY
 }
 
@@ -110,7 +125,7 @@ validate_port_range() {
   if [[ ! "$port" =~ ^[0-9]+$ ]]; then
     return 1
   fi
-  if [[ "$port" -lt 8085 || "$port" -gt 8095 ]]; then
+  if [[ "$port" -lt "$PORT_MIN" || "$port" -gt "$PORT_MAX" ]]; then
     return 1
   fi
   return 0
@@ -120,10 +135,10 @@ selected_port=""
 
 if [[ -n "$EXPLICIT_PORT" ]]; then
   if ! validate_port_range "$EXPLICIT_PORT"; then
-    echo "ERR --port must be within 8085-8095" >&2
+    echo "ERR --port must be within ${PORT_MIN}-${PORT_MAX}" >&2
     exit 2
   fi
-  if ! port_available "$EXPLICIT_PORT"; then
+  if [[ -z "$(available_ports "$EXPLICIT_PORT")" ]]; then
     echo "ERR port already in use: $EXPLICIT_PORT" >&2
     exit 3
   fi
@@ -136,16 +151,12 @@ else
   fi
 
   if [[ -z "$selected_port" ]]; then
-    for p in $(seq 8085 8095); do
-      if port_available "$p"; then
-        selected_port="$p"
-        break
-      fi
-    done
+    # shellcheck disable=SC2046
+    read -r selected_port _ <<< "$(available_ports $(seq "$PORT_MIN" "$PORT_MAX"))" || true
   fi
 
   if [[ -z "$selected_port" ]]; then
-    echo "ERR no available ports in range 8085-8095" >&2
+    echo "ERR no available ports in range ${PORT_MIN}-${PORT_MAX}" >&2
     exit 3
   fi
 fi
@@ -156,13 +167,13 @@ fi
 } > "$env_file"
 
 if [[ "$INIT_VENV" == "true" ]]; then
-  if [[ -d "$venv_dir" ]]; then
-    echo "OK: venv already exists: $venv_dir"
-  else
-    "$PYTHON_BIN" -m venv "$venv_dir"
-    echo "OK: created venv: $venv_dir"
+  venv_args=(--site-dir "$site_dir" --python "$PYTHON_BIN")
+  if [[ -f "${site_dir}/requirements.txt" ]]; then
+    venv_args+=(--requirements "${site_dir}/requirements.txt")
   fi
+  PYTHONPATH="${ROOT_DIR}/src${PYTHONPATH:+:${PYTHONPATH}}" \
+    "$PYTHON_BIN" "${ROOT_DIR}/scripts/provision-venv.py" "${venv_args[@]}"
 fi
 
 echo "OK: provisioned site_dir=${site_dir} port=${selected_port}"
-log "PROVISION" "status=success site=${SITE_NAME} site_dir=${site_dir} port=${selected_port}"
+log "PROVISION" "status=success site=${SITE_NAME} site_dir=${site_dir} port=${selected_port}" "$SITE_NAME"
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from sitehub.config import load_settings
+from sitehub.services.venv_service import VenvProvisionError, VenvProvisioner
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--site-dir", required=True)
+    parser.add_argument("--requirements", required=False)
+    parser.add_argument("--python", required=False)
+    args = parser.parse_args()
+
+    site_dir = Path(args.site_dir).expanduser().resolve()
+    requirements = Path(args.requirements).expanduser().resolve() if args.requirements else None
+    provisioner = VenvProvisioner(load_settings(), python_bin=args.python)
+    try:
+        result = provisioner.provision(site_dir, requirements)
+    except VenvProvisionError as exc:
+        raise SystemExit(f"ERR {exc}")
+    if result.method == "existing":
+        print(f"OK: venv already exists: {result.path} layer={result.layer}")
+    else:
+        print(f"OK: created venv: {result.path} layer={result.layer} method={result.method}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from sitehub.config import load_settings
+from sitehub.pocketbase import PocketBaseClient, PocketBaseError
+from sitehub.services.reconcile_service import Reconciler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apply", action="store_true")
+    parser.add_argument("--prune", action="store_true")
+    parser.add_argument("--sites-base", required=False)
+    args = parser.parse_args()
+
+    settings = load_settings()
+    reconciler = Reconciler(settings, PocketBaseClient.from_settings(settings), sites_base=args.sites_base)
+    try:
+        result = asyncio.run(reconciler.reconcile(dry_run=not args.apply, prune=args.prune))
+    except (PocketBaseError, RuntimeError) as exc:
+        raise SystemExit(f"ERR {exc}")
+    for action in result.actions:
+        print(f"{action.kind}\t{action.name}\t{action.detail}")
+    mode = "applied" if result.applied else "plan"
+    print(f"OK: {mode} actions={len(result.actions)} written={len(result.written)} removed={len(result.removed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
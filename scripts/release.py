@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from sitehub.services.release_service import DEFAULT_KEEP, ReleaseManager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--site-root", required=True)
+    sub = parser.add_subparsers(dest="action", required=True)
+    deploy = sub.add_parser("deploy")
+    deploy.add_argument("--source", required=True)
+    deploy.add_argument("--keep", type=int, default=DEFAULT_KEEP)
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("release_id")
+    sub.add_parser("list")
+    prune = sub.add_parser("prune")
+    prune.add_argument("--keep", type=int, default=DEFAULT_KEEP)
+    args = parser.parse_args()
+
+    manager = ReleaseManager(Path(args.site_root).expanduser().resolve())
+    try:
+        if args.action == "deploy":
+            info = manager.deploy(Path(args.source).expanduser(), keep=args.keep)
+            meta = info.meta or {}
+            print(
+                f"OK: release={info.release_id} files={meta.get('file_count')} "
+                f"linked={meta.get('linked')} copied={meta.get('copied')} duration_ms={meta.get('duration_ms')}"
+            )
+            manager.wait_for_prune()
+        elif args.action == "rollback":
+            info = manager.rollback(args.release_id)
+            print(f"OK: current -> {info.path}")
+        elif args.action == "list":
+            for item in manager.list():
+                marker = "*" if item.current else " "
+                print(f"{marker} {item.release_id} {json.dumps(item.meta or {}, ensure_ascii=False)}")
+        else:
+            for release_id in manager.prune(args.keep):
+                print(f"OK: pruned {release_id}")
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"ERR {exc}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,8 @@ ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 PYTHON="${PYTHON:-${ROOT_DIR}/.venv/bin/python}"
 HOST="${HOST:-0.0.0.0}"
 PORT="${PORT:-8085}"
+WORKERS="${WORKERS:-1}"
+export SITEHUB_WORKERS="${SITEHUB_WORKERS:-${WORKERS}}"
 export SITEHUB_ENV="${SITEHUB_ENV:-dev}"
 export PYTHONPATH="${ROOT_DIR}/src${PYTHONPATH:+:${PYTHONPATH}}"
-exec "${PYTHON}" -m uvicorn sitehub.main:app --host "${HOST}" --port "${PORT}"
\ No newline at end of file
+exec "${PYTHON}" -m uvicorn sitehub.main:app --host "${HOST}" --port "${PORT}" --workers "${WORKERS}"
\ No newline at end of file
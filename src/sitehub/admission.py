@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterator, Literal
+
+from fastapi import Request
+
+from sitehub.config import Settings
+from sitehub.metrics import REGISTRY, Sample
+from sitehub.ssh import loop_scoped, ssh_target
+
+Priority = Literal["deploy", "interactive", "health"]
+
+PRIORITY_RANKS: dict[str, int] = {"deploy": 0, "interactive": 1, "health": 2}
+LOCAL_HOST = "local"
+
+
+class AdmissionRejectedError(RuntimeError):
+    def __init__(self, host: str, priority: str, reason: str, retry_after_s: int) -> None:
+        super().__init__(f"admission_rejected: host={host} priority={priority} reason={reason}")
+        self.host = host
+        self.priority = priority
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    def __init__(self, host: str, limit: int, max_queue: int, max_wait_s: float) -> None:
+        self.host = host
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None], str]] = []
+        self._seq = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _rejected(self, priority: str, reason: str) -> AdmissionRejectedError:
+        REGISTRY.inc("sitehub_admission_rejected_total", {"host": self.host, "priority": priority, "reason": reason})
+        return AdmissionRejectedError(self.host, priority, reason, max(math.ceil(self.max_wait_s), 1))
+
+    def _discard(self, entry: tuple[int, int, asyncio.Future[None], str]) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            _, _, future, _ = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: str) -> None:
+        rank = PRIORITY_RANKS[priority]
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            victim = max(self._waiters, default=None)
+            if victim is None or victim[0] <= rank:
+                raise self._rejected(priority, "queue_full")
+            self._discard(victim)
+            victim[2].set_exception(self._rejected(victim[3], "preempted"))
+        entry = (rank, next(self._seq), asyncio.get_running_loop().create_future(), priority)
+        heapq.heappush(self._waiters, entry)
+        future = entry[2]
+        try:
+            await asyncio.wait_for(future, self.max_wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            granted = future.done() and not future.cancelled() and future.exception() is None
+            if granted and isinstance(exc, asyncio.TimeoutError):
+                return
+            if granted:
+                self._release()
+            self._discard(entry)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            raise self._rejected(priority, "wait_timeout") from None
+
+    @asynccontextmanager
+    async def admit(self, priority: Priority = "interactive") -> AsyncIterator[None]:
+        if self.limit <= 0:
+            yield
+            return
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "host": self.host,
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+        }
+
+
+_controllers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AdmissionController]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def worker_share(budget: int, workers: int) -> int:
+    # Each uvicorn worker admits its own share so N workers together stay within the per-host budget.
+    if budget <= 0:
+        return budget
+    return max(budget // max(workers, 1), 1)
+
+
+def admission_controller(settings: Settings) -> AdmissionController:
+    host = ssh_target(settings) or LOCAL_HOST
+    limit = worker_share(settings.admission_max_concurrent, settings.workers)
+    max_queue = worker_share(settings.admission_max_queue, settings.workers)
+    controllers = loop_scoped(_controllers)
+    controller = controllers.get(host)
+    if controller is None:
+        controller = AdmissionController(host, limit, max_queue, settings.admission_max_wait_s)
+        controllers[host] = controller
+    controller.limit = limit
+    controller.max_queue = max_queue
+    controller.max_wait_s = settings.admission_max_wait_s
+    return controller
+
+
+def admission(priority: Priority) -> Callable[[Request], AsyncIterator[None]]:
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        async with admission_controller(request.app.state.settings).admit(priority):
+            yield
+
+    return dependency
+
+
+def _admission_samples() -> Iterator[Sample]:
+    for controller in [item for controllers in list(_controllers.values()) for item in controllers.values()]:
+        yield "sitehub_admission_active", {"host": controller.host}, float(controller.active)
+        yield "sitehub_admission_queued", {"host": controller.host}, float(controller.queued)
+
+
+REGISTRY.register_collector("admission", "gauge", _admission_samples)
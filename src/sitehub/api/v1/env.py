@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Depends, Request, Response
 
+from sitehub.admission import admission
 from sitehub.services.env_service import build_env_report, render_pretty_json
 
 
 router = APIRouter(prefix="/env", tags=["env"])
 
 
-@router.get("/health")
+@router.get("/health", dependencies=[Depends(admission("health"))])
 async def env_health(request: Request) -> Response:
     settings = request.app.state.settings
     try:
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+
+from sitehub.log_index import get_log_index
+
+
+router = APIRouter(prefix="/logs", tags=["logs"])
+
+
+@router.get("")
+async def query_logs(
+    request: Request,
+    category: str | None = Query(default=None),
+    site: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+) -> StreamingResponse:
+    index = get_log_index(request.app.state.settings)
+    since_ts = since.timestamp() if since else None
+    until_ts = until.timestamp() if until else None
+
+    def _stream() -> Iterator[bytes]:
+        yield from index.query(
+            category=category.upper() if category else None,
+            site=site,
+            since=since_ts,
+            until=until_ts,
+        )
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
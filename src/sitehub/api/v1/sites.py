@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from sitehub.admission import admission
+from sitehub.config import Settings
+from sitehub.models.site_config import PortRangeError
+from sitehub.models.sites import ReconcileRequest, ReconcileResult, SiteProvisionRequest, SiteProvisionResult
+from sitehub.pocketbase import PocketBaseClient, PocketBaseError, get_pocketbase_client
+
+
+router = APIRouter(prefix="/sites", tags=["sites"])
+
+
+@router.post(
+    "/provision",
+    response_model=SiteProvisionResult,
+    status_code=201,
+    dependencies=[Depends(admission("deploy"))],
+)
+async def provision_site(
+    request: Request,
+    payload: SiteProvisionRequest,
+    pocketbase: PocketBaseClient = Depends(get_pocketbase_client),
+) -> SiteProvisionResult:
+    from sitehub.services.provision_service import NoPortAvailableError, PortUnavailableError, ProvisionService
+
+    settings: Settings = request.app.state.settings
+    service = ProvisionService(settings, pocketbase=pocketbase)
+    try:
+        return await service.provision(
+            payload.name,
+            payload.port,
+            init_venv=payload.init_venv,
+            requirements=payload.requirements,
+        )
+    except PortRangeError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail={"error": {"type": "port_out_of_range", "message": str(exc)}},
+        ) from exc
+    except (PortUnavailableError, NoPortAvailableError) as exc:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": {"type": "port_unavailable", "message": str(exc)}},
+        ) from exc
+    except PocketBaseError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail={"error": {"type": "pocketbase_error", "message": str(exc), "details": exc.payload}},
+        ) from exc
+    except RuntimeError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail={"error": {"type": "provision_failed", "message": str(exc)}},
+        ) from exc
+
+
+@router.post("/reconcile", response_model=ReconcileResult, dependencies=[Depends(admission("deploy"))])
+async def reconcile_sites(
+    request: Request,
+    payload: ReconcileRequest,
+    pocketbase: PocketBaseClient = Depends(get_pocketbase_client),
+) -> ReconcileResult:
+    from sitehub.services.deploy_service import NginxEngine
+    from sitehub.services.reconcile_service import Reconciler
+
+    settings: Settings = request.app.state.settings
+    nginx = NginxEngine(settings, conf_index=getattr(request.app.state, "conf_index", None))
+    reconciler = Reconciler(settings, pocketbase, nginx=nginx)
+    try:
+        return await reconciler.reconcile(dry_run=payload.dry_run, prune=payload.prune)
+    except PocketBaseError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail={"error": {"type": "pocketbase_error", "message": str(exc), "details": exc.payload}},
+        ) from exc
+    except RuntimeError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail={"error": {"type": "reconcile_failed", "message": str(exc)}},
+        ) from exc
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Mapping
+from typing import Awaitable, Callable, Mapping
+
+logger = logging.getLogger("sitehub")
 
 
 @dataclass(frozen=True)
@@ -27,11 +32,63 @@ class Settings:
     env_probe_timeout_s: float
     nginx_conf_path: str | None
     nginx_conf_dir: str | None
+    log_file: str | None = None
+    log_max_bytes: int = 64 * 1024 * 1024
+    log_max_age_s: float = 7 * 24 * 3600.0
+    cache_dir: str | None = None
+    health_poll_interval_s: float = 0.0
+    health_poll_timeout_s: float = 2.0
+    health_poll_concurrency: int = 32
+    inventory_max_age_s: float = 30.0
+    watch_enabled: bool = False
+    watch_poll_interval_s: float = 5.0
+    env_hosts: tuple[str, ...] = ()
+    deploy_quorum: str = "all"
+    ssh_max_sessions: int = 10
+    ssh_keepalive_interval_s: float = 30.0
+    ssh_breaker_threshold: int = 3
+    ssh_breaker_reset_s: float = 15.0
+    nginx_template_dir: str | None = None
+    brotli_enabled: bool = False
+    precompress_workers: int = 0
+    nginx_routing: str = "server"
+    settings_reload_interval_s: float = 2.0
+    lock_timeout_s: float = 300.0
+    admission_max_concurrent: int = 4
+    admission_max_queue: int = 32
+    admission_max_wait_s: float = 10.0
+    workers: int = 1
+    status_journal_flush_interval_s: float = 1.0
+
+
+_dotenv_cache: dict[Path, tuple[tuple[int, int], dict[str, str]]] = {}
+_dotenv_lock = threading.Lock()
+
+
+def _dotenv_stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
 
 def _read_dotenv(path: Path) -> dict[str, str]:
-    if not path.exists() or not path.is_file():
+    if not path.is_file():
         return {}
+    stamp = _dotenv_stamp(path)
+    with _dotenv_lock:
+        cached = _dotenv_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    data = _parse_dotenv(path)
+    if stamp is not None:
+        with _dotenv_lock:
+            _dotenv_cache[path] = (stamp, data)
+    return data
+
+
+def _parse_dotenv(path: Path) -> dict[str, str]:
     data: dict[str, str] = {}
     for raw in path.read_text(encoding="utf-8").splitlines():
         line = raw.strip()
@@ -86,13 +143,26 @@ def _env_float(name: str, default: float, *, dotenv: Mapping[str, str]) -> float
     return float(value)
 
 
+def _env_bool(name: str, default: bool, *, dotenv: Mapping[str, str]) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        value = dotenv.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 def _default_dotenv_path() -> Path:
     return Path(__file__).resolve().parents[2] / ".env"
 
 
+def dotenv_path() -> Path:
+    path = os.getenv("SITEHUB_DOTENV_PATH")
+    return Path(path) if path else _default_dotenv_path()
+
+
 def load_settings() -> Settings:
-    dotenv_path = os.getenv("SITEHUB_DOTENV_PATH")
-    dotenv = _read_dotenv(Path(dotenv_path) if dotenv_path else _default_dotenv_path())
+    dotenv = _read_dotenv(dotenv_path())
     env = _env_str("SITEHUB_ENV", dotenv=dotenv) or "dev"
     port = _env_int("PORT", 8085, dotenv=dotenv)
     pocketbase_url = _env_str("POCKETBASE_URL", dotenv=dotenv) or "http://localhost:8090"
@@ -111,6 +181,40 @@ def load_settings() -> Settings:
     env_probe_timeout_s = _env_float("SITEHUB_ENV_PROBE_TIMEOUT", 5.0, dotenv=dotenv)
     nginx_conf_path = _env_str("NGINX_CONF_PATH", dotenv=dotenv)
     nginx_conf_dir = _env_str("NGINX_CONF_DIR", dotenv=dotenv)
+    log_file = _env_str("SITEHUB_LOG_FILE", dotenv=dotenv)
+    if log_file:
+        log_file = str(Path(log_file).expanduser())
+    log_max_bytes = _env_int("SITEHUB_LOG_MAX_BYTES", 64 * 1024 * 1024, dotenv=dotenv)
+    log_max_age_s = _env_float("SITEHUB_LOG_MAX_AGE", 7 * 24 * 3600.0, dotenv=dotenv)
+    cache_dir = _env_str("SITEHUB_CACHE_DIR", dotenv=dotenv)
+    cache_dir = str(Path(cache_dir).expanduser()) if cache_dir else str(
+        Path(__file__).resolve().parents[2] / ".sitehub-cache"
+    )
+    health_poll_interval_s = _env_float("SITEHUB_HEALTH_POLL_INTERVAL", 0.0, dotenv=dotenv)
+    health_poll_timeout_s = _env_float("SITEHUB_HEALTH_POLL_TIMEOUT", 2.0, dotenv=dotenv)
+    health_poll_concurrency = _env_int("SITEHUB_HEALTH_POLL_CONCURRENCY", 32, dotenv=dotenv)
+    inventory_max_age_s = _env_float("SITEHUB_INVENTORY_MAX_AGE", 30.0, dotenv=dotenv)
+    watch_enabled = _env_bool("SITEHUB_WATCH", False, dotenv=dotenv)
+    watch_poll_interval_s = _env_float("SITEHUB_WATCH_POLL_INTERVAL", 5.0, dotenv=dotenv)
+    env_hosts = tuple(
+        item.strip() for item in (_env_str("SITEHUB_ENV_HOSTS", dotenv=dotenv) or "").split(",") if item.strip()
+    )
+    deploy_quorum = _env_str("SITEHUB_DEPLOY_QUORUM", dotenv=dotenv) or "all"
+    ssh_max_sessions = _env_int("SITEHUB_SSH_MAX_SESSIONS", 10, dotenv=dotenv)
+    ssh_keepalive_interval_s = _env_float("SITEHUB_SSH_KEEPALIVE_INTERVAL", 30.0, dotenv=dotenv)
+    ssh_breaker_threshold = _env_int("SITEHUB_SSH_BREAKER_THRESHOLD", 3, dotenv=dotenv)
+    ssh_breaker_reset_s = _env_float("SITEHUB_SSH_BREAKER_RESET", 15.0, dotenv=dotenv)
+    nginx_template_dir = _env_str("SITEHUB_NGINX_TEMPLATE_DIR", dotenv=dotenv)
+    brotli_enabled = _env_bool("SITEHUB_BROTLI", False, dotenv=dotenv)
+    precompress_workers = _env_int("SITEHUB_PRECOMPRESS_WORKERS", 0, dotenv=dotenv)
+    nginx_routing = _env_str("SITEHUB_NGINX_ROUTING", dotenv=dotenv) or "server"
+    settings_reload_interval_s = _env_float("SITEHUB_SETTINGS_RELOAD_INTERVAL", 2.0, dotenv=dotenv)
+    lock_timeout_s = _env_float("SITEHUB_LOCK_TIMEOUT", 300.0, dotenv=dotenv)
+    admission_max_concurrent = _env_int("SITEHUB_ADMISSION_MAX_CONCURRENT", 4, dotenv=dotenv)
+    admission_max_queue = _env_int("SITEHUB_ADMISSION_MAX_QUEUE", 32, dotenv=dotenv)
+    admission_max_wait_s = _env_float("SITEHUB_ADMISSION_MAX_WAIT", 10.0, dotenv=dotenv)
+    workers = _env_int("SITEHUB_WORKERS", 1, dotenv=dotenv)
+    status_journal_flush_interval_s = _env_float("SITEHUB_STATUS_JOURNAL_FLUSH_INTERVAL", 1.0, dotenv=dotenv)
     effective_app_root_dir = app_root_dir
     if effective_app_root_dir is None:
         if env == "prod":
@@ -144,4 +248,91 @@ def load_settings() -> Settings:
         env_probe_timeout_s=env_probe_timeout_s,
         nginx_conf_path=nginx_conf_path,
         nginx_conf_dir=nginx_conf_dir,
+        log_file=log_file,
+        log_max_bytes=log_max_bytes,
+        log_max_age_s=log_max_age_s,
+        cache_dir=cache_dir,
+        health_poll_interval_s=health_poll_interval_s,
+        health_poll_timeout_s=health_poll_timeout_s,
+        health_poll_concurrency=health_poll_concurrency,
+        inventory_max_age_s=inventory_max_age_s,
+        watch_enabled=watch_enabled,
+        watch_poll_interval_s=watch_poll_interval_s,
+        env_hosts=env_hosts,
+        deploy_quorum=deploy_quorum,
+        ssh_max_sessions=ssh_max_sessions,
+        ssh_keepalive_interval_s=ssh_keepalive_interval_s,
+        ssh_breaker_threshold=ssh_breaker_threshold,
+        ssh_breaker_reset_s=ssh_breaker_reset_s,
+        nginx_template_dir=nginx_template_dir,
+        brotli_enabled=brotli_enabled,
+        precompress_workers=precompress_workers,
+        nginx_routing=nginx_routing,
+        settings_reload_interval_s=settings_reload_interval_s,
+        lock_timeout_s=lock_timeout_s,
+        admission_max_concurrent=admission_max_concurrent,
+        admission_max_queue=admission_max_queue,
+        admission_max_wait_s=admission_max_wait_s,
+        workers=workers,
+        status_journal_flush_interval_s=status_journal_flush_interval_s,
     )
+
+
+SettingsListener = Callable[[Settings, Settings], Awaitable[None]]
+
+
+class SettingsProvider:
+    def __init__(self, settings: Settings | None = None, interval_s: float | None = None) -> None:
+        self._stamp = _dotenv_stamp(dotenv_path())
+        self._settings = settings or load_settings()
+        self.interval_s = self._settings.settings_reload_interval_s if interval_s is None else interval_s
+        self._listeners: list[SettingsListener] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def get(self) -> Settings:
+        return self._settings
+
+    def subscribe(self, listener: SettingsListener) -> None:
+        self._listeners.append(listener)
+
+    async def reload(self, force: bool = False) -> bool:
+        async with self._lock:
+            stamp = _dotenv_stamp(dotenv_path())
+            if stamp == self._stamp and not force:
+                return False
+            settings = load_settings()
+            self._stamp = stamp
+            if settings == self._settings:
+                return False
+            previous, self._settings = self._settings, settings
+            for listener in self._listeners:
+                try:
+                    await listener(previous, settings)
+                except Exception:
+                    logger.exception("settings_listener_failed")
+            logger.info("settings_reloaded env=%s", settings.env)
+            return True
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.reload()
+            except ValueError as exc:
+                logger.warning("settings_reload_failed error=%s", exc)
+            except Exception:
+                logger.exception("settings_reload_failed")
+
+    def start(self) -> None:
+        if self._task is None and self.interval_s > 0:
+            self._task = asyncio.create_task(self.run(), name="sitehub-settings-provider")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
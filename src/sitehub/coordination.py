@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, TextIO
+
+from sitehub.config import Settings
+
+COORDINATION_DIR_NAME = "coordination"
+JOURNAL_NAME = "journal.sqlite"
+PROVISION_LOCK = "provision"
+LEADER_LOCK = "leader"
+PORT_LEASE_TTL_S = 600.0
+LOCK_POLL_INTERVAL_S = 0.05
+LOCK_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS holders (name TEXT PRIMARY KEY, pid INTEGER NOT NULL, acquired_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS leases (port INTEGER PRIMARY KEY, name TEXT NOT NULL, pid INTEGER NOT NULL, "
+    "expires_at REAL NOT NULL)",
+)
+
+
+class LockTimeoutError(RuntimeError):
+    def __init__(self, name: str, holder_pid: int | None) -> None:
+        super().__init__(f"lock_timeout: {name} held_by_pid={holder_pid if holder_pid is not None else 'unknown'}")
+        self.name = name
+        self.holder_pid = holder_pid
+
+
+def deploy_lock(host: str, site: str) -> str:
+    return f"deploy-{host}-{site}"
+
+
+def nginx_lock(host: str) -> str:
+    return f"nginx-{host}"
+
+
+def routes_lock(host: str) -> str:
+    return f"routes-{host}"
+
+
+class Coordinator:
+    def __init__(self, root: Path, lock_timeout_s: float = 300.0) -> None:
+        self.root = root
+        self.lock_timeout_s = lock_timeout_s
+        (root / "locks").mkdir(parents=True, exist_ok=True)
+        self._held: dict[str, TextIO] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(root / JOURNAL_NAME), timeout=10.0, isolation_level=None, check_same_thread=False
+        )
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def close(self) -> None:
+        for name in list(self._held):
+            self.release_hold(name)
+        with self._lock:
+            self._conn.close()
+
+    def _lock_path(self, name: str) -> Path:
+        return self.root / "locks" / f"{LOCK_NAME_RE.sub('_', name)}.lock"
+
+    def _try_flock(self, name: str) -> TextIO | None:
+        handle = self._lock_path(name).open("a")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return None
+        return handle
+
+    def _record_holder(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO holders (name, pid, acquired_at) VALUES (?, ?, ?)",
+                (name, os.getpid(), time.time()),
+            )
+
+    def _clear_holder(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM holders WHERE name = ? AND pid = ?", (name, os.getpid()))
+
+    def holder(self, name: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute("SELECT pid FROM holders WHERE name = ?", (name,)).fetchone()
+        return int(row[0]) if row else None
+
+    @asynccontextmanager
+    async def lock(self, name: str, timeout_s: float | None = None) -> AsyncIterator[None]:
+        deadline = time.monotonic() + (self.lock_timeout_s if timeout_s is None else timeout_s)
+        handle = self._try_flock(name)
+        while handle is None:
+            if time.monotonic() >= deadline:
+                raise LockTimeoutError(name, self.holder(name))
+            await asyncio.sleep(LOCK_POLL_INTERVAL_S)
+            handle = self._try_flock(name)
+        try:
+            self._record_holder(name)
+            yield
+        finally:
+            try:
+                self._clear_holder(name)
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                handle.close()
+
+    def try_hold(self, name: str) -> bool:
+        if name in self._held:
+            return True
+        handle = self._try_flock(name)
+        if handle is None:
+            return False
+        self._held[name] = handle
+        self._record_holder(name)
+        return True
+
+    def release_hold(self, name: str) -> None:
+        handle = self._held.pop(name, None)
+        if handle is None:
+            return
+        self._clear_holder(name)
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        handle.close()
+
+    def leased_ports(self, exclude: str | None = None) -> set[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT port FROM leases WHERE expires_at > ? AND name != ?", (time.time(), exclude or "")
+            ).fetchall()
+        return {int(row[0]) for row in rows}
+
+    def lease_port(self, name: str, port: int, ttl_s: float = PORT_LEASE_TTL_S) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT name FROM leases WHERE port = ? AND expires_at > ?", (port, now)
+                ).fetchone()
+                if row is not None and row[0] != name:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute("DELETE FROM leases WHERE name = ? OR expires_at <= ?", (name, now))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO leases (port, name, pid, expires_at) VALUES (?, ?, ?, ?)",
+                    (port, name, os.getpid(), now + ttl_s),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def release_port(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ?", (name,))
+
+
+_coordinators: dict[Path, Coordinator] = {}
+_coordinators_lock = threading.Lock()
+
+
+def get_coordinator(settings: Settings) -> Coordinator:
+    root = Path(settings.cache_dir or ".sitehub-cache") / COORDINATION_DIR_NAME
+    with _coordinators_lock:
+        coordinator = _coordinators.get(root)
+        if coordinator is None:
+            coordinator = Coordinator(root, settings.lock_timeout_s)
+            _coordinators[root] = coordinator
+        coordinator.lock_timeout_s = settings.lock_timeout_s
+        return coordinator
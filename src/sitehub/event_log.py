@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import atexit
+import fcntl
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TextIO
+
+from sitehub.config import Settings, load_settings
+
+LOG_FILE = Path(__file__).resolve().parents[2] / "sitehub.log"
+LOG_CATEGORIES = ("SSH", "NGINX", "DEPLOY", "PROVISION", "DEPENDENCY", "HEALTH")
+LOG_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+DEFAULT_LOG_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_LOG_MAX_AGE_S = 7 * 24 * 3600.0
+DEFAULT_LOG_BACKUP_COUNT = 5
+FLUSH_INTERVAL_S = 0.5
+FLUSH_BATCH_SIZE = 512
+PENDING_MAX_LINES = 8 * FLUSH_BATCH_SIZE
+
+_LOGGER_NAME = "sitehub.events"
+
+
+def format_event(category: str, message: str, *, site: str | None = None, created: float | None = None) -> str:
+    timestamp = time.strftime(LOG_TIME_FORMAT, time.localtime(created if created is not None else time.time()))
+    payload: dict[str, Any] = {"ts": timestamp, "category": category}
+    if site:
+        payload["site"] = site
+    payload["message"] = message
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _parse_timestamp(value: str) -> float | None:
+    try:
+        return datetime.strptime(value, LOG_TIME_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+
+LEGACY_LINE_RE = re.compile(r"^(\S+) \[([A-Z_]+)\] (.*)$")
+SITE_KEY_RE = re.compile(r"(?:^|\s)site=(\S+)")
+SITE_PATH_KEY_RE = re.compile(r"(?:^|\s)(?:site_dir|site_root)=(\S+)")
+
+
+@dataclass(frozen=True)
+class ParsedEvent:
+    timestamp: float
+    category: str
+    site: str | None
+    message: str
+
+
+def _site_from_message(message: str) -> str | None:
+    match = SITE_KEY_RE.search(message)
+    if match:
+        return match.group(1)
+    match = SITE_PATH_KEY_RE.search(message)
+    if match:
+        return match.group(1).rstrip("/").rsplit("/", 1)[-1] or None
+    return None
+
+
+def parse_event(line: str) -> ParsedEvent | None:
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        ts_value = data.get("ts")
+        timestamp = _parse_timestamp(ts_value) if isinstance(ts_value, str) else None
+        if timestamp is None:
+            return None
+        message = str(data.get("message", ""))
+        site = data.get("site")
+        return ParsedEvent(
+            timestamp=timestamp,
+            category=str(data.get("category", "")),
+            site=str(site) if site else _site_from_message(message),
+            message=message,
+        )
+    match = LEGACY_LINE_RE.match(line)
+    if not match:
+        return None
+    timestamp = _parse_timestamp(match.group(1))
+    if timestamp is None:
+        return None
+    message = match.group(3)
+    return ParsedEvent(
+        timestamp=timestamp,
+        category=match.group(2),
+        site=_site_from_message(message),
+        message=message,
+    )
+
+
+class EventLogWriter(threading.Thread):
+    def __init__(
+        self,
+        records: queue.SimpleQueue[logging.LogRecord | None],
+        path: Path,
+        *,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        max_age_s: float = DEFAULT_LOG_MAX_AGE_S,
+        backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        batch_size: int = FLUSH_BATCH_SIZE,
+    ) -> None:
+        super().__init__(name="sitehub-event-log", daemon=True)
+        self.records = records
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.backup_count = backup_count
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self._opened_at = time.time()
+        self._stream: TextIO | None = None
+        self._pending: list[str] = []
+        self.dropped = 0
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self.records.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            batch: list[logging.LogRecord] = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.records.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write_batch(batch)
+        self._close_stream()
+
+    def _write_batch(self, batch: list[logging.LogRecord]) -> None:
+        self._pending.extend(
+            format_event(
+                str(getattr(record, "category", "SITEHUB")),
+                record.getMessage(),
+                site=getattr(record, "site", None),
+                created=record.created,
+            )
+            + "\n"
+            for record in batch
+        )
+        lines = "".join(self._pending)
+        try:
+            stream = self._open()
+            if self._should_rotate(stream, len(lines.encode("utf-8"))):
+                stream = self._rotate_shared(len(lines.encode("utf-8")))
+            stream.write(lines)
+            stream.flush()
+        except Exception:
+            self._close_stream()
+            # Keep the lines for the next batch; only the oldest overflow is given up, and counted.
+            overflow = len(self._pending) - PENDING_MAX_LINES
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+            return
+        self._pending.clear()
+
+    def _open(self) -> TextIO:
+        if self._stream is not None and not self._is_current(self._stream):
+            # Another worker rotated the shared file; follow it instead of writing into the backup.
+            self._close_stream()
+        if self._stream is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = self.path.open("a", encoding="utf-8")
+            self._opened_at = self._first_line_time() or time.time()
+        return self._stream
+
+    def _is_current(self, stream: TextIO) -> bool:
+        try:
+            return os.stat(self.path).st_ino == os.fstat(stream.fileno()).st_ino
+        except OSError:
+            return False
+
+    def _rotate_shared(self, incoming_bytes: int) -> TextIO:
+        lock_path = self.path.with_name(f".{self.path.name}.lock")
+        with lock_path.open("a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                # Re-check under the lock: a worker that lost the race sees the fresh file and writes there.
+                stream = self._open()
+                if self._should_rotate(stream, incoming_bytes):
+                    self._rotate()
+                    stream = self._open()
+                return stream
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _close_stream(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+    def _should_rotate(self, stream: TextIO, incoming_bytes: int) -> bool:
+        size = os.fstat(stream.fileno()).st_size
+        if size == 0:
+            return False
+        if size + incoming_bytes > self.max_bytes:
+            return True
+        return time.time() - self._opened_at > self.max_age_s
+
+    def _rotate(self) -> None:
+        self._close_stream()
+        now = time.time()
+        suffix = time.strftime("%Y%m%d%H%M%S", time.localtime(now)) + f"{int(now % 1 * 1_000_000):06d}"
+        target = self.path.with_name(f"{self.path.name}.{suffix}")
+        counter = 0
+        while target.exists():
+            counter += 1
+            target = self.path.with_name(f"{self.path.name}.{suffix}-{counter}")
+        self.path.rename(target)
+        backups = sorted(self.path.parent.glob(f"{self.path.name}.[0-9]*"), key=lambda p: p.name)
+        while len(backups) > self.backup_count:
+            oldest = backups.pop(0)
+            try:
+                oldest.unlink()
+            except OSError:
+                break
+
+    def _first_line_time(self) -> float | None:
+        try:
+            with self.path.open("r", encoding="utf-8", errors="replace") as handle:
+                line = handle.readline()
+        except OSError:
+            return None
+        event = parse_event(line)
+        return event.timestamp if event else None
+
+
+class EventLog:
+    def __init__(
+        self,
+        path: Path = LOG_FILE,
+        *,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        max_age_s: float = DEFAULT_LOG_MAX_AGE_S,
+        backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self.path = path
+        self._records: queue.SimpleQueue[logging.LogRecord | None] = queue.SimpleQueue()
+        self._handler = logging.handlers.QueueHandler(self._records)
+        self._logger = logging.Logger(_LOGGER_NAME)
+        self._logger.addHandler(self._handler)
+        self._logger.propagate = False
+        self._writer = EventLogWriter(
+            self._records,
+            path,
+            max_bytes=max_bytes,
+            max_age_s=max_age_s,
+            backup_count=backup_count,
+            flush_interval_s=flush_interval_s,
+        )
+        self._writer.start()
+
+    def emit(self, category: str, message: str, *, site: str | None = None) -> None:
+        self._logger.info(message, extra={"category": category, "site": site})
+
+    def close(self, timeout_s: float = 5.0) -> None:
+        self._records.put(None)
+        self._writer.join(timeout=timeout_s)
+
+
+_event_log: EventLog | None = None
+_event_log_lock = threading.Lock()
+
+
+def _build_event_log(settings: Settings) -> EventLog:
+    return EventLog(
+        Path(settings.log_file) if settings.log_file else LOG_FILE,
+        max_bytes=settings.log_max_bytes,
+        max_age_s=settings.log_max_age_s,
+    )
+
+
+def configure_event_log(settings: Settings) -> EventLog:
+    global _event_log
+    with _event_log_lock:
+        if _event_log is not None:
+            _event_log.close()
+        _event_log = _build_event_log(settings)
+        return _event_log
+
+
+def get_event_log() -> EventLog:
+    global _event_log
+    if _event_log is None:
+        with _event_log_lock:
+            if _event_log is None:
+                _event_log = _build_event_log(load_settings())
+    return _event_log
+
+
+def shutdown_event_log() -> None:
+    global _event_log
+    with _event_log_lock:
+        if _event_log is not None:
+            _event_log.close()
+            _event_log = None
+
+
+def log_event(category: str, message: str, *, site: str | None = None) -> None:
+    try:
+        get_event_log().emit(category, message, site=site)
+    except Exception:
+        pass
+
+
+atexit.register(shutdown_event_log)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Literal
+
+ChangeKind = Literal["conf", "site"]
+ChangeAction = Literal["created", "modified", "deleted"]
+
+logger = logging.getLogger("sitehub.events")
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    kind: ChangeKind
+    action: ChangeAction
+    name: str
+    path: str
+
+
+Subscriber = Callable[[ChangeEvent], Awaitable[None]]
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._subscribers: list[Subscriber] = []
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    async def publish(self, event: ChangeEvent) -> None:
+        for callback in list(self._subscribers):
+            try:
+                await callback(event)
+            except Exception:
+                logger.exception("event_subscriber_failed kind=%s name=%s", event.kind, event.name)
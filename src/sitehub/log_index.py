@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import mmap
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from sitehub.config import Settings
+from sitehub.event_log import LOG_FILE, parse_event
+
+INDEX_SUFFIX = ".idx"
+BUCKET_S = 3600
+SCHEMA_VERSION = 2
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS files (inode INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "inode INTEGER NOT NULL, bucket INTEGER NOT NULL, category TEXT NOT NULL, site TEXT NOT NULL, "
+    "start_offset INTEGER NOT NULL, end_offset INTEGER NOT NULL, PRIMARY KEY (inode, bucket, category, site))",
+    "CREATE INDEX IF NOT EXISTS runs_key ON runs (category, site, bucket)",
+    "CREATE INDEX IF NOT EXISTS runs_bucket ON runs (bucket)",
+)
+_LEGACY_TABLES = ("meta", "runs", "files")
+
+Run = tuple[int, str, str, int, int]
+
+
+class LogIndex:
+    def __init__(self, log_path: Path, index_path: Path | None = None) -> None:
+        self.log_path = log_path
+        self.index_path = index_path or log_path.with_name(log_path.name + INDEX_SUFFIX)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in _LEGACY_TABLES:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _log_files(self) -> list[tuple[Path, os.stat_result]]:
+        # Rotated backups (sitehub.log.<timestamp>) sort oldest first; the live file is always last.
+        paths = sorted(self.log_path.parent.glob(f"{self.log_path.name}.[0-9]*"), key=lambda path: path.name)
+        files: list[tuple[Path, os.stat_result]] = []
+        for path in (*paths, self.log_path):
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return files
+
+    def refresh(self) -> int:
+        with self._lock:
+            files = self._log_files()
+            known = {int(inode): int(offset) for inode, offset in self._conn.execute("SELECT inode, offset FROM files")}
+            present = {stat.st_ino for _, stat in files}
+            for inode in set(known) - present:
+                self._forget(inode)
+            count = 0
+            for path, stat in files:
+                offset = known.get(stat.st_ino, 0)
+                if stat.st_size < offset:
+                    self._forget(stat.st_ino)
+                    offset = 0
+                if stat.st_size > offset:
+                    runs, offset, scanned = self._scan(path, offset, stat.st_size)
+                    self._conn.executemany(
+                        "INSERT INTO runs (inode, bucket, category, site, start_offset, end_offset) "
+                        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(inode, bucket, category, site) DO UPDATE SET "
+                        "start_offset = min(start_offset, excluded.start_offset), "
+                        "end_offset = max(end_offset, excluded.end_offset)",
+                        [(stat.st_ino, *run) for run in runs],
+                    )
+                    count += scanned
+                self._conn.execute(
+                    "INSERT INTO files (inode, path, offset) VALUES (?, ?, ?) "
+                    "ON CONFLICT(inode) DO UPDATE SET path = excluded.path, offset = excluded.offset",
+                    (stat.st_ino, str(path), offset),
+                )
+            self._conn.commit()
+            return count
+
+    def _forget(self, inode: int) -> None:
+        self._conn.execute("DELETE FROM runs WHERE inode = ?", (inode,))
+        self._conn.execute("DELETE FROM files WHERE inode = ?", (inode,))
+
+    @staticmethod
+    def _scan(path: Path, offset: int, size: int) -> tuple[list[Run], int, int]:
+        spans: dict[tuple[int, str, str], list[int]] = {}
+        count = 0
+        end = offset
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) as data:
+            position = offset
+            while position < size:
+                newline = data.find(b"\n", position, size)
+                if newline == -1:
+                    break
+                event = parse_event(data[position:newline].decode("utf-8", errors="replace"))
+                end = newline + 1
+                if event is not None:
+                    key = (int(event.timestamp // BUCKET_S), event.category, event.site or "")
+                    span = spans.get(key)
+                    if span is None:
+                        spans[key] = [position, end]
+                    else:
+                        span[1] = end
+                    count += 1
+                position = end
+        return [(*key, start, stop) for key, (start, stop) in spans.items()], end, count
+
+    def ranges(
+        self,
+        *,
+        category: str | None = None,
+        site: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> list[tuple[str, int, int, int]]:
+        clauses: list[str] = []
+        params: list[object] = []
+        if category:
+            clauses.append("runs.category = ?")
+            params.append(category)
+        if site:
+            clauses.append("runs.site = ?")
+            params.append(site)
+        if since is not None:
+            clauses.append("runs.bucket >= ?")
+            params.append(int(since // BUCKET_S))
+        if until is not None:
+            clauses.append("runs.bucket <= ?")
+            params.append(int(until // BUCKET_S))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.path, runs.inode, runs.start_offset, runs.end_offset FROM runs "
+                f"JOIN files ON files.inode = runs.inode{where} ORDER BY runs.inode, runs.start_offset",
+                params,
+            ).fetchall()
+        order = {str(path): position for position, (path, _) in enumerate(self._log_files())}
+        merged: list[tuple[str, int, int, int]] = []
+        for path, inode, start, end in rows:
+            if merged and merged[-1][1] == inode and start <= merged[-1][3]:
+                merged[-1] = (path, inode, merged[-1][2], max(merged[-1][3], end))
+            else:
+                merged.append((str(path), int(inode), int(start), int(end)))
+        return sorted(merged, key=lambda span: (order.get(span[0], -1), span[2]))
+
+    def query(
+        self,
+        *,
+        category: str | None = None,
+        site: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> Iterator[bytes]:
+        self.refresh()
+        spans = self.ranges(category=category, site=site, since=since, until=until)
+        for path in dict.fromkeys(span[0] for span in spans):
+            try:
+                handle = Path(path).open("rb")
+            except FileNotFoundError:
+                continue
+            with handle:
+                stat = os.fstat(handle.fileno())
+                if stat.st_size == 0:
+                    continue
+                # Skip spans recorded for an inode that has since been rotated away from this path.
+                file_spans = [
+                    (start, end) for name, inode, start, end in spans if name == path and inode == stat.st_ino
+                ]
+                with mmap.mmap(handle.fileno(), stat.st_size, access=mmap.ACCESS_READ) as data:
+                    for start, end in file_spans:
+                        yield from _matching_lines(data, start, min(end, stat.st_size), category, site, since, until)
+
+
+def _matching_lines(
+    data: mmap.mmap,
+    position: int,
+    end: int,
+    category: str | None,
+    site: str | None,
+    since: float | None,
+    until: float | None,
+) -> Iterator[bytes]:
+    while position < end:
+        newline = data.find(b"\n", position, end)
+        stop = end if newline == -1 else newline + 1
+        line = data[position:stop]
+        position = stop
+        event = parse_event(line.decode("utf-8", errors="replace"))
+        if event is None:
+            continue
+        if category and event.category != category:
+            continue
+        if site and event.site != site:
+            continue
+        if since is not None and event.timestamp < since:
+            continue
+        if until is not None and event.timestamp > until:
+            continue
+        yield line
+
+
+_indexes: dict[Path, LogIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_log_index(settings: Settings) -> LogIndex:
+    log_path = Path(settings.log_file) if settings.log_file else LOG_FILE
+    with _indexes_lock:
+        index = _indexes.get(log_path)
+        if index is None:
+            index = LogIndex(log_path)
+            _indexes[log_path] = index
+        return index
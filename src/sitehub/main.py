@@ -1,38 +1,177 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
+import importlib
 import logging
-from typing import Any, AsyncIterator
+import sys
+from typing import Any, AsyncIterator, Callable
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-
-from sitehub.api.v1.apps import router as apps_router
-from sitehub.api.v1.env import router as env_router
-from sitehub.config import load_settings
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from sitehub.admission import AdmissionRejectedError
+from sitehub.config import Settings, SettingsProvider, load_settings
+from sitehub.event_log import configure_event_log, shutdown_event_log
+from sitehub.events import EventBus
+from sitehub.metrics import REGISTRY
+from sitehub.ssh import SSHMaster, ssh_base_args
+
+API_ROUTERS = (
+    "sitehub.api.v1.apps",
+    "sitehub.api.v1.env",
+    "sitehub.api.v1.logs",
+    "sitehub.api.v1.sites",
+)
 
 logger = logging.getLogger("sitehub")
 
 
+def _include_routers(app: FastAPI) -> None:
+    for module_name in API_ROUTERS:
+        app.include_router(importlib.import_module(module_name).router)
+
+
 def create_app() -> FastAPI:
     settings = load_settings()
 
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         app.state.settings = settings
+        configure_event_log(settings)
+        ssh_master = SSHMaster(settings)
+        ssh_master.start()
+        app.state.ssh_master = ssh_master
+        app.state.event_bus = EventBus()
+        status_flusher: Any = None
+        health_poller: Any = None
+        watcher: Any = None
+        leader: Any = None
+        unsubscribes: list[Callable[[], None]] = []
+
+        def start_status_flusher(current: Settings) -> None:
+            nonlocal status_flusher
+            status_journal = None
+            if current.status_journal_flush_interval_s > 0:
+                from sitehub.status_journal import StatusFlusher, get_status_journal
+
+                status_journal = get_status_journal(current)
+                if status_journal is not None:
+                    status_flusher = StatusFlusher(current, status_journal)
+                    status_flusher.start()
+            app.state.status_journal = status_journal
+            app.state.status_flusher = status_flusher
+
+        def release_leader() -> None:
+            nonlocal leader
+            if leader is not None:
+                from sitehub.coordination import LEADER_LOCK
+
+                leader.release_hold(LEADER_LOCK)
+                leader = None
+
+        def start_health_poller(current: Settings) -> None:
+            nonlocal health_poller, leader
+            app.state.health_poller = None
+            if current.health_poll_interval_s <= 0:
+                release_leader()
+                return
+            if leader is None:
+                from sitehub.coordination import LEADER_LOCK, get_coordinator
+
+                coordinator = get_coordinator(current)
+                leader = coordinator if coordinator.try_hold(LEADER_LOCK) else None
+            if leader is not None:
+                from sitehub.services.health_service import HealthPoller
+
+                health_poller = HealthPoller(current, journal=app.state.status_journal)
+                health_poller.start()
+                app.state.health_poller = health_poller
+
+        async def start_watcher(current: Settings) -> None:
+            nonlocal watcher
+            app.state.conf_index = None
+            if not current.watch_enabled:
+                return
+            from sitehub.services.deploy_service import ConfIndex
+            from sitehub.services.inventory_service import get_inventory
+            from sitehub.services.watch_service import RemoteWatcher
+
+            watcher = RemoteWatcher(current, app.state.event_bus)
+            conf_index = ConfIndex(current, watcher.conf_dir)
+            unsubscribes.append(app.state.event_bus.subscribe(conf_index.handle_event))
+            unsubscribes.append(
+                app.state.event_bus.subscribe(get_inventory(current, watcher.sites_root).handle_event)
+            )
+            try:
+                await conf_index.load()
+                app.state.conf_index = conf_index
+            except RuntimeError as exc:
+                logger.warning("conf_index_load_failed error=%s", exc)
+            watcher.start()
+
+        async def stop_components() -> None:
+            nonlocal status_flusher, health_poller, watcher
+            while unsubscribes:
+                unsubscribes.pop()()
+            if health_poller is not None:
+                await health_poller.stop()
+                health_poller = None
+            if watcher is not None:
+                await watcher.stop()
+                watcher = None
+            if status_flusher is not None:
+                await status_flusher.stop()
+                status_flusher = None
+
+        async def apply_settings(previous: Settings, current: Settings) -> None:
+            app.state.settings = current
+            if (previous.log_file, previous.log_max_bytes, previous.log_max_age_s) != (
+                current.log_file,
+                current.log_max_bytes,
+                current.log_max_age_s,
+            ):
+                configure_event_log(current)
+            if (ssh_base_args(previous), previous.ssh_keepalive_interval_s) != (
+                ssh_base_args(current),
+                current.ssh_keepalive_interval_s,
+            ):
+                stale = app.state.ssh_master
+                app.state.ssh_master = SSHMaster(current)
+                app.state.ssh_master.start()
+                await stale.stop(close=True)
+            inventory_service = sys.modules.get("sitehub.services.inventory_service")
+            if inventory_service is not None:
+                inventory_service.reset_inventories()
+            # Background components captured the old Settings (hosts, PocketBase client, watch roots); rebuild them.
+            await stop_components()
+            start_status_flusher(current)
+            start_health_poller(current)
+            await start_watcher(current)
+
+        settings_provider = SettingsProvider(settings)
+        settings_provider.subscribe(apply_settings)
+        settings_provider.start()
+        app.state.settings_provider = settings_provider
+        start_status_flusher(settings)
+        start_health_poller(settings)
+        await start_watcher(settings)
         app.state.ready = True
         logger.info("startup env=%s", settings.env)
         try:
             yield
         finally:
             app.state.ready = False
+            await settings_provider.stop()
+            await stop_components()
+            release_leader()
+            await app.state.ssh_master.stop()
+            shutdown_event_log()
 
     app = FastAPI(lifespan=lifespan)
     app.state.settings = settings
     app.state.ready = False
-    app.include_router(apps_router)
-    app.include_router(env_router)
+    _include_routers(app)
 
     @app.get("/healthz")
     async def healthz() -> dict[str, Any]:
@@ -44,6 +183,10 @@ def create_app() -> FastAPI:
             return JSONResponse(status_code=200, content={"status": "ready"})
         return JSONResponse(status_code=503, content={"status": "not_ready"})
 
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics() -> str:
+        return REGISTRY.render()
+
     @app.exception_handler(RequestValidationError)
     async def _validation_error_handler(
         request: Request, exc: RequestValidationError
@@ -70,6 +213,21 @@ def create_app() -> FastAPI:
             },
         )
 
+    @app.exception_handler(AdmissionRejectedError)
+    async def _admission_rejected_handler(request: Request, exc: AdmissionRejectedError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(exc.retry_after_s)},
+            content={
+                "error": {
+                    "type": "admission_rejected",
+                    "message": str(exc),
+                    "reason": exc.reason,
+                    "path": str(request.url.path),
+                }
+            },
+        )
+
     @app.exception_handler(Exception)
     async def _unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
         logger.exception("unhandled_error path=%s", request.url.path)
@@ -87,4 +245,9 @@ def create_app() -> FastAPI:
     return app
 
 
-app = create_app()
+def __getattr__(name: str) -> Any:
+    if name == "app":
+        application = create_app()
+        globals()["app"] = application
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
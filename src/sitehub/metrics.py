@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+def _labels(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    if not labels:
+        return f"{name} {value:g}"
+    body = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+    return f"{name}{{{body}}} {value:g}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._types: dict[str, str] = {}
+        self._values: dict[str, dict[Labels, float]] = {}
+        self._collectors: list[tuple[str, str, Collector]] = []
+
+    def inc(self, name: str, labels: dict[str, str] | None = None, value: float = 1.0) -> None:
+        with self._lock:
+            self._types.setdefault(name, "counter")
+            series = self._values.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: dict[str, str] | None = None) -> None:
+        with self._lock:
+            self._types.setdefault(name, "gauge")
+            self._values.setdefault(name, {})[_labels(labels)] = value
+
+    def get(self, name: str, labels: dict[str, str] | None = None) -> float:
+        with self._lock:
+            return self._values.get(name, {}).get(_labels(labels), 0.0)
+
+    def register_collector(self, name: str, kind: str, collector: Collector) -> None:
+        with self._lock:
+            self._collectors = [item for item in self._collectors if item[0] != name]
+            self._collectors.append((name, kind, collector))
+
+    def render(self) -> str:
+        with self._lock:
+            families = {name: (self._types[name], dict(series)) for name, series in self._values.items()}
+            collectors = list(self._collectors)
+        for _, kind, collector in collectors:
+            for sample_name, labels, value in collector():
+                families.setdefault(sample_name, (kind, {}))[1][_labels(labels)] = value
+        lines: list[str] = []
+        for name in sorted(families):
+            kind, series = families[name]
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_format(name, labels, value) for labels, value in sorted(series.items()))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -6,6 +6,10 @@ from typing import Any
 from pydantic import AnyUrl, BaseModel, Field, field_validator
 
 
+APP_PORT_MIN = 8081
+APP_PORT_MAX = 8090
+
+
 class AppStatus(str, Enum):
     running = "running"
     stopped = "stopped"
@@ -15,7 +19,7 @@ class AppStatus(str, Enum):
 
 class AppRegisterRequest(BaseModel):
     name: str = Field(min_length=1, max_length=128)
-    port: int = Field(ge=8081, le=8090)
+    port: int = Field(ge=APP_PORT_MIN, le=APP_PORT_MAX)
     path: str = Field(min_length=1, max_length=1024)
     git_repo: AnyUrl | None = None
     status: AppStatus = AppStatus.stopped
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
@@ -9,6 +10,53 @@ class PortRangeError(ValueError):
     pass
 
 
+class SupervisorConfig(BaseModel):
+    command: str
+    ports: tuple[int, int]
+    health_path: str = "/"
+    ready_timeout_s: float = Field(default=30.0, gt=0)
+    drain_s: float = Field(default=5.0, ge=0)
+
+    @field_validator("ports")
+    @classmethod
+    def _validate_ports(cls, value: tuple[int, int]) -> tuple[int, int]:
+        if value[0] == value[1]:
+            raise ValueError("supervisor_ports_must_differ")
+        return value
+
+    @field_validator("health_path")
+    @classmethod
+    def _validate_health_path(cls, value: str) -> str:
+        return value if value.startswith("/") else f"/{value}"
+
+
+class PerformanceConfig(BaseModel):
+    keepalive: int = Field(default=16, ge=0, le=1024)
+    keepalive_timeout_s: int = Field(default=60, gt=0)
+    buffering: bool = True
+    buffer_size: str | None = None
+    cache_ttl_s: int = Field(default=0, ge=0)
+    cache_zone_size: str = "10m"
+    cache_max_size: str = "1g"
+    gzip: bool = False
+    gzip_types: tuple[str, ...] = (
+        "text/css",
+        "text/plain",
+        "text/xml",
+        "application/javascript",
+        "application/json",
+        "application/xml",
+        "image/svg+xml",
+    )
+
+    @field_validator("buffer_size", "cache_zone_size", "cache_max_size")
+    @classmethod
+    def _validate_size(cls, value: str | None) -> str | None:
+        if value is None or re.fullmatch(r"\d+[kKmMgG]?", value):
+            return value
+        raise ValueError("performance_size_invalid: expected nginx size such as 16k, 10m, 1g")
+
+
 class SiteConfig(BaseModel):
     model_config = ConfigDict(extra="allow")
 
@@ -16,6 +64,12 @@ class SiteConfig(BaseModel):
     port: int
     mode: Literal["proxy", "static"] = "proxy"
     external_port: int | None = Field(default=None)
+    health_path: str | None = None
+    supervisor: SupervisorConfig | None = None
+    nginx_template: str | None = None
+    performance: PerformanceConfig | None = None
+    precompress: bool | None = None
+    fingerprint: bool | None = None
 
     @field_validator("external_port")
     @classmethod
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import re
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+from sitehub.models.apps import APP_PORT_MAX, APP_PORT_MIN
+
+SITE_NAME_RE = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]*$")
+
+
+def is_valid_site_name(value: str) -> bool:
+    return len(value) <= 128 and SITE_NAME_RE.match(value) is not None
+
+
+class SiteProvisionRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=128)
+    port: int | None = Field(default=None, ge=APP_PORT_MIN, le=APP_PORT_MAX)
+    init_venv: bool = False
+    requirements: str | None = Field(default=None, max_length=1024)
+
+    @field_validator("name")
+    @classmethod
+    def _validate_name(cls, value: str) -> str:
+        if not is_valid_site_name(value):
+            raise ValueError("name must match [a-zA-Z0-9][a-zA-Z0-9._-]*")
+        return value
+
+    @field_validator("requirements")
+    @classmethod
+    def _validate_requirements(cls, value: str | None) -> str | None:
+        if value is None:
+            return value
+        if value.startswith("/") or any(part == ".." for part in value.split("/")):
+            raise ValueError("requirements must be a relative path inside the site directory")
+        return value
+
+
+class SiteProvisionResult(BaseModel):
+    name: str
+    port: int
+    site_dir: str
+    env_file: str
+    method: str
+    changed: bool
+    venv: str | None = None
+    venv_layer: str | None = None
+
+
+class ReconcileRequest(BaseModel):
+    dry_run: bool = True
+    prune: bool = False
+
+
+class ReconcileAction(BaseModel):
+    kind: Literal[
+        "missing_conf",
+        "port_drift",
+        "orphaned_conf",
+        "foreign_conf",
+        "missing_site_dir",
+        "route_drift",
+        "superseded_conf",
+    ]
+    name: str
+    detail: str = ""
+
+
+class ReconcileResult(BaseModel):
+    dry_run: bool
+    applied: bool
+    actions: list[ReconcileAction]
+    written: list[str] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+    duration_ms: int = 0
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from sitehub.models.site_config import PerformanceConfig, SiteConfig
+
+DEFAULT_NGINX_SITE_ROOT = "/usr/share/nginx/sites"
+DEFAULT_PROXY_CACHE_DIR = "/var/cache/nginx/sitehub"
+IMMUTABLE_MAX_AGE_S = 31536000
+HTML_MAX_AGE_S = 60
+FINGERPRINT_LOCATIONS = (
+    '  location ~* "\\.[0-9a-f]{10}\\.(?:css|js|mjs|png|jpe?g|gif|svg|webp|avif|woff2?|ttf)$" {\n'
+    f'    add_header Cache-Control "public, max-age={IMMUTABLE_MAX_AGE_S}, immutable";\n'
+    "    try_files $uri =404;\n"
+    "  }\n"
+    "  location ~* \\.html?$ {\n"
+    f'    add_header Cache-Control "public, max-age={HTML_MAX_AGE_S}, must-revalidate";\n'
+    "    try_files $uri =404;\n"
+    "  }\n"
+)
+PLACEHOLDER_RE = re.compile(r"\{\{\s*([a-z_][a-z0-9_]*)\s*\}\}")
+TEMPLATE_SUFFIX = ".conf.tmpl"
+GENERATED_MARKER = "# generated by sitehub"
+ROUTES_CONF_NAME = "sitehub-routes"
+ROUTE_KEEPALIVE = 16
+ROUTE_COMMENT_RE = re.compile(r"^# route (\S+) (\d+)$", re.MULTILINE)
+ROUTES_TEMPLATE = (
+    f"{GENERATED_MARKER}: one upstream and one map entry per routed app\n"
+    "{{ route_upstreams }}"
+    "map $host $sitehub_upstream {\n"
+    "  hostnames;\n"
+    '  default "";\n'
+    "{{ route_entries }}"
+    "}\n"
+    "server {\n"
+    "  listen {{ listen }};\n"
+    "  server_name ~^.+$;\n"
+    "  location / {\n"
+    '    if ($sitehub_upstream = "") {\n'
+    "      return 404;\n"
+    "    }\n"
+    "    proxy_pass http://$sitehub_upstream;\n"
+    "    proxy_http_version 1.1;\n"
+    '    proxy_set_header Connection "";\n'
+    "    proxy_set_header Host $host;\n"
+    "    proxy_set_header X-Real-IP $remote_addr;\n"
+    "    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
+    "  }\n"
+    "}\n"
+)
+
+BUILTIN_TEMPLATES: dict[str, str] = {
+    "proxy": (
+        "{{ http_directives }}"
+        "server {\n"
+        "  listen {{ listen }};\n"
+        "  server_name {{ server_name }};\n"
+        "{{ server_directives }}"
+        "  location / {\n"
+        "    proxy_pass {{ upstream }};\n"
+        "    proxy_set_header Host $host;\n"
+        "    proxy_set_header X-Real-IP $remote_addr;\n"
+        "    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
+        "{{ location_directives }}"
+        "  }\n"
+        "}\n"
+    ),
+    "static": (
+        "server {\n"
+        "  listen {{ listen }};\n"
+        "  server_name {{ server_name }};\n"
+        "  root {{ site_root }};\n"
+        "  index index.html;\n"
+        "{{ static_compression }}"
+        "{{ cache_locations }}"
+        "  location / {\n"
+        "    try_files $uri $uri/ =404;\n"
+        "  }\n"
+        "}\n"
+    ),
+    "external": (
+        "server {\n"
+        "  listen {{ listen }};\n"
+        "  server_name _;\n"
+        "  root {{ site_root }};\n"
+        "  index index.html index.htm;\n"
+        "{{ static_compression }}"
+        "{{ cache_locations }}"
+        "  location / {\n"
+        "    try_files $uri $uri/ =404;\n"
+        "  }\n"
+        "}\n"
+    ),
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    name: str
+    fields: frozenset[str]
+    _format: str
+
+    def render(self, values: Mapping[str, object]) -> str:
+        try:
+            return self._format.format_map(values)
+        except KeyError as exc:
+            raise TemplateError(f"nginx_template_variable_missing: {self.name}: {exc.args[0]}") from None
+
+
+def compile_template(source: str, name: str = "<string>") -> CompiledTemplate:
+    parts: list[str] = []
+    fields: set[str] = set()
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(source):
+        parts.append(source[position:match.start()].replace("{", "{{").replace("}", "}}"))
+        parts.append("{" + match.group(1) + "}")
+        fields.add(match.group(1))
+        position = match.end()
+    parts.append(source[position:].replace("{", "{{").replace("}", "}}"))
+    return CompiledTemplate(name=name, fields=frozenset(fields), _format="".join(parts))
+
+
+_routes_template = compile_template(ROUTES_TEMPLATE, "routes")
+
+
+def is_generated(text: str) -> bool:
+    return text.lstrip().startswith(GENERATED_MARKER)
+
+
+def mark_generated(name: str, text: str) -> str:
+    return text if is_generated(text) else f"{GENERATED_MARKER}: {name}\n{text}"
+
+
+def upstream_name(name: str) -> str:
+    return "sitehub_" + re.sub(r"[^A-Za-z0-9_]", "_", name)
+
+
+def performance_directives(name: str, port: int, performance: PerformanceConfig | None) -> dict[str, str]:
+    blocks = {"http_directives": "", "server_directives": "", "location_directives": ""}
+    if performance is None:
+        return blocks
+    zone = upstream_name(name)
+    http: list[str] = []
+    server: list[str] = []
+    location: list[str] = []
+    if performance.keepalive > 0:
+        http.extend(
+            [
+                f"upstream {zone} {{",
+                f"  server 127.0.0.1:{port};",
+                f"  keepalive {performance.keepalive};",
+                f"  keepalive_timeout {performance.keepalive_timeout_s}s;",
+                "}",
+            ]
+        )
+        location.extend(["proxy_http_version 1.1;", 'proxy_set_header Connection "";'])
+    location.append(f"proxy_buffering {'on' if performance.buffering else 'off'};")
+    if performance.buffer_size:
+        location.extend(
+            [f"proxy_buffer_size {performance.buffer_size};", f"proxy_buffers 16 {performance.buffer_size};"]
+        )
+    if performance.cache_ttl_s > 0:
+        inactive_s = max(performance.cache_ttl_s * 10, 600)
+        http.append(
+            f"proxy_cache_path {DEFAULT_PROXY_CACHE_DIR}/{zone} levels=1:2 "
+            f"keys_zone={zone}:{performance.cache_zone_size} max_size={performance.cache_max_size} "
+            f"inactive={inactive_s}s use_temp_path=off;"
+        )
+        location.extend(
+            [
+                f"proxy_cache {zone};",
+                f"proxy_cache_valid 200 301 302 {performance.cache_ttl_s}s;",
+                "proxy_cache_use_stale error timeout updating http_500 http_502 http_503 http_504;",
+                "proxy_cache_background_update on;",
+                "proxy_cache_lock on;",
+                "add_header X-Cache-Status $upstream_cache_status;",
+            ]
+        )
+    if performance.gzip:
+        server.extend(
+            [
+                "gzip on;",
+                "gzip_vary on;",
+                "gzip_proxied any;",
+                "gzip_comp_level 5;",
+                "gzip_min_length 1024;",
+                f"gzip_types {' '.join(performance.gzip_types)};",
+            ]
+        )
+    blocks["http_directives"] = "".join(f"{line}\n" for line in http) + ("\n" if http else "")
+    blocks["server_directives"] = "".join(f"  {line}\n" for line in server)
+    blocks["location_directives"] = "".join(f"    {line}\n" for line in location)
+    return blocks
+
+
+def template_context(
+    name: str,
+    port: int,
+    mode: str = "proxy",
+    external_port: int | None = None,
+    site_root: str = DEFAULT_NGINX_SITE_ROOT,
+    performance: PerformanceConfig | None = None,
+    brotli_static: bool = False,
+    fingerprint: bool = False,
+) -> dict[str, object]:
+    keepalive = performance is not None and performance.keepalive > 0
+    return {
+        "name": name,
+        "port": port,
+        "mode": mode,
+        "external_port": external_port if external_port is not None else "",
+        "listen": external_port if external_port is not None else 80,
+        "server_name": "_" if external_port is not None else name,
+        "site_root": f"{site_root.rstrip('/')}/{name}",
+        "upstream": f"http://{upstream_name(name)}" if keepalive else f"http://127.0.0.1:{port}",
+        "cache_locations": FINGERPRINT_LOCATIONS if fingerprint else "",
+        "static_compression": "  gzip_static on;\n" + ("  brotli_static on;\n" if brotli_static else ""),
+        **performance_directives(name, port, performance),
+    }
+
+
+def routable(config: SiteConfig) -> bool:
+    return (
+        config.mode == "proxy"
+        and config.external_port is None
+        and config.nginx_template is None
+        and config.performance is None
+        and config.supervisor is None
+    )
+
+
+def parse_routes(text: str) -> dict[str, int]:
+    return {match.group(1): int(match.group(2)) for match in ROUTE_COMMENT_RE.finditer(text)}
+
+
+def render_routes(routes: Mapping[str, int]) -> str:
+    upstreams: list[str] = []
+    entries: list[str] = []
+    for name, port in sorted(routes.items()):
+        zone = upstream_name(name)
+        upstreams.append(
+            f"# route {name} {port}\n"
+            f"upstream {zone} {{\n  server 127.0.0.1:{port};\n  keepalive {ROUTE_KEEPALIVE};\n}}\n"
+        )
+        entries.append(f"  {name} {zone};\n")
+    return _routes_template.render(
+        {"listen": 80, "route_upstreams": "".join(upstreams), "route_entries": "".join(entries)}
+    )
+
+
+def default_template_name(mode: str, external_port: int | None) -> str:
+    if external_port is not None:
+        return "external"
+    return "static" if mode == "static" else "proxy"
+
+
+class TemplateEngine:
+    def __init__(
+        self,
+        template_dirs: Iterable[Path] = (),
+        site_root: str = DEFAULT_NGINX_SITE_ROOT,
+        brotli_static: bool = False,
+    ) -> None:
+        self.template_dirs = tuple(template_dirs)
+        self.site_root = site_root
+        self.brotli_static = brotli_static
+        self._compiled: dict[tuple[str, str], CompiledTemplate] = {
+            ("", name): compile_template(source, name) for name, source in BUILTIN_TEMPLATES.items()
+        }
+        self._lock = threading.Lock()
+
+    def _resolve(self, name: str, base_dir: Path | None) -> Path:
+        candidates: list[Path] = []
+        if base_dir is not None:
+            candidates.append(base_dir / name)
+        for directory in self.template_dirs:
+            candidates.extend([directory / name, directory / f"{name}{TEMPLATE_SUFFIX}"])
+        for candidate in candidates:
+            if candidate.is_file():
+                return candidate
+        raise TemplateError(f"nginx_template_not_found: {name}")
+
+    def get(self, name: str, base_dir: Path | None = None) -> CompiledTemplate:
+        builtin = self._compiled.get(("", name))
+        if builtin is not None:
+            return builtin
+        path = self._resolve(name, base_dir)
+        key = (str(path), str(path.stat().st_mtime_ns))
+        with self._lock:
+            compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = compile_template(path.read_text(encoding="utf-8"), name)
+            with self._lock:
+                self._compiled[key] = compiled
+        return compiled
+
+    def render(
+        self,
+        name: str,
+        port: int,
+        mode: str = "proxy",
+        external_port: int | None = None,
+        template: str | None = None,
+        base_dir: Path | None = None,
+        performance: PerformanceConfig | None = None,
+        fingerprint: bool = False,
+    ) -> str:
+        compiled = self.get(template or default_template_name(mode, external_port), base_dir)
+        return compiled.render(
+            template_context(
+                name, port, mode, external_port, self.site_root, performance, self.brotli_static, fingerprint
+            )
+        )
+
+    def render_site(
+        self,
+        config: SiteConfig,
+        external_port: int | None = None,
+        port: int | None = None,
+        base_dir: Path | None = None,
+    ) -> str:
+        return self.render(
+            config.name,
+            config.port if port is None else port,
+            config.mode,
+            config.external_port if external_port is None else external_port,
+            config.nginx_template,
+            base_dir,
+            config.performance,
+            config.fingerprint is True,
+        )
+
+    def render_all(self, configs: Iterable[SiteConfig], base_dir: Path | None = None) -> dict[str, str]:
+        return {config.name: self.render_site(config, base_dir=base_dir) for config in configs}
+
+
+_engine: TemplateEngine | None = None
+
+
+def get_template_engine(template_dir: str | None = None, brotli_static: bool = False) -> TemplateEngine:
+    global _engine
+    dirs = (Path(template_dir),) if template_dir else ()
+    if _engine is None or _engine.template_dirs != dirs or _engine.brotli_static != brotli_static:
+        _engine = TemplateEngine(dirs, brotli_static=brotli_static)
+    return _engine
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Mapping
 
-import httpx
 from fastapi import Request
 
 from sitehub.config import Settings
-from sitehub.models.apps import AppRecord, AppRegisterRequest
+from sitehub.lazy import lazy_import
+from sitehub.models.apps import AppRecord, AppRegisterRequest, AppStatus
+
+if TYPE_CHECKING:
+    import httpx
+
+    from sitehub.status_journal import StatusJournal
+else:
+    httpx = lazy_import("httpx")
 
 
 @dataclass(frozen=True)
@@ -25,19 +34,35 @@ class PocketBaseError(RuntimeError):
 
 
 class PocketBaseClient:
-    def __init__(self, *, base_url: str, auth: PocketBaseAuth | None = None, timeout_s: float = 10.0):
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        auth: PocketBaseAuth | None = None,
+        timeout_s: float = 10.0,
+        client: httpx.AsyncClient | None = None,
+        journal: StatusJournal | None = None,
+    ):
         self._base_url = base_url.rstrip("/")
         self._auth = auth or PocketBaseAuth()
         self._timeout_s = timeout_s
+        self._client = client
+        self.journal = journal
+        self._token: str | None = None
 
     @classmethod
-    def from_settings(cls, settings: Settings) -> PocketBaseClient:
+    def from_settings(
+        cls,
+        settings: Settings,
+        client: httpx.AsyncClient | None = None,
+        journal: StatusJournal | None = None,
+    ) -> PocketBaseClient:
         auth = PocketBaseAuth(
             token=settings.pocketbase_token,
             admin_email=settings.pocketbase_admin_email,
             admin_password=settings.pocketbase_admin_password,
         )
-        return cls(base_url=settings.pocketbase_url, auth=auth)
+        return cls(base_url=settings.pocketbase_url, auth=auth, client=client, journal=journal)
 
     async def create_app(self, payload: AppRegisterRequest) -> AppRecord:
         data = payload.model_dump(mode="json", exclude_none=True)
@@ -48,9 +73,74 @@ class PocketBaseClient:
         )
         return AppRecord.model_validate(result)
 
+    async def list_apps(self, per_page: int = 500) -> list[AppRecord]:
+        records: list[AppRecord] = []
+        page = 1
+        while True:
+            result = await self._request(
+                "GET",
+                "/api/collections/apps/records",
+                params={"page": page, "perPage": per_page},
+            )
+            items = result.get("items") if isinstance(result, dict) else None
+            if not isinstance(items, list):
+                break
+            records.extend(AppRecord.model_validate(item) for item in items)
+            total_pages = result.get("totalPages")
+            if not isinstance(total_pages, int) or page >= total_pages:
+                break
+            page += 1
+        if self.journal is not None:
+            return self.journal.overlay(records)
+        return records
+
+    async def patch_apps(
+        self, updates: Mapping[str, Mapping[str, Any]], concurrency: int = 16
+    ) -> dict[str, int | None]:
+        if not updates:
+            return {}
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        async with self._session() as client:
+            headers = await self._auth_headers(client)
+
+            async def _patch(record_id: str, fields: Mapping[str, Any]) -> int | None:
+                async with semaphore:
+                    try:
+                        resp = await client.patch(
+                            f"{self._base_url}/api/collections/apps/records/{record_id}",
+                            json=dict(fields),
+                            headers=headers,
+                        )
+                    except httpx.HTTPError:
+                        return None
+                return resp.status_code
+
+            codes = dict(zip(updates, await asyncio.gather(*(_patch(key, value) for key, value in updates.items()))))
+            unauthorized = [record_id for record_id, code in codes.items() if code == 401]
+            if unauthorized and self._can_reauthenticate():
+                self._token = None
+                headers = await self._auth_headers(client)
+                retried = await asyncio.gather(*(_patch(record_id, updates[record_id]) for record_id in unauthorized))
+                codes.update(zip(unauthorized, retried))
+        return codes
+
+    async def update_app_fields(self, updates: Mapping[str, Mapping[str, Any]], concurrency: int = 16) -> list[str]:
+        if self.journal is not None:
+            self.journal.append(updates)
+            return []
+        codes = await self.patch_apps(updates, concurrency)
+        return [record_id for record_id, code in codes.items() if code is None or code >= 400]
+
+    async def update_app_statuses(self, statuses: Mapping[str, AppStatus], concurrency: int = 16) -> list[str]:
+        return await self.update_app_fields(
+            {record_id: {"status": status.value} for record_id, status in statuses.items()}, concurrency
+        )
+
     async def _get_token(self, client: httpx.AsyncClient) -> str | None:
         if self._auth.token:
             return self._auth.token
+        if self._token:
+            return self._token
         if not self._auth.admin_email or not self._auth.admin_password:
             return None
         resp = await client.post(
@@ -63,15 +153,33 @@ class PocketBaseClient:
         token = body.get("token")
         if not isinstance(token, str) or not token:
             raise PocketBaseError(resp.status_code, "PocketBase admin auth token missing", body)
+        self._token = token
         return token
 
-    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+    def _can_reauthenticate(self) -> bool:
+        return not self._auth.token and bool(self._auth.admin_email and self._auth.admin_password)
+
+    async def _auth_headers(self, client: httpx.AsyncClient) -> dict[str, str]:
+        token = await self._get_token(client)
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[httpx.AsyncClient]:
+        if self._client is not None:
+            yield self._client
+            return
         async with httpx.AsyncClient(timeout=self._timeout_s) as client:
-            token = await self._get_token(client)
+            yield client
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        async with self._session() as client:
             headers = dict(kwargs.pop("headers", {}) or {})
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
+            headers.update(await self._auth_headers(client))
             resp = await client.request(method, f"{self._base_url}{path}", headers=headers, **kwargs)
+            if resp.status_code == 401 and self._can_reauthenticate():
+                self._token = None
+                headers.update(await self._auth_headers(client))
+                resp = await client.request(method, f"{self._base_url}{path}", headers=headers, **kwargs)
             if resp.status_code >= 400:
                 raise PocketBaseError(resp.status_code, "PocketBase request failed", resp.text)
             return resp.json()
@@ -79,4 +187,4 @@ class PocketBaseClient:
 
 def get_pocketbase_client(request: Request) -> PocketBaseClient:
     settings: Settings = request.app.state.settings
-    return PocketBaseClient.from_settings(settings)
+    return PocketBaseClient.from_settings(settings, journal=getattr(request.app.state, "status_journal", None))
@@ -2,30 +2,56 @@ from __future__ import annotations
 
 import asyncio
 import re
-import hashlib
 import shlex
 import shutil
 import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path, PurePosixPath
-from typing import Iterable, Any
-
-import yaml
+from typing import TYPE_CHECKING, Iterable, Any
 
 from sitehub.config import Settings, load_settings
-from sitehub.models.site_config import PortRangeError
-from sitehub.sitehub_yaml import SitehubYaml
-
-SSH_CONTROL_PERSIST_S = 60
-SSH_MAX_ATTEMPTS = 2
-SSH_RETRY_BACKOFF_S = 0.2
-DEFAULT_EXCLUDES = (".git/", "__pycache__/", ".venv/", ".env", ".DS_Store")
+from sitehub.coordination import get_coordinator, nginx_lock, routes_lock
+from sitehub.event_log import log_event
+from sitehub.metrics import REGISTRY
+from sitehub.models.site_config import PerformanceConfig, PortRangeError, SiteConfig
+from sitehub.nginx_templates import (
+    DEFAULT_NGINX_SITE_ROOT,
+    ROUTES_CONF_NAME,
+    TemplateEngine,
+    get_template_engine,
+    mark_generated,
+    parse_routes,
+    render_routes,
+    routable,
+)
+from sitehub.sitehub_yaml import load_sitehub_config, parse_remote_sitehub_yaml
+from sitehub.ssh import (
+    HOST_UNAVAILABLE,
+    SSH_CONNECT_FAILURE_RC,
+    SSH_TIMEOUT_RC,
+    circuit_breaker,
+    kill_process,
+    run_ssh,
+    session_semaphore,
+    ssh_base_args,
+    ssh_target,
+)
+
+if TYPE_CHECKING:
+    from sitehub.events import ChangeEvent
+    from sitehub.services.inventory_service import InventoryService
+
+DEFAULT_EXCLUDES = (".git/", "__pycache__/", ".venv/", ".env", ".DS_Store", ".sitehub-precompress.json")
 DEFAULT_NGINX_CONF_DIR = "/etc/nginx/conf.d"
 DEFAULT_NGINX_REMOTE_CONF_DIR = "/vol1/1000/MyDocker/nginx/conf.d"
-DEFAULT_NGINX_SITE_ROOT = "/usr/share/nginx/sites"
-LOG_FILE = Path(__file__).resolve().parents[3] / "sitehub.log"
 LISTEN_PORT_RE = re.compile(r"listen\s+(?:[\d\.]+:|\[[a-fA-F\d:]+\]:)?(\d+)\b")
+PROXY_PASS_PORT_RE = re.compile(r"(?:proxy_pass\s+https?://|\bserver\s+)[^:/;\s]+:(\d+)")
+CONF_BULK_MARKER = "--- sitehub-conf "
+NGINX_CONTAINER = "sitehub-nginx"
+NGINX_ROUTING_MODES = ("server", "map")
+SCP_STAGING_SUFFIX = ".sitehub-sync"
+SSH_STDIN_TIMEOUT_S = 120.0
 
 
 @dataclass(frozen=True)
@@ -48,54 +74,8 @@ class PortConflictError(RuntimeError):
         self.conflict_conf = conflict_conf
 
 
-def _ssh_target(settings: Settings) -> str | None:
-    host = settings.env_host
-    if not host:
-        return None
-    user = settings.ssh_user
-    if user:
-        return f"{user}@{host}"
-    return host
-
-
-def _ssh_control_path(settings: Settings) -> str:
-    target = _ssh_target(settings) or "unknown"
-    port = settings.ssh_port or 22
-    digest = hashlib.sha1(f"{target}:{port}".encode("utf-8")).hexdigest()[:12]
-    return f"/tmp/sitehub-ssh-{digest}"
-
-
-def _ssh_base_args(settings: Settings) -> list[str]:
-    args = [
-        "ssh",
-        "-o",
-        "BatchMode=yes",
-        "-o",
-        f"ConnectTimeout={int(settings.ssh_connect_timeout_s)}",
-        "-o",
-        "ConnectionAttempts=1",
-        "-o",
-        "PasswordAuthentication=no",
-        "-o",
-        "IdentitiesOnly=yes",
-        "-o",
-        "StrictHostKeyChecking=no",
-        "-o",
-        "UserKnownHostsFile=/dev/null",
-        "-o",
-        "LogLevel=ERROR",
-        "-o",
-        "ControlMaster=auto",
-        "-o",
-        f"ControlPersist={SSH_CONTROL_PERSIST_S}s",
-        "-o",
-        f"ControlPath={_ssh_control_path(settings)}",
-    ]
-    if settings.ssh_private_key_path:
-        args.extend(["-i", settings.ssh_private_key_path])
-    if settings.ssh_port:
-        args.extend(["-p", str(settings.ssh_port)])
-    return args
+def _template_engine(settings: Settings) -> TemplateEngine:
+    return get_template_engine(settings.nginx_template_dir, settings.brotli_enabled)
 
 
 async def _run_local_command(args: list[str], timeout_s: float) -> tuple[int, str, str]:
@@ -107,54 +87,48 @@ async def _run_local_command(args: list[str], timeout_s: float) -> tuple[int, st
     try:
         stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
     except asyncio.TimeoutError:
-        proc.kill()
+        await kill_process(proc)
         return 124, "", "timeout"
+    except asyncio.CancelledError:
+        await kill_process(proc)
+        raise
     return proc.returncode or 0, stdout.decode(), stderr.decode()
 
 
 async def _run_ssh_command(
     settings: Settings, command: str, timeout_s: float
 ) -> tuple[int, str, str]:
-    target = _ssh_target(settings)
-    if not target:
-        return 255, "", "ssh_target_missing"
-    _log_event("SSH", f"command={command}")
-    args = _ssh_base_args(settings)
-    for attempt in range(SSH_MAX_ATTEMPTS):
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            target,
-            "bash",
-            "-lc",
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        try:
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
-            rc = proc.returncode or 0
-        except asyncio.TimeoutError:
-            proc.kill()
-            rc = 124
-            stdout = b""
-            stderr = b"ssh_timeout"
-        if rc == 0:
-            return rc, stdout.decode(), stderr.decode()
-        if attempt < SSH_MAX_ATTEMPTS - 1:
-            await asyncio.sleep(SSH_RETRY_BACKOFF_S * (attempt + 1))
-            continue
-        return rc, stdout.decode(), stderr.decode()
-    return 255, "", "ssh_failed"
+    log_event("SSH", f"command={command}")
+    result = await run_ssh(settings, command, timeout_s)
+    return result.returncode, result.stdout, result.stderr
 
 
-def _log_event(category: str, message: str) -> None:
-    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S%z")
-    try:
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with LOG_FILE.open("a", encoding="utf-8") as handle:
-            handle.write(f"{timestamp} [{category}] {message}\n")
-    except Exception:
-        pass
+async def _run_ssh_with_stdin(
+    settings: Settings, command: str, content: str, timeout_s: float = SSH_STDIN_TIMEOUT_S
+) -> tuple[int, str, str]:
+    log_event("SSH", f"command={command}")
+    result = await run_ssh(settings, command, timeout_s, stdin=content, attempts=1)
+    return result.returncode, result.stdout, result.stderr
+
+
+async def _run_transfer(settings: Settings, args: list[str], timeout_s: float) -> tuple[int, str, str]:
+    # rsync and scp open their own ssh session, so they count against the same session cap and breaker.
+    breaker = circuit_breaker(settings)
+    async with session_semaphore(settings):
+        if not breaker.allow():
+            REGISTRY.inc("sitehub_ssh_rejected_total", {"host": breaker.host})
+            return SSH_CONNECT_FAILURE_RC, "", HOST_UNAVAILABLE
+        try:
+            rc, stdout, stderr = await _run_local_command(args, timeout_s)
+        except BaseException:
+            breaker.release()
+            raise
+    connect_failed = rc in (SSH_CONNECT_FAILURE_RC, SSH_TIMEOUT_RC)
+    breaker.record(not connect_failed, stderr.strip()[-200:] or str(rc))
+    REGISTRY.inc(
+        "sitehub_ssh_commands_total", {"host": breaker.host, "result": "unreachable" if connect_failed else "ok"}
+    )
+    return rc, stdout, stderr
 
 
 class SyncEngine:
@@ -163,15 +137,17 @@ class SyncEngine:
         settings: Settings,
         excludes: Iterable[str] | None = None,
         ssh_timeout_s: float | None = None,
+        inventory: InventoryService | None = None,
     ) -> None:
         self.settings = settings
         self.excludes = tuple(excludes or DEFAULT_EXCLUDES)
         self.ssh_timeout_s = ssh_timeout_s or settings.ssh_connect_timeout_s
+        self.inventory = inventory
 
     def build_rsync_command(self, local_path: Path, remote_path: str) -> list[str]:
-        ssh_args = _ssh_base_args(self.settings)
+        ssh_args = ssh_base_args(self.settings)
         ssh_command = " ".join(shlex.quote(arg) for arg in ssh_args)
-        target = _ssh_target(self.settings)
+        target = ssh_target(self.settings)
         if not target:
             raise ValueError("ssh_target_missing")
         rsync_args = [
@@ -189,16 +165,21 @@ class SyncEngine:
         return rsync_args
 
     def build_scp_command(self, local_path: Path, remote_path: str) -> list[str]:
-        target = _ssh_target(self.settings)
+        target = ssh_target(self.settings)
         if not target:
             raise ValueError("ssh_target_missing")
         scp_args = ["scp", "-r"]
-        scp_args.extend(_ssh_base_args(self.settings)[1:])
+        scp_args.extend(ssh_base_args(self.settings)[1:])
         destination = f"{target}:{remote_path}"
         scp_args.extend([str(local_path), destination])
         return scp_args
 
     async def ensure_remote_absent(self, remote_path: str) -> None:
+        name = self.inventory.owns(remote_path) if self.inventory is not None else None
+        if self.inventory is not None and name is not None:
+            if (await self.inventory.refresh(name)).present:
+                raise FileExistsError(f"remote_path_exists: {remote_path}")
+            return
         command = f"test -e {shlex.quote(remote_path)} && echo exists || true"
         rc, stdout, _ = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
         if rc == 0 and stdout.strip() == "exists":
@@ -206,38 +187,72 @@ class SyncEngine:
         if rc != 0:
             raise RuntimeError(f"remote_check_failed: {remote_path}")
 
-    async def sync(self, local_path: Path, remote_path: str, timeout_s: float = 300.0) -> SyncResult:
-        await self.ensure_remote_absent(remote_path)
+    async def ensure_remote_updatable(self, remote_path: str) -> None:
+        quoted = shlex.quote(remote_path)
+        command = f"test -e {quoted} && ! test -d {quoted} && echo file || true"
+        rc, stdout, _ = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+        if rc == 0 and stdout.strip() == "file":
+            raise FileExistsError(f"remote_path_not_directory: {remote_path}")
+        if rc != 0:
+            raise RuntimeError(f"remote_check_failed: {remote_path}")
+
+    async def sync(
+        self, local_path: Path, remote_path: str, timeout_s: float = 300.0, allow_existing: bool = False
+    ) -> SyncResult:
+        if allow_existing:
+            await self.ensure_remote_updatable(remote_path)
+        else:
+            await self.ensure_remote_absent(remote_path)
         rsync_args = self.build_rsync_command(local_path, remote_path)
-        rc, stdout, stderr = await _run_local_command(rsync_args, timeout_s)
+        rc, stdout, stderr = await _run_transfer(self.settings, rsync_args, timeout_s)
+        if self.inventory is not None:
+            self.inventory.invalidate(PurePosixPath(remote_path).name)
         if rc == 0:
             return SyncResult(method="rsync", stdout=stdout, stderr=stderr)
         if "command not found" in stderr or rc == 127:
-            return await self._fallback_scp(local_path, remote_path, timeout_s)
+            return await self._fallback_scp(local_path, remote_path, timeout_s, allow_existing)
         raise RuntimeError(f"rsync_failed: {stderr.strip() or rc}")
 
     async def _fallback_scp(
-        self, local_path: Path, remote_path: str, timeout_s: float
+        self, local_path: Path, remote_path: str, timeout_s: float, allow_existing: bool = False
     ) -> SyncResult:
         parent = str(PurePosixPath(remote_path).parent)
         mkdir_cmd = f"mkdir -p {shlex.quote(parent)}"
         rc, _, stderr = await _run_ssh_command(self.settings, mkdir_cmd, self.ssh_timeout_s)
         if rc != 0:
             raise RuntimeError(f"remote_mkdir_failed: {stderr.strip() or rc}")
+        # scp -r into an existing directory nests the upload, so updates land beside it and are swapped in.
+        upload_path = f"{remote_path.rstrip('/')}{SCP_STAGING_SUFFIX}" if allow_existing else remote_path
         with tempfile.TemporaryDirectory(prefix="sitehub-sync-") as tmp_dir:
             tmp_root = Path(tmp_dir) / local_path.name
             self._copy_with_excludes(local_path, tmp_root)
-            scp_args = self.build_scp_command(tmp_root, remote_path)
-            rc, stdout, stderr = await _run_local_command(scp_args, timeout_s)
+            if allow_existing:
+                await _run_ssh_command(self.settings, f"rm -rf {shlex.quote(upload_path)}", self.ssh_timeout_s)
+            scp_args = self.build_scp_command(tmp_root, upload_path)
+            rc, stdout, stderr = await _run_transfer(self.settings, scp_args, timeout_s)
             if rc != 0:
                 raise RuntimeError(f"scp_failed: {stderr.strip() or rc}")
+            if allow_existing:
+                await self._swap_remote_dir(upload_path, remote_path)
             await self.fix_remote_permissions(remote_path)
             return SyncResult(method="scp", stdout=stdout, stderr=stderr)
 
+    async def _swap_remote_dir(self, upload_path: str, remote_path: str) -> None:
+        old_path = shlex.quote(f"{remote_path.rstrip('/')}{SCP_STAGING_SUFFIX}.old")
+        target = shlex.quote(remote_path)
+        command = (
+            f"rm -rf {old_path} && {{ ! test -e {target} || mv {target} {old_path}; }} && "
+            f"mv {shlex.quote(upload_path)} {target} && rm -rf {old_path}"
+        )
+        rc, _, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+        if rc != 0:
+            raise RuntimeError(f"remote_swap_failed: {stderr.strip() or rc}")
+
     async def fix_remote_permissions(self, remote_path: str) -> None:
         owner = self.settings.ssh_user or "MomoWen"
         owner_quoted = shlex.quote(owner)
-        _log_event("NGINX", f"action=perm_fix status=begin path={remote_path} owner={owner}")
+        site = PurePosixPath(remote_path).name
+        log_event("NGINX", f"action=perm_fix status=begin path={remote_path} owner={owner}", site=site)
         owner_cmd = f"stat -c %U {shlex.quote(remote_path)}"
         mode_cmd = f"stat -c %a {shlex.quote(remote_path)}"
         rc_owner, stdout_owner, _ = await _run_ssh_command(
@@ -248,10 +263,14 @@ class SyncEngine:
         )
         if rc_owner == 0 and rc_mode == 0:
             if stdout_owner.strip() == owner and stdout_mode.strip() == "755":
-                _log_event("NGINX", f"action=perm_fix status=success method=precheck path={remote_path}")
+                log_event(
+                    "NGINX",
+                    f"action=perm_fix status=success method=precheck path={remote_path}",
+                    site=site,
+                )
                 return
         chmod_cmd = f"chmod -R 755 {shlex.quote(remote_path)}"
-        _log_event("NGINX", f"action=perm_fix detail=chmod_cmd value={chmod_cmd}")
+        log_event("NGINX", f"action=perm_fix detail=chmod_cmd value={chmod_cmd}", site=site)
         rc, _, stderr = await _run_ssh_command(self.settings, chmod_cmd, self.ssh_timeout_s)
         if rc != 0:
             reason = stderr.strip() or rc
@@ -263,14 +282,16 @@ class SyncEngine:
             )
             if rc_owner == 0 and rc_mode == 0:
                 if stdout_owner.strip() == owner and stdout_mode.strip() == "755":
-                    _log_event(
+                    log_event(
                         "NGINX",
                         f"action=perm_fix status=success method=postcheck path={remote_path}",
+                        site=site,
                     )
                     return
-            _log_event(
+            log_event(
                 "NGINX",
                 f"action=perm_fix status=failed method=chmod path={remote_path} reason={reason}",
+                site=site,
             )
             raise RuntimeError(f"permission_fix_failed: {reason}")
 
@@ -284,13 +305,14 @@ class SyncEngine:
             rc, _, sudo_err = await _run_ssh_command(self.settings, sudo_chown, self.ssh_timeout_s)
             if rc != 0:
                 reason = sudo_err.strip() or rc
-                _log_event(
+                log_event(
                     "NGINX",
                     f"action=perm_fix status=failed method=sudo path={remote_path} reason={reason}",
+                    site=site,
                 )
                 raise RuntimeError(f"permission_fix_failed: {reason}")
 
-        _log_event("NGINX", f"action=perm_fix status=success path={remote_path}")
+        log_event("NGINX", f"action=perm_fix status=success path={remote_path}", site=site)
 
     def _copy_with_excludes(self, source: Path, destination: Path) -> None:
         excludes = set(self.excludes)
@@ -307,60 +329,31 @@ class SyncEngine:
         )
 
     async def read_remote_sitehub_yaml(self, remote_root: str) -> tuple[dict[str, Any] | None, str | None]:
-        yaml_path = f"{remote_root.rstrip('/')}/sitehub.yaml"
-        rc, stdout, stderr = await _run_ssh_command(
-            self.settings, f"cat {shlex.quote(yaml_path)}", self.ssh_timeout_s
-        )
-        if rc != 0:
-            return None, "sitehub_yaml_missing"
-        data = yaml.safe_load(stdout)
-        if data is None or not isinstance(data, dict):
-            return None, "sitehub_yaml_invalid"
+        name = self.inventory.owns(remote_root) if self.inventory is not None else None
+        if self.inventory is not None and name is not None:
+            text = (await self.inventory.get(name)).sitehub_yaml
+            if text is None:
+                return None, "sitehub_yaml_missing"
+        else:
+            yaml_path = f"{remote_root.rstrip('/')}/sitehub.yaml"
+            rc, text, stderr = await _run_ssh_command(
+                self.settings, f"cat {shlex.quote(yaml_path)}", self.ssh_timeout_s
+            )
+            if rc != 0:
+                return None, "sitehub_yaml_missing"
+        location = f"{ssh_target(self.settings)}:{remote_root.rstrip('/')}/sitehub.yaml"
         try:
-            validated = SitehubYaml.model_validate(data)
+            validated = parse_remote_sitehub_yaml(location, text)
         except Exception:
             return None, "sitehub_yaml_invalid"
+        if validated is None:
+            return None, "sitehub_yaml_invalid"
         return validated.model_dump(mode="python", exclude_none=True), None
 
     def render_nginx_config(
         self, name: str, port: int, mode: str = "proxy", external_port: int | None = None
     ) -> str:
-        if external_port is not None:
-            return (
-                "server {\n"
-                f"  listen {external_port};\n"
-                "  server_name _;\n"
-                f"  root {DEFAULT_NGINX_SITE_ROOT}/{name};\n"
-                "  index index.html index.htm;\n"
-                "  location / {\n"
-                "    try_files $uri $uri/ =404;\n"
-                "  }\n"
-                "}\n"
-            )
-        if mode == "static":
-            return (
-                "server {\n"
-                "  listen 80;\n"
-                f"  server_name {name};\n"
-                f"  root {DEFAULT_NGINX_SITE_ROOT}/{name};\n"
-                "  index index.html;\n"
-                "  location / {\n"
-                "    try_files $uri $uri/ =404;\n"
-                "  }\n"
-                "}\n"
-            )
-        return (
-            "server {\n"
-            "  listen 80;\n"
-            f"  server_name {name};\n"
-            "  location / {\n"
-            f"    proxy_pass http://127.0.0.1:{port};\n"
-            "    proxy_set_header Host $host;\n"
-            "    proxy_set_header X-Real-IP $remote_addr;\n"
-            "    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
-            "  }\n"
-            "}\n"
-        )
+        return _template_engine(self.settings).render(name, port, mode, external_port)
 
     async def push_nginx_config(
         self,
@@ -373,7 +366,7 @@ class SyncEngine:
         dest_dir = self.settings.nginx_conf_dir or DEFAULT_NGINX_CONF_DIR
         dest_path = f"{dest_dir.rstrip('/')}/{name}.conf"
         write_cmd = f"cat > {shlex.quote(tmp_path)}"
-        rc, _, stderr = await self._run_ssh_with_stdin(write_cmd, config_text)
+        rc, _, stderr = await self._run_ssh_with_stdin(write_cmd, mark_generated(name, config_text))
         if rc != 0:
             return NginxUpdateResult(status="error", message=f"tmp_write_failed: {stderr}")
         script_path = f"{remote_root.rstrip('/')}/scripts/nginx-safe-update.sh"
@@ -409,23 +402,7 @@ class SyncEngine:
         await _run_ssh_command(self.settings, base_cmd, self.ssh_timeout_s)
 
     async def _run_ssh_with_stdin(self, command: str, content: str) -> tuple[int, str, str]:
-        target = _ssh_target(self.settings)
-        if not target:
-            return 255, "", "ssh_target_missing"
-        _log_event("SSH", f"command={command}")
-        args = _ssh_base_args(self.settings)
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            target,
-            "bash",
-            "-lc",
-            command,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate(content.encode())
-        return proc.returncode or 0, stdout.decode(), stderr.decode()
+        return await _run_ssh_with_stdin(self.settings, command, content)
 
 
 class NginxEngine:
@@ -434,10 +411,12 @@ class NginxEngine:
         settings: Settings,
         remote_conf_dir: str | None = None,
         ssh_timeout_s: float | None = None,
+        conf_index: ConfIndex | None = None,
     ) -> None:
         self.settings = settings
         self.remote_conf_dir = remote_conf_dir or DEFAULT_NGINX_REMOTE_CONF_DIR
         self.ssh_timeout_s = ssh_timeout_s or settings.ssh_connect_timeout_s
+        self.conf_index = conf_index
 
     def _extract_listen_ports(self, content: str) -> set[int]:
         ports: set[int] = set()
@@ -458,29 +437,32 @@ class NginxEngine:
             return True
         return f"root {DEFAULT_NGINX_SITE_ROOT}/{app_name};" in content
 
-    async def _list_conf_paths(self) -> list[str]:
-        conf_dir = self.settings.nginx_conf_dir or DEFAULT_NGINX_CONF_DIR
-        cmd = f"ls -1 {shlex.quote(conf_dir.rstrip('/'))}/*.conf 2>/dev/null || true"
-        rc, stdout, _ = await _run_ssh_command(self.settings, cmd, self.ssh_timeout_s)
-        if rc != 0 and not stdout.strip():
-            return []
-        return [line.strip() for line in stdout.splitlines() if line.strip()]
-
-    async def _read_conf(self, conf_path: str) -> str | None:
-        cmd = f"cat {shlex.quote(conf_path)}"
-        rc, stdout, _ = await _run_ssh_command(self.settings, cmd, self.ssh_timeout_s)
+    async def read_all_confs(self, conf_dir: str | None = None) -> dict[str, str]:
+        conf_dir = (conf_dir or self.remote_conf_dir).rstrip("/")
+        cmd = (
+            f"for f in {shlex.quote(conf_dir)}/*.conf; do [ -f \"$f\" ] || continue; "
+            f"printf '%s%s\\n' {shlex.quote(CONF_BULK_MARKER)} \"$f\"; cat \"$f\"; echo; done"
+        )
+        rc, stdout, stderr = await _run_ssh_command(self.settings, cmd, self.ssh_timeout_s)
         if rc != 0:
-            return None
-        return stdout
+            raise RuntimeError(f"nginx_conf_read_failed: {stderr.strip() or rc}")
+        confs: dict[str, str] = {}
+        for chunk in stdout.split(CONF_BULK_MARKER)[1:]:
+            conf_path, _, content = chunk.partition("\n")
+            confs[conf_path.strip()] = content[:-1] if content.endswith("\n") else content
+        return confs
+
+    async def conf_snapshot(self, conf_dir: str | None = None) -> dict[str, str]:
+        conf_dir = (conf_dir or self.remote_conf_dir).rstrip("/")
+        if self.conf_index is not None and self.conf_index.ready and self.conf_index.conf_dir == conf_dir:
+            return self.conf_index.confs()
+        return await self.read_all_confs(conf_dir)
 
     async def ensure_external_port_available(self, app_name: str, external_port: int) -> int:
         if not (8400 <= external_port <= 8500):
             raise PortRangeError("external_port_out_of_range: expected 8400-8500")
-        conf_paths = await self._list_conf_paths()
-        for conf_path in conf_paths:
-            content = await self._read_conf(conf_path)
-            if content is None:
-                continue
+        conf_dir = self.settings.nginx_conf_dir or DEFAULT_NGINX_CONF_DIR
+        for conf_path, content in (await self.conf_snapshot(conf_dir)).items():
             ports = self._extract_listen_ports(content)
             if external_port not in ports:
                 continue
@@ -490,66 +472,131 @@ class NginxEngine:
         return external_port
 
     def parse_sitehub_yaml(self, sitehub_path: Path) -> dict[str, Any]:
-        data = yaml.safe_load(sitehub_path.read_text(encoding="utf-8"))
-        if data is None or not isinstance(data, dict):
+        try:
+            validated = load_sitehub_config(sitehub_path)
+        except ValueError as exc:
+            raise ValueError("sitehub_yaml_invalid") from exc
+        if validated is None:
             raise ValueError("sitehub_yaml_invalid")
-        validated = SitehubYaml.model_validate(data)
         return validated.model_dump(mode="python", exclude_none=True)
 
     def render_config(
-        self, name: str, port: int, mode: str = "proxy", external_port: int | None = None
+        self,
+        name: str,
+        port: int,
+        mode: str = "proxy",
+        external_port: int | None = None,
+        performance: PerformanceConfig | None = None,
     ) -> str:
-        if external_port is not None:
-            return (
-                "server {\n"
-                f"  listen {external_port};\n"
-                "  server_name _;\n"
-                f"  root {DEFAULT_NGINX_SITE_ROOT}/{name};\n"
-                "  index index.html index.htm;\n"
-                "  location / {\n"
-                "    try_files $uri $uri/ =404;\n"
-                "  }\n"
-                "}\n"
-            )
-        if mode == "static":
-            return (
-                "server {\n"
-                "  listen 80;\n"
-                f"  server_name {name};\n"
-                f"  root {DEFAULT_NGINX_SITE_ROOT}/{name};\n"
-                "  index index.html;\n"
-                "  location / {\n"
-                "    try_files $uri $uri/ =404;\n"
-                "  }\n"
-                "}\n"
-            )
-        return (
-            "server {\n"
-            "  listen 80;\n"
-            f"  server_name {name};\n"
-            "  location / {\n"
-            f"    proxy_pass http://127.0.0.1:{port};\n"
-            "    proxy_set_header Host $host;\n"
-            "    proxy_set_header X-Real-IP $remote_addr;\n"
-            "    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
-            "  }\n"
-            "}\n"
+        return _template_engine(self.settings).render(
+            name, port, mode, external_port, performance=performance
+        )
+
+    def render_site(
+        self, config: SiteConfig, external_port: int | None = None, base_dir: Path | None = None
+    ) -> str:
+        return _template_engine(self.settings).render_site(
+            config, external_port=external_port, base_dir=base_dir
         )
 
+    def render_all(self, configs: Iterable[SiteConfig]) -> dict[str, str]:
+        return _template_engine(self.settings).render_all(configs)
+
     async def push_config(self, config_text: str, app_name: str) -> None:
         conf_path = f"{self.remote_conf_dir.rstrip('/')}/{app_name}.conf"
         command = f"cat > {shlex.quote(conf_path)}"
-        rc, _, stderr = await self._run_ssh_with_stdin(command, config_text)
+        rc, _, stderr = await self._run_ssh_with_stdin(command, mark_generated(app_name, config_text))
         if rc != 0:
             raise RuntimeError(f"nginx_conf_write_failed: {stderr.strip() or rc}")
 
-    async def reload(self) -> None:
+    async def apply_configs(self, configs: dict[str, str], removals: Iterable[str] = ()) -> None:
+        conf_dir = self.remote_conf_dir.rstrip("/")
+        removals = list(removals)
+        names = sorted(set(configs) | set(removals))
+        if not names:
+            return
+        lines = ["set -e", f"cd {shlex.quote(conf_dir)}", f"stamp=.sitehub-prev-{int(time.time())}"]
+        for name in names:
+            conf = shlex.quote(f"{name}.conf")
+            lines.append(f"if [ -f {conf} ]; then cp -a {conf} {conf}.$stamp; fi")
+        for name, text in sorted(configs.items()):
+            text = mark_generated(name, text)
+            delimiter = "SITEHUB_CONF_EOF"
+            while delimiter in text:
+                delimiter += "_"
+            lines.append(f"cat > {shlex.quote(name + '.conf')} <<'{delimiter}'\n{text.rstrip(chr(10))}\n{delimiter}")
+        for name in removals:
+            lines.append(f"rm -f {shlex.quote(name + '.conf')}")
+        restore = " ".join(
+            f"if [ -f {shlex.quote(name + '.conf')}.$stamp ]; then mv -f {shlex.quote(name + '.conf')}.$stamp "
+            f"{shlex.quote(name + '.conf')}; else rm -f {shlex.quote(name + '.conf')}; fi;"
+            for name in names
+        )
+        lines.append(
+            f"if ! docker exec {NGINX_CONTAINER} nginx -t >&2; then {restore} echo nginx_test_failed >&2; exit 1; fi"
+        )
+        lines.append(f"docker exec {NGINX_CONTAINER} nginx -s reload")
+        lines.append("rm -f ./*.conf.$stamp")
+        async with get_coordinator(self.settings).lock(nginx_lock(self.settings.env_host)):
+            rc, _, stderr = await self._run_ssh_with_stdin("bash -s", "\n".join(lines) + "\n")
+        if rc != 0:
+            raise RuntimeError(f"nginx_apply_failed: {stderr.strip() or rc}")
+        log_event("NGINX", f"action=apply status=success written={len(configs)} removed={len(removals)}")
+
+    def routes_enabled(self, config: SiteConfig) -> bool:
+        if self.settings.nginx_routing not in NGINX_ROUTING_MODES:
+            raise ValueError(f"nginx_routing_invalid: {self.settings.nginx_routing}")
+        return self.settings.nginx_routing == "map" and routable(config)
+
+    async def _current_routes(self, conf_dir: str) -> dict[str, int]:
+        routes_path = f"{conf_dir}/{ROUTES_CONF_NAME}.conf"
+        if self.conf_index is not None and self.conf_index.ready and self.conf_index.conf_dir == conf_dir:
+            return parse_routes(self.conf_index.confs().get(routes_path, ""))
+        command = f"if [ -f {shlex.quote(routes_path)} ]; then cat {shlex.quote(routes_path)}; fi"
+        rc, stdout, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+        if rc != 0:
+            raise RuntimeError(f"nginx_conf_read_failed: {stderr.strip() or rc}")
+        return parse_routes(stdout)
+
+    async def publish_conf(self, config_text: str, app_name: str) -> None:
+        conf_dir = self.remote_conf_dir.rstrip("/")
+        async with get_coordinator(self.settings).lock(routes_lock(self.settings.env_host)):
+            routes = await self._current_routes(conf_dir)
+            configs = {app_name: config_text}
+            if routes.pop(app_name, None) is not None:
+                configs[ROUTES_CONF_NAME] = render_routes(routes)
+            await self.apply_configs(configs)
+        if ROUTES_CONF_NAME in configs:
+            log_event("NGINX", f"action=route status=withdrawn routes={len(routes)}", site=app_name)
+
+    async def publish_route(self, config: SiteConfig) -> bool:
+        conf_dir = self.remote_conf_dir.rstrip("/")
+        async with get_coordinator(self.settings).lock(routes_lock(self.settings.env_host)):
+            confs = await self.conf_snapshot(conf_dir)
+            routes = parse_routes(confs.get(f"{conf_dir}/{ROUTES_CONF_NAME}.conf", ""))
+            superseded = f"{conf_dir}/{config.name}.conf" in confs
+            if routes.get(config.name) == config.port and not superseded:
+                return False
+            routes[config.name] = config.port
+            await self.apply_configs(
+                {ROUTES_CONF_NAME: render_routes(routes)}, [config.name] if superseded else []
+            )
+        log_event(
+            "NGINX", f"action=route status=success port={config.port} routes={len(routes)}", site=config.name
+        )
+        return True
+
+    async def test_config(self) -> None:
         test_cmd = "docker exec sitehub-nginx nginx -t"
         rc, _, stderr = await _run_ssh_command(self.settings, test_cmd, self.ssh_timeout_s)
         if rc != 0:
             raise RuntimeError(f"nginx_test_failed: {stderr.strip() or rc}")
-        command = "docker exec sitehub-nginx nginx -s reload"
-        rc, _, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+
+    async def reload(self) -> None:
+        async with get_coordinator(self.settings).lock(nginx_lock(self.settings.env_host)):
+            await self.test_config()
+            command = "docker exec sitehub-nginx nginx -s reload"
+            rc, _, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
         if rc != 0:
             raise RuntimeError(f"nginx_reload_failed: {stderr.strip() or rc}")
 
@@ -572,28 +619,57 @@ class NginxEngine:
             assigned_port = await self.ensure_external_port_available(name, ext_value)
         elif isinstance(ext_value, str):
             assigned_port = await self.ensure_external_port_available(name, int(ext_value))
-        conf_text = self.render_config(name, port, mode, assigned_port)
-        await self.push_config(conf_text, name)
-        await self.reload()
+        performance_value = config.get("performance")
+        performance = PerformanceConfig.model_validate(performance_value) if performance_value else None
+        conf_text = self.render_config(name, port, mode, assigned_port, performance)
+        await self.publish_conf(conf_text, name)
 
     async def _run_ssh_with_stdin(self, command: str, content: str) -> tuple[int, str, str]:
-        target = _ssh_target(self.settings)
-        if not target:
-            return 255, "", "ssh_target_missing"
-        _log_event("SSH", f"command={command}")
-        args = _ssh_base_args(self.settings)
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            target,
-            "bash",
-            "-lc",
-            command,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        return await _run_ssh_with_stdin(self.settings, command, content)
+
+
+class ConfIndex:
+    def __init__(self, settings: Settings, conf_dir: str | None = None) -> None:
+        self.settings = settings
+        self.conf_dir = (conf_dir or DEFAULT_NGINX_REMOTE_CONF_DIR).rstrip("/")
+        self.ready = False
+        self._confs: dict[str, str] = {}
+        self._ports: dict[str, set[int]] = {}
+        self._engine = NginxEngine(settings, self.conf_dir)
+
+    def _set(self, conf_path: str, content: str) -> None:
+        self._confs[conf_path] = content
+        self._ports[conf_path] = self._engine._extract_listen_ports(content)
+
+    async def load(self) -> None:
+        confs = await self._engine.read_all_confs(self.conf_dir)
+        self._confs.clear()
+        self._ports.clear()
+        for conf_path, content in confs.items():
+            self._set(conf_path, content)
+        self.ready = True
+
+    def confs(self) -> dict[str, str]:
+        return dict(self._confs)
+
+    def owners(self, port: int) -> list[str]:
+        return sorted(conf_path for conf_path, ports in self._ports.items() if port in ports)
+
+    async def handle_event(self, event: ChangeEvent) -> None:
+        if event.kind != "conf" or not self.ready:
+            return
+        if event.action == "deleted":
+            self._confs.pop(event.path, None)
+            self._ports.pop(event.path, None)
+            return
+        rc, stdout, _ = await _run_ssh_command(
+            self.settings, f"cat {shlex.quote(event.path)}", self._engine.ssh_timeout_s
         )
-        stdout, stderr = await proc.communicate(content.encode())
-        return proc.returncode or 0, stdout.decode(), stderr.decode()
+        if rc == 0:
+            self._set(event.path, stdout)
+        else:
+            self._confs.pop(event.path, None)
+            self._ports.pop(event.path, None)
 
 
 def build_nginx_preview(name: str, port: int, external_port: int | None = None) -> str:
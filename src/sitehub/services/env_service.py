@@ -1,16 +1,15 @@
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import json
 import os
 import shutil
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from sitehub.config import Settings
+from sitehub.ssh import circuit_breaker, run_ssh
 
 
 DEFAULT_PROBE_PATHS = (
@@ -20,96 +19,13 @@ DEFAULT_PROBE_PATHS = (
 DEFAULT_NGINX_CONF = "/etc/nginx/nginx.conf"
 DEFAULT_NGINX_CONF_DIR = "/etc/nginx/conf.d"
 SSH_WARNING_THRESHOLD_MS = 2000
-SSH_CONTROL_PERSIST_S = 60
-SSH_MAX_ATTEMPTS = 2
-SSH_RETRY_BACKOFF_S = 0.2
-
-
-def _ssh_target(settings: Settings) -> str | None:
-    host = settings.env_host
-    if not host:
-        return None
-    user = settings.ssh_user
-    if user:
-        return f"{user}@{host}"
-    return host
-
-
-def _ssh_base_args(settings: Settings) -> list[str]:
-    args = [
-        "ssh",
-        "-o",
-        "BatchMode=yes",
-        "-o",
-        f"ConnectTimeout={int(settings.ssh_connect_timeout_s)}",
-        "-o",
-        "ConnectionAttempts=1",
-        "-o",
-        "PasswordAuthentication=no",
-        "-o",
-        "IdentitiesOnly=yes",
-        "-o",
-        "StrictHostKeyChecking=no",
-        "-o",
-        "UserKnownHostsFile=/dev/null",
-        "-o",
-        "LogLevel=DEBUG3",
-        "-o",
-        "ControlMaster=auto",
-        "-o",
-        f"ControlPersist={SSH_CONTROL_PERSIST_S}s",
-        "-o",
-        f"ControlPath={_ssh_control_path(settings)}",
-    ]
-    if settings.ssh_private_key_path:
-        args.extend(["-i", settings.ssh_private_key_path])
-    if settings.ssh_port:
-        args.extend(["-p", str(settings.ssh_port)])
-    return args
-
-
-def _ssh_control_path(settings: Settings) -> str:
-    target = _ssh_target(settings) or "unknown"
-    port = settings.ssh_port or 22
-    digest = hashlib.sha1(f"{target}:{port}".encode("utf-8")).hexdigest()[:12]
-    return f"/tmp/sitehub-ssh-{digest}"
 
 
 async def _run_ssh_command(
     settings: Settings, command: str, timeout_s: float
 ) -> tuple[int, str, str, float]:
-    target = _ssh_target(settings)
-    if not target:
-        return 255, "", "ssh_target_missing", 0.0
-    args = _ssh_base_args(settings)
-    for attempt in range(SSH_MAX_ATTEMPTS):
-        start = time.monotonic()
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            target,
-            "bash",
-            "-lc",
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        try:
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
-            rc = proc.returncode or 0
-            elapsed = time.monotonic() - start
-        except asyncio.TimeoutError:
-            proc.kill()
-            rc = 124
-            stdout = b""
-            stderr = b"ssh_timeout"
-            elapsed = time.monotonic() - start
-        if rc == 0:
-            return rc, stdout.decode(), stderr.decode(), elapsed
-        if attempt < SSH_MAX_ATTEMPTS - 1:
-            await asyncio.sleep(SSH_RETRY_BACKOFF_S * (attempt + 1))
-            continue
-        return rc, stdout.decode(), stderr.decode(), elapsed
-    return 255, "", "ssh_failed", 0.0
+    result = await run_ssh(settings, command, timeout_s)
+    return result.returncode, result.stdout, result.stderr, result.elapsed_s
 
 
 async def measure_ssh_latency(settings: Settings) -> tuple[int | None, str | None]:
@@ -332,6 +248,7 @@ async def build_env_report(settings: Settings) -> dict[str, Any]:
     elif ssh_latency_ms is not None and ssh_latency_ms > SSH_WARNING_THRESHOLD_MS:
         warnings.append("ssh_latency_high")
     report["ssh_latency_ms"] = ssh_latency_ms
+    report["ssh_breaker"] = circuit_breaker(settings).snapshot()
     report["warnings"] = warnings
 
     probe_tasks = [probe_path(settings, path) for path in DEFAULT_PROBE_PATHS]
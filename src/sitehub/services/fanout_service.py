@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import shlex
+import time
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.services.deploy_service import SyncEngine, SyncResult, _run_ssh_command
+from sitehub.services.inventory_service import get_inventory
+from sitehub.services.pipeline import DeployPipeline, PipelineError
+from sitehub.ssh import ssh_target
+
+RELAY_TIMEOUT_S = 600.0
+RELAY_SSH_OPTIONS = ("-o BatchMode=yes", "-o StrictHostKeyChecking=no", "-o UserKnownHostsFile=/dev/null")
+
+
+def settings_for_host(settings: Settings, host_spec: str) -> Settings:
+    user = settings.ssh_user
+    port = settings.ssh_port
+    host = host_spec
+    if "@" in host:
+        user, host = host.split("@", 1)
+    if host.count(":") == 1:
+        host, port_text = host.split(":", 1)
+        port = int(port_text)
+    return dataclasses.replace(settings, env_host=host, ssh_user=user, ssh_port=port)
+
+
+def required_successes(policy: str, total: int) -> int:
+    if policy == "all":
+        return total
+    if policy == "quorum":
+        return total // 2 + 1
+    if policy.isdigit():
+        return min(max(int(policy), 1), total)
+    raise ValueError(f"deploy_quorum_invalid: {policy}")
+
+
+@dataclass(frozen=True)
+class HostResult:
+    host: str
+    status: str
+    duration_ms: int
+    error: str | None = None
+    failed_step: str | None = None
+    timings_ms: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class FanoutResult:
+    policy: str
+    required: int
+    hosts: list[HostResult]
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for item in self.hosts if item.status == "ok")
+
+    @property
+    def ok(self) -> bool:
+        return self.succeeded >= self.required
+
+    @property
+    def status(self) -> str:
+        if self.ok:
+            return "ok"
+        return "partial" if self.succeeded else "failed"
+
+
+class _SourceSync:
+    def __init__(self, engine: SyncEngine) -> None:
+        self.engine = engine
+        self.task: asyncio.Task[SyncResult] | None = None
+
+    async def sync(
+        self, local_path: Path, remote_path: str, timeout_s: float, allow_existing: bool = False
+    ) -> SyncResult:
+        if self.task is None:
+            self.task = asyncio.create_task(self.engine.sync(local_path, remote_path, timeout_s, allow_existing))
+        return await asyncio.shield(self.task)
+
+    async def close(self, cancel: bool) -> None:
+        if self.task is None:
+            return
+        if cancel:
+            self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+class RelaySyncEngine(SyncEngine):
+    def __init__(self, settings: Settings, source: _SourceSync) -> None:
+        super().__init__(settings, inventory=get_inventory(settings))
+        self.source = source
+        self.source_settings = source.engine.settings
+
+    def build_relay_command(self, remote_path: str) -> str:
+        target = ssh_target(self.settings)
+        if not target:
+            raise ValueError("ssh_target_missing")
+        ssh_options = list(RELAY_SSH_OPTIONS)
+        if self.settings.ssh_port:
+            ssh_options.append(f"-p {self.settings.ssh_port}")
+        ssh_command = "ssh " + " ".join(ssh_options)
+        return (
+            f"rsync -az --delete-delay --chmod=D755,F644 -e {shlex.quote(ssh_command)} "
+            f"{shlex.quote(remote_path.rstrip('/') + '/')} {shlex.quote(f'{target}:{remote_path}')}"
+        )
+
+    async def sync(
+        self, local_path: Path, remote_path: str, timeout_s: float = RELAY_TIMEOUT_S, allow_existing: bool = False
+    ) -> SyncResult:
+        if allow_existing:
+            await self.ensure_remote_updatable(remote_path)
+        else:
+            await self.ensure_remote_absent(remote_path)
+        try:
+            await self.source.sync(local_path, remote_path, timeout_s, allow_existing)
+        except Exception as exc:
+            raise RuntimeError(f"relay_source_failed: {self.source_settings.env_host}") from exc
+        rc, stdout, stderr = await _run_ssh_command(
+            self.source_settings, self.build_relay_command(remote_path), timeout_s
+        )
+        if self.inventory is not None:
+            self.inventory.invalidate(PurePosixPath(remote_path).name)
+        if rc != 0:
+            raise RuntimeError(f"relay_rsync_failed: {stderr.strip() or rc}")
+        return SyncResult(method=f"relay:{self.source_settings.env_host}", stdout=stdout, stderr=stderr)
+
+
+class _SourceSyncEngine(SyncEngine):
+    def __init__(self, source: _SourceSync) -> None:
+        super().__init__(source.engine.settings, inventory=source.engine.inventory)
+        self.source = source
+
+    async def sync(
+        self, local_path: Path, remote_path: str, timeout_s: float = 300.0, allow_existing: bool = False
+    ) -> SyncResult:
+        return await self.source.sync(local_path, remote_path, timeout_s, allow_existing)
+
+
+class FanoutDeployer:
+    def __init__(
+        self,
+        settings: Settings,
+        hosts: list[str] | None = None,
+        policy: str | None = None,
+        relay: bool = False,
+    ) -> None:
+        self.settings = settings
+        self.hosts = list(hosts or settings.env_hosts or (settings.env_host,))
+        self.policy = policy or settings.deploy_quorum
+        self.required = required_successes(self.policy, len(self.hosts))
+        self.relay = relay and len(self.hosts) > 1
+
+    def _pipelines(self, source: _SourceSync | None) -> list[tuple[str, DeployPipeline]]:
+        host_settings = [settings_for_host(self.settings, host) for host in self.hosts]
+        if source is None:
+            return [(host, DeployPipeline(settings)) for host, settings in zip(self.hosts, host_settings)]
+        pipelines = [(self.hosts[0], DeployPipeline(host_settings[0], sync_engine=_SourceSyncEngine(source)))]
+        for host, settings in zip(self.hosts[1:], host_settings[1:]):
+            pipelines.append((host, DeployPipeline(settings, sync_engine=RelaySyncEngine(settings, source))))
+        return pipelines
+
+    async def _run_host(self, host: str, pipeline: DeployPipeline, local_path: Path, remote_path: str) -> HostResult:
+        start = time.monotonic()
+        try:
+            result = await pipeline.run(local_path, remote_path)
+        except PipelineError as exc:
+            return HostResult(
+                host=host,
+                status="error",
+                duration_ms=int((time.monotonic() - start) * 1000),
+                error=str(exc.error),
+                failed_step=exc.step,
+            )
+        return HostResult(host=host, status="ok", duration_ms=result.duration_ms, timings_ms=result.timings_ms)
+
+    async def deploy(self, local_path: Path, remote_path: str) -> FanoutResult:
+        start = time.monotonic()
+        source = None
+        if self.relay:
+            source_settings = settings_for_host(self.settings, self.hosts[0])
+            source = _SourceSync(SyncEngine(source_settings, inventory=get_inventory(source_settings)))
+        completed = False
+        try:
+            results = await asyncio.gather(
+                *(self._run_host(host, pipeline, local_path, remote_path) for host, pipeline in self._pipelines(source))
+            )
+            completed = True
+        finally:
+            if source is not None:
+                await source.close(cancel=not completed)
+        fanout = FanoutResult(policy=self.policy, required=self.required, hosts=list(results))
+        summary: dict[str, Any] = {item.host: item.status for item in results}
+        status = {"ok": "success", "partial": "partial", "failed": "failed"}[fanout.status]
+        log_event(
+            "DEPLOY",
+            f"action=fanout status={status} policy={self.policy} "
+            f"succeeded={fanout.succeeded}/{len(results)} required={self.required} relay={str(self.relay).lower()} "
+            f"duration_ms={int((time.monotonic() - start) * 1000)} "
+            + " ".join(f"{host}={status}" for host, status in summary.items()),
+            site=Path(remote_path).name,
+        )
+        return fanout
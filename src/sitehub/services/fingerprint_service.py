@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from sitehub.event_log import log_event
+from sitehub.services.precompress_service import MANIFEST_NAME as PRECOMPRESS_MANIFEST_NAME
+from sitehub.services.precompress_service import SKIP_DIRS
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+FINGERPRINT_SUFFIXES = frozenset(
+    {".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".woff", ".woff2", ".ttf"}
+)
+REWRITE_SUFFIXES = frozenset({".html", ".htm", ".css"})
+HASH_LENGTH = 10
+FINGERPRINTED_RE = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % HASH_LENGTH)
+HTML_REF_RE = re.compile(
+    r"""(?P<prefix>\b(?:src|href)\s*=\s*)(?P<quote>["'])(?P<ref>[^"']+)(?P=quote)""", re.IGNORECASE
+)
+CSS_REF_RE = re.compile(
+    r"""(?P<prefix>url\(\s*|@import\s+)(?P<quote>["']?)(?P<ref>[^"')\s]+)(?P=quote)""", re.IGNORECASE
+)
+REF_SUFFIX_RE = re.compile(r"([^?#]*)(.*)", re.DOTALL)
+URL_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+GENERATED_SUFFIXES = (".gz", ".br")
+
+
+@dataclass(frozen=True)
+class FingerprintResult:
+    root: Path
+    manifest: dict[str, str]
+    rewritten: int
+    duration_ms: int
+
+
+def fingerprint_name(relpath: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    base, ext = posixpath.splitext(relpath)
+    return f"{base}.{digest}{ext}"
+
+
+def _walk(root: Path) -> dict[str, Path]:
+    files: dict[str, Path] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if not path.is_symlink():
+                files[path.relative_to(root).as_posix()] = path
+    return files
+
+
+def _resolve_ref(ref: str, owner: str) -> tuple[str, str] | None:
+    if not ref or ref.startswith(("#", "//")) or URL_SCHEME_RE.match(ref):
+        return None
+    split = REF_SUFFIX_RE.match(ref)
+    path, tail = (split.group(1), split.group(2)) if split else (ref, "")
+    if path.startswith("/"):
+        target = posixpath.normpath(path.lstrip("/"))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(owner), path))
+    return target, tail
+
+
+def rewrite_references(text: str, owner: str, manifest: dict[str, str], css: bool) -> str:
+    pattern = CSS_REF_RE if css else HTML_REF_RE
+
+    def _replace(match: re.Match[str]) -> str:
+        ref = match.group("ref")
+        resolved = _resolve_ref(ref, owner)
+        if resolved is None or resolved[0] not in manifest:
+            return match.group(0)
+        target, suffix = resolved
+        hashed = manifest[target]
+        if ref.startswith("/"):
+            new_ref = "/" + hashed
+        else:
+            new_ref = posixpath.relpath(hashed, posixpath.dirname(owner) or ".")
+        return f"{match.group('prefix')}{match.group('quote')}{new_ref}{suffix}{match.group('quote')}"
+
+    text = pattern.sub(_replace, text)
+    if not css:
+        text = re.sub(
+            r"(<style\b[^>]*>)(.*?)(</style>)",
+            lambda m: m.group(1) + rewrite_references(m.group(2), owner, manifest, True) + m.group(3),
+            text,
+            flags=re.IGNORECASE | re.DOTALL,
+        )
+    return text
+
+
+def _write_if_changed(path: Path, content: bytes, mtime_ns: int | None = None) -> bool:
+    try:
+        if path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    if mtime_ns is not None:
+        os.utime(tmp, ns=(mtime_ns, mtime_ns))
+    os.replace(tmp, path)
+    return True
+
+
+def _copy_if_changed(path: Path, target: Path) -> None:
+    stat = path.stat()
+    try:
+        current = target.stat()
+        if (current.st_size, current.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return
+    except FileNotFoundError:
+        target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(path, target)
+
+
+def _prune_staging(staging: Path, keep: set[str]) -> None:
+    for relpath, path in _walk(staging).items():
+        if relpath in keep:
+            continue
+        if relpath.endswith(GENERATED_SUFFIXES) and relpath[:-3] in keep:
+            continue
+        path.unlink()
+
+
+def stage_tree(source: Path, staging: Path) -> Path:
+    staging.mkdir(parents=True, exist_ok=True)
+    files = _walk(source)
+    for relpath, path in files.items():
+        _copy_if_changed(path, staging / relpath)
+    _prune_staging(staging, set(files) | {PRECOMPRESS_MANIFEST_NAME})
+    return staging
+
+
+def build_fingerprinted(source: Path, staging: Path) -> FingerprintResult:
+    start = time.monotonic()
+    staging.mkdir(parents=True, exist_ok=True)
+    files = _walk(source)
+    for relpath, path in files.items():
+        if Path(relpath).suffix.lower() not in REWRITE_SUFFIXES:
+            _copy_if_changed(path, staging / relpath)
+
+    manifest: dict[str, str] = {}
+    rewritten = 0
+    css_files = sorted(name for name in files if Path(name).suffix.lower() == ".css")
+    for relpath, path in sorted(files.items()):
+        suffix = Path(relpath).suffix.lower()
+        if suffix in FINGERPRINT_SUFFIXES and suffix != ".css" and not FINGERPRINTED_RE.search(relpath):
+            content = path.read_bytes()
+            manifest[relpath] = fingerprint_name(relpath, content)
+            _write_if_changed(staging / manifest[relpath], content, path.stat().st_mtime_ns)
+    for relpath in css_files:
+        text = rewrite_references(files[relpath].read_text(encoding="utf-8", errors="replace"), relpath, manifest, True)
+        content = text.encode("utf-8")
+        rewritten += _write_if_changed(staging / relpath, content)
+        if not FINGERPRINTED_RE.search(relpath):
+            manifest[relpath] = fingerprint_name(relpath, content)
+            _write_if_changed(staging / manifest[relpath], content)
+    for relpath, path in files.items():
+        if Path(relpath).suffix.lower() in {".html", ".htm"}:
+            text = rewrite_references(path.read_text(encoding="utf-8", errors="replace"), relpath, manifest, False)
+            rewritten += _write_if_changed(staging / relpath, text.encode("utf-8"))
+    _write_if_changed(
+        staging / ASSET_MANIFEST_NAME, json.dumps(manifest, sort_keys=True, indent=2).encode("utf-8") + b"\n"
+    )
+
+    _prune_staging(staging, set(files) | set(manifest.values()) | {ASSET_MANIFEST_NAME, PRECOMPRESS_MANIFEST_NAME})
+    result = FingerprintResult(
+        root=staging,
+        manifest=manifest,
+        rewritten=rewritten,
+        duration_ms=int((time.monotonic() - start) * 1000),
+    )
+    log_event(
+        "DEPLOY",
+        f"action=fingerprint status=success root={source} staging={staging} assets={len(manifest)} "
+        f"rewritten={rewritten} duration_ms={result.duration_ms}",
+        site=source.name,
+    )
+    return result
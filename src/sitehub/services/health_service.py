@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.lazy import lazy_import
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.pocketbase import PocketBaseClient, PocketBaseError
+
+if TYPE_CHECKING:
+    import httpx
+
+    from sitehub.status_journal import StatusJournal
+else:
+    httpx = lazy_import("httpx")
+
+POLL_JITTER = 0.1
+SKIPPED_STATUSES = (AppStatus.deploying,)
+
+logger = logging.getLogger("sitehub.health")
+
+
+def _probe_targets(record: AppRecord) -> tuple[tuple[int, ...], str | None]:
+    config: dict[str, Any] = record.sitehub_config or {}
+    supervisor = config.get("supervisor")
+    health_path = config.get("health_path")
+    ports: tuple[int, ...] = (record.port,)
+    if isinstance(supervisor, dict):
+        pair = supervisor.get("ports")
+        if isinstance(pair, (list, tuple)) and all(isinstance(port, int) for port in pair):
+            ports = tuple(pair)
+        health_path = supervisor.get("health_path") or health_path
+    if isinstance(health_path, str) and health_path and not health_path.startswith("/"):
+        health_path = f"/{health_path}"
+    return ports, health_path if isinstance(health_path, str) and health_path else None
+
+
+class HealthPoller:
+    def __init__(
+        self,
+        settings: Settings,
+        pocketbase: PocketBaseClient | None = None,
+        client: httpx.AsyncClient | None = None,
+        journal: StatusJournal | None = None,
+    ) -> None:
+        self.settings = settings
+        self.interval_s = settings.health_poll_interval_s
+        self.timeout_s = settings.health_poll_timeout_s
+        self._client = client or httpx.AsyncClient(
+            timeout=self.timeout_s,
+            limits=httpx.Limits(max_connections=settings.health_poll_concurrency),
+        )
+        self._owns_client = client is None
+        self.pocketbase = pocketbase or PocketBaseClient.from_settings(
+            settings, client=self._client, journal=journal
+        )
+        self._semaphore = asyncio.Semaphore(max(settings.health_poll_concurrency, 1))
+        self._task: asyncio.Task[None] | None = None
+
+    async def _port_open(self, port: int) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.settings.env_host, port), timeout=self.timeout_s
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def _http_status(self, port: int, health_path: str) -> AppStatus:
+        try:
+            resp = await self._client.get(
+                f"http://{self.settings.env_host}:{port}{health_path}", timeout=self.timeout_s
+            )
+        except httpx.HTTPError:
+            return AppStatus.stopped
+        return AppStatus.running if resp.status_code < 500 else AppStatus.error
+
+    async def check(self, record: AppRecord) -> AppStatus:
+        ports, health_path = _probe_targets(record)
+        async with self._semaphore:
+            statuses = []
+            for port in ports:
+                if health_path is None:
+                    status = AppStatus.running if await self._port_open(port) else AppStatus.stopped
+                else:
+                    status = await self._http_status(port, health_path)
+                if status == AppStatus.running:
+                    return status
+                statuses.append(status)
+        return AppStatus.error if AppStatus.error in statuses else AppStatus.stopped
+
+    async def poll_once(self) -> dict[str, AppStatus]:
+        start = time.monotonic()
+        records = [record for record in await self.pocketbase.list_apps() if record.status not in SKIPPED_STATUSES]
+        observed = await asyncio.gather(*(self.check(record) for record in records))
+        changes = {
+            record.id: status for record, status in zip(records, observed) if status != record.status
+        }
+        failed = await self.pocketbase.update_app_statuses(changes, self.settings.health_poll_concurrency)
+        for record_id in failed:
+            changes.pop(record_id, None)
+        if changes or failed:
+            names = {record.id: record.name for record in records}
+            log_event(
+                "HEALTH",
+                f"action=poll apps={len(records)} changed={len(changes)} failed={len(failed)} "
+                f"duration_ms={int((time.monotonic() - start) * 1000)} "
+                + " ".join(f"{names[record_id]}={status.value}" for record_id, status in changes.items()),
+            )
+        return changes
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except (PocketBaseError, httpx.HTTPError) as exc:
+                logger.warning("health_poll_failed error=%s", exc)
+            except Exception:
+                logger.exception("health_poll_failed")
+            await asyncio.sleep(self.interval_s * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="sitehub-health-poller")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_client:
+            await self._client.aclose()
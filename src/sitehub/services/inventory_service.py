@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import shlex
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.events import ChangeEvent
+from sitehub.services.deploy_service import _run_local_command, _run_ssh_command
+from sitehub.services.provision_service import DEFAULT_SITES_BASE
+
+INVENTORY_DB_NAME = "inventory.sqlite"
+STAT_MARKER = "--- sitehub-stat"
+DU_MARKER = "--- sitehub-du"
+YAML_MARKER = "--- sitehub-yaml "
+SWEEP_TIMEOUT_S = 60.0
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sweeps (host TEXT NOT NULL, root TEXT NOT NULL, swept_at REAL NOT NULL, "
+    "PRIMARY KEY (host, root))",
+    "CREATE TABLE IF NOT EXISTS sites ("
+    "host TEXT NOT NULL, root TEXT NOT NULL, name TEXT NOT NULL, present INTEGER NOT NULL, "
+    "size_bytes INTEGER NOT NULL, mtime REAL NOT NULL, owner TEXT NOT NULL, mode TEXT NOT NULL, "
+    "sitehub_yaml TEXT, refreshed_at REAL NOT NULL, PRIMARY KEY (host, root, name))",
+)
+
+
+@dataclass(frozen=True)
+class SiteEntry:
+    name: str
+    path: str
+    present: bool
+    size_bytes: int
+    mtime: float
+    owner: str
+    mode: str
+    sitehub_yaml: str | None
+    refreshed_at: float
+
+
+def build_sweep_command(root: str, name: str | None = None) -> str:
+    root = root.rstrip("/")
+    if name is None:
+        find = f"find {shlex.quote(root)} -mindepth 1 -maxdepth 1 -type d"
+        pattern = f"{shlex.quote(root)}/*"
+    else:
+        pattern = shlex.quote(f"{root}/{name}")
+        find = f"find {pattern} -maxdepth 0 -type d"
+    return (
+        f"echo {shlex.quote(STAT_MARKER)}; {find} -printf '%f\\t%T@\\t%u\\t%m\\n' 2>/dev/null; "
+        f"echo {shlex.quote(DU_MARKER)}; du -sk {pattern}/ 2>/dev/null; "
+        f"for f in {pattern}/sitehub.yaml; do [ -f \"$f\" ] || continue; "
+        f"printf '%s%s\\n' {shlex.quote(YAML_MARKER)} \"$f\"; cat \"$f\"; echo; done; true"
+    )
+
+
+def parse_sweep_output(root: str, output: str, refreshed_at: float) -> list[SiteEntry]:
+    stat_text, _, rest = output.partition(DU_MARKER)
+    stat_text = stat_text.partition(STAT_MARKER)[2]
+    du_text, *yaml_chunks = rest.split(YAML_MARKER)
+    sizes: dict[str, int] = {}
+    for line in du_text.splitlines():
+        kb, _, path = line.partition("\t")
+        if kb.strip().isdigit() and path:
+            sizes[PurePosixPath(path.rstrip("/")).name] = int(kb) * 1024
+    yamls: dict[str, str] = {}
+    for chunk in yaml_chunks:
+        path, _, content = chunk.partition("\n")
+        yamls[PurePosixPath(path.strip()).parent.name] = content[:-1] if content.endswith("\n") else content
+    entries: list[SiteEntry] = []
+    for line in stat_text.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 4:
+            continue
+        name, mtime, owner, mode = parts
+        entries.append(
+            SiteEntry(
+                name=name,
+                path=f"{root.rstrip('/')}/{name}",
+                present=True,
+                size_bytes=sizes.get(name, 0),
+                mtime=float(mtime),
+                owner=owner,
+                mode=mode,
+                sitehub_yaml=yamls.get(name),
+                refreshed_at=refreshed_at,
+            )
+        )
+    return entries
+
+
+class InventoryService:
+    def __init__(self, settings: Settings, root: str | None = None, db_path: Path | None = None) -> None:
+        self.settings = settings
+        self.root = (root or settings.app_root_dir or DEFAULT_SITES_BASE).rstrip("/")
+        self.host = "local" if Path(self.root).is_dir() else settings.env_host
+        self.max_age_s = settings.inventory_max_age_s
+        self.db_path = db_path or Path(settings.cache_dir or ".sitehub-cache") / INVENTORY_DB_NAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sweep_lock = asyncio.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self, command: str) -> str:
+        if self.host == "local":
+            rc, stdout, stderr = await _run_local_command(["bash", "-c", command], SWEEP_TIMEOUT_S)
+        else:
+            rc, stdout, stderr = await _run_ssh_command(self.settings, command, SWEEP_TIMEOUT_S)
+        if rc != 0:
+            raise RuntimeError(f"inventory_sweep_failed: {stderr.strip() or rc}")
+        return stdout
+
+    def _store(self, entries: list[SiteEntry], names: list[str] | None, swept_at: float | None) -> None:
+        with self._lock:
+            if names is None:
+                self._conn.execute("DELETE FROM sites WHERE host = ? AND root = ?", (self.host, self.root))
+            else:
+                self._conn.executemany(
+                    "DELETE FROM sites WHERE host = ? AND root = ? AND name = ?",
+                    [(self.host, self.root, name) for name in names],
+                )
+            self._conn.executemany(
+                "INSERT INTO sites (host, root, name, present, size_bytes, mtime, owner, mode, sitehub_yaml, "
+                "refreshed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (self.host, self.root, entry.name, int(entry.present), entry.size_bytes, entry.mtime,
+                     entry.owner, entry.mode, entry.sitehub_yaml, entry.refreshed_at)
+                    for entry in entries
+                ],
+            )
+            if swept_at is not None:
+                self._conn.execute(
+                    "INSERT INTO sweeps (host, root, swept_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(host, root) DO UPDATE SET swept_at = excluded.swept_at",
+                    (self.host, self.root, swept_at),
+                )
+            self._conn.commit()
+
+    def _row_to_entry(self, row: tuple[object, ...]) -> SiteEntry:
+        name, present, size_bytes, mtime, owner, mode, sitehub_yaml, refreshed_at = row
+        return SiteEntry(
+            name=str(name),
+            path=f"{self.root}/{name}",
+            present=bool(present),
+            size_bytes=int(str(size_bytes)),
+            mtime=float(str(mtime)),
+            owner=str(owner),
+            mode=str(mode),
+            sitehub_yaml=None if sitehub_yaml is None else str(sitehub_yaml),
+            refreshed_at=float(str(refreshed_at)),
+        )
+
+    def _swept_at(self) -> float | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT swept_at FROM sweeps WHERE host = ? AND root = ?", (self.host, self.root)
+            ).fetchone()
+        return float(row[0]) if row else None
+
+    def _cached(self, name: str) -> SiteEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, present, size_bytes, mtime, owner, mode, sitehub_yaml, refreshed_at FROM sites "
+                "WHERE host = ? AND root = ? AND name = ?",
+                (self.host, self.root, name),
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    async def sweep(self) -> list[SiteEntry]:
+        async with self._sweep_lock:
+            start = time.monotonic()
+            now = time.time()
+            entries = parse_sweep_output(self.root, await self._run(build_sweep_command(self.root)), now)
+            self._store(entries, None, now)
+        log_event(
+            "SSH",
+            f"action=inventory_sweep status=success host={self.host} root={self.root} sites={len(entries)} "
+            f"duration_ms={int((time.monotonic() - start) * 1000)}",
+        )
+        return entries
+
+    async def refresh(self, name: str) -> SiteEntry:
+        now = time.time()
+        entries = parse_sweep_output(self.root, await self._run(build_sweep_command(self.root, name)), now)
+        entry = entries[0] if entries else SiteEntry(
+            name=name, path=f"{self.root}/{name}", present=False, size_bytes=0, mtime=0.0, owner="", mode="",
+            sitehub_yaml=None, refreshed_at=now,
+        )
+        self._store([entry], [name], None)
+        return entry
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sites (host, root, name, present, size_bytes, mtime, owner, mode, sitehub_yaml, "
+                "refreshed_at) VALUES (?, ?, ?, 0, 0, 0, '', '', NULL, 0) "
+                "ON CONFLICT(host, root, name) DO UPDATE SET refreshed_at = 0",
+                (self.host, self.root, name),
+            )
+            self._conn.commit()
+
+    async def sites(self, max_age_s: float | None = None) -> list[SiteEntry]:
+        max_age_s = self.max_age_s if max_age_s is None else max_age_s
+        swept_at = self._swept_at()
+        if swept_at is None or time.time() - swept_at > max_age_s:
+            await self.sweep()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, present, size_bytes, mtime, owner, mode, sitehub_yaml, refreshed_at FROM sites "
+                "WHERE host = ? AND root = ? AND present = 1 ORDER BY name",
+                (self.host, self.root),
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    async def get(self, name: str, max_age_s: float | None = None) -> SiteEntry:
+        max_age_s = self.max_age_s if max_age_s is None else max_age_s
+        entry = self._cached(name)
+        if entry is not None and time.time() - entry.refreshed_at <= max_age_s:
+            return entry
+        swept_at = self._swept_at()
+        if entry is None and swept_at is not None and time.time() - swept_at <= max_age_s:
+            return SiteEntry(
+                name=name, path=f"{self.root}/{name}", present=False, size_bytes=0, mtime=0.0, owner="", mode="",
+                sitehub_yaml=None, refreshed_at=swept_at,
+            )
+        return await self.refresh(name)
+
+    async def handle_event(self, event: ChangeEvent) -> None:
+        if event.kind == "site" and self.owns(event.path) is not None:
+            await self.refresh(event.name)
+
+    def owns(self, path: str) -> str | None:
+        candidate = PurePosixPath(path.rstrip("/"))
+        return candidate.name if str(candidate.parent) == self.root else None
+
+
+_inventories: dict[tuple[str, str, str], InventoryService] = {}
+_inventories_lock = threading.Lock()
+
+
+def get_inventory(settings: Settings, root: str | None = None) -> InventoryService:
+    resolved_root = (root or settings.app_root_dir or DEFAULT_SITES_BASE).rstrip("/")
+    key = (settings.cache_dir or "", settings.env_host, resolved_root)
+    with _inventories_lock:
+        inventory = _inventories.get(key)
+        if inventory is None:
+            inventory = InventoryService(settings, resolved_root)
+            _inventories[key] = inventory
+        return inventory
+
+
+def reset_inventories() -> None:
+    with _inventories_lock:
+        _inventories.clear()
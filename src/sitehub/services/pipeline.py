@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from sitehub.config import Settings
+from sitehub.coordination import deploy_lock, get_coordinator
+from sitehub.event_log import log_event
+from sitehub.services.deploy_service import NginxEngine, SyncEngine, SyncResult
+from sitehub.services.fingerprint_service import FingerprintResult, build_fingerprinted, stage_tree
+from sitehub.services.inventory_service import get_inventory
+from sitehub.services.precompress_service import PrecompressResult, precompress_tree
+from sitehub.services.supervisor_service import AppSupervisor
+from sitehub.sitehub_yaml import SitehubYaml, load_sitehub_config
+
+StepFunc = Callable[[dict[str, Any]], Awaitable[Any]]
+BUILD_DIR_NAME = "builds"
+
+
+class PipelineError(RuntimeError):
+    def __init__(self, step: str, error: BaseException) -> None:
+        super().__init__(f"step_failed: {step}: {error}")
+        self.step = step
+        self.error = error
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    func: StepFunc
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineResult:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings_ms: dict[str, tuple[int, int]] = field(default_factory=dict)
+    duration_ms: int = 0
+
+
+class TaskGraph:
+    def __init__(self) -> None:
+        self._steps: dict[str, Step] = {}
+
+    def add(self, name: str, func: StepFunc, deps: tuple[str, ...] = ()) -> None:
+        if name in self._steps:
+            raise ValueError(f"duplicate_step: {name}")
+        self._steps[name] = Step(name=name, func=func, deps=deps)
+
+    def order(self) -> list[str]:
+        ordered: list[str] = []
+        state: dict[str, int] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"cycle_detected: {name}")
+            if name not in self._steps:
+                raise ValueError(f"unknown_step: {name}")
+            state[name] = 1
+            for dep in self._steps[name].deps:
+                visit(dep)
+            state[name] = 2
+            ordered.append(name)
+
+        for name in self._steps:
+            visit(name)
+        return ordered
+
+    async def run(self) -> PipelineResult:
+        result = PipelineResult()
+        start = time.monotonic()
+        tasks: dict[str, asyncio.Task[Any]] = {}
+
+        async def _run_step(step: Step) -> Any:
+            if step.deps:
+                await asyncio.gather(*(tasks[dep] for dep in step.deps))
+            begin = time.monotonic()
+            try:
+                value = await step.func(result.results)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                raise PipelineError(step.name, exc) from exc
+            result.timings_ms[step.name] = (
+                int((begin - start) * 1000),
+                int((time.monotonic() - start) * 1000),
+            )
+            result.results[step.name] = value
+            return value
+
+        for name in self.order():
+            tasks[name] = asyncio.create_task(_run_step(self._steps[name]), name=f"pipeline-{name}")
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        result.duration_ms = int((time.monotonic() - start) * 1000)
+        return result
+
+
+def _is_static(config: SitehubYaml) -> bool:
+    return config.mode == "static" or config.external_port is not None
+
+
+class DeployPipeline:
+    def __init__(
+        self,
+        settings: Settings,
+        sync_engine: SyncEngine | None = None,
+        nginx_engine: NginxEngine | None = None,
+        supervisor: AppSupervisor | None = None,
+    ) -> None:
+        self.settings = settings
+        self.sync_engine = sync_engine or SyncEngine(settings, inventory=get_inventory(settings))
+        self.nginx_engine = nginx_engine or NginxEngine(settings)
+        self.supervisor = supervisor or AppSupervisor(settings, nginx=self.nginx_engine)
+
+    def build(self, local_path: Path, remote_path: str) -> TaskGraph:
+        graph = TaskGraph()
+        nginx = self.nginx_engine
+
+        def build_root(results: dict[str, Any]) -> Path:
+            built: FingerprintResult | PrecompressResult | None = results.get("precompress") or results.get(
+                "fingerprint"
+            )
+            return built.root if built is not None else local_path
+
+        def staging_dir(config: SitehubYaml) -> Path:
+            return Path(self.settings.cache_dir or ".sitehub-cache") / BUILD_DIR_NAME / config.name
+
+        async def fingerprint(results: dict[str, Any]) -> FingerprintResult | None:
+            config: SitehubYaml = results["parse"]
+            if config.fingerprint is not True or not _is_static(config):
+                return None
+            return await asyncio.to_thread(build_fingerprinted, local_path, staging_dir(config))
+
+        async def precompress(results: dict[str, Any]) -> PrecompressResult | None:
+            config: SitehubYaml = results["parse"]
+            if config.precompress is False or not _is_static(config):
+                return None
+            root = build_root(results)
+            if root == local_path:
+                root = await asyncio.to_thread(stage_tree, local_path, staging_dir(config))
+            return await asyncio.to_thread(
+                precompress_tree, root, self.settings.brotli_enabled, self.settings.precompress_workers
+            )
+
+        async def sync(results: dict[str, Any]) -> SyncResult:
+            # Redeploys update the live directory in place; publish then restarts or reloads against it.
+            return await self.sync_engine.sync(build_root(results), remote_path, allow_existing=True)
+
+        async def parse(results: dict[str, Any]) -> SitehubYaml:
+            config = await asyncio.to_thread(load_sitehub_config, local_path / "sitehub.yaml")
+            if config is None:
+                raise ValueError("sitehub_yaml_invalid: empty document")
+            return config
+
+        async def port_scan(results: dict[str, Any]) -> int | None:
+            config: SitehubYaml = results["parse"]
+            if config.external_port is None:
+                return None
+            return await nginx.ensure_external_port_available(config.name, config.external_port)
+
+        async def render(results: dict[str, Any]) -> str:
+            config: SitehubYaml = results["parse"]
+            return nginx.render_site(config, results["port_scan"], base_dir=local_path)
+
+        async def precheck(results: dict[str, Any]) -> None:
+            await nginx.test_config()
+
+        async def publish(results: dict[str, Any]) -> Any:
+            config: SitehubYaml = results["parse"]
+            if config.supervisor is not None:
+                return await self.supervisor.restart(remote_path, config)
+            if nginx.routes_enabled(config):
+                await nginx.publish_route(config)
+                return None
+            await nginx.publish_conf(results["render"], config.name)
+            return None
+
+        graph.add("parse", parse)
+        graph.add("fingerprint", fingerprint, ("parse",))
+        graph.add("precompress", precompress, ("fingerprint",))
+        graph.add("sync", sync, ("precompress",))
+        graph.add("port_scan", port_scan, ("parse",))
+        graph.add("render", render, ("parse", "port_scan"))
+        graph.add("precheck", precheck)
+        graph.add("publish", publish, ("sync", "render", "precheck"))
+        return graph
+
+    async def run(self, local_path: Path, remote_path: str) -> PipelineResult:
+        site = Path(remote_path).name
+        try:
+            async with get_coordinator(self.settings).lock(deploy_lock(self.settings.env_host, site)):
+                result = await self.build(local_path, remote_path).run()
+        except PipelineError as exc:
+            log_event(
+                "DEPLOY",
+                f"action=pipeline status=failed step={exc.step} remote_path={remote_path} error={exc.error}",
+                site=site,
+            )
+            raise
+        timings = " ".join(f"{name}={end - begin}ms" for name, (begin, end) in sorted(result.timings_ms.items()))
+        log_event(
+            "DEPLOY",
+            f"action=pipeline status=success remote_path={remote_path} duration_ms={result.duration_ms} {timings}",
+            site=site,
+        )
+        return result
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from sitehub.event_log import log_event
+
+COMPRESSIBLE_SUFFIXES = frozenset(
+    {".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".xml", ".wasm", ".ico", ".webmanifest"}
+)
+SKIP_DIRS = frozenset({".git", ".venv", "__pycache__", "node_modules", ".sitehub"})
+MIN_SIZE_BYTES = 1024
+MANIFEST_NAME = ".sitehub-precompress.json"
+SERIAL_THRESHOLD = 16
+
+
+@dataclass(frozen=True)
+class PrecompressResult:
+    root: Path
+    compressed: int
+    skipped: int
+    bytes_in: int
+    bytes_out: int
+    duration_ms: int
+
+
+def brotli_available() -> bool:
+    return brotli is not None
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fresh(source: Path, sibling: Path, source_mtime_ns: int) -> bool:
+    try:
+        return sibling.stat().st_mtime_ns == source_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(path_text: str, formats: tuple[str, ...], known_hash: str | None) -> dict[str, Any]:
+    source = Path(path_text)
+    stat = source.stat()
+    siblings = {fmt: source.with_name(f"{source.name}.{fmt}") for fmt in formats}
+    if all(_fresh(source, sibling, stat.st_mtime_ns) for sibling in siblings.values()):
+        return {"path": path_text, "hash": known_hash, "written": 0, "bytes_in": 0, "bytes_out": 0}
+    digest = _sha256(source)
+    if digest == known_hash and all(sibling.exists() for sibling in siblings.values()):
+        for sibling in siblings.values():
+            os.utime(sibling, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        return {"path": path_text, "hash": digest, "written": 0, "bytes_in": 0, "bytes_out": 0}
+    data = source.read_bytes()
+    bytes_out = 0
+    for fmt, sibling in siblings.items():
+        if fmt == "gz":
+            payload = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            payload = brotli.compress(data, quality=11)
+        tmp = sibling.with_name(f".{sibling.name}.tmp")
+        tmp.write_bytes(payload)
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp, sibling)
+        bytes_out += len(payload)
+    return {"path": path_text, "hash": digest, "written": 1, "bytes_in": len(data), "bytes_out": bytes_out}
+
+
+def iter_compressible(root: Path) -> list[Path]:
+    found: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name not in SKIP_DIRS]
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if filename == MANIFEST_NAME or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES or path.is_symlink():
+                continue
+            if path.stat().st_size >= MIN_SIZE_BYTES:
+                found.append(path)
+    return found
+
+
+def _read_manifest(root: Path) -> dict[str, str]:
+    try:
+        data = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def precompress_tree(root: Path, use_brotli: bool = False, workers: int = 0) -> PrecompressResult:
+    start = time.monotonic()
+    formats: tuple[str, ...] = ("gz", "br") if use_brotli and brotli_available() else ("gz",)
+    manifest = _read_manifest(root)
+    files = iter_compressible(root)
+    jobs = [(str(path), formats, manifest.get(path.relative_to(root).as_posix())) for path in files]
+    if len(jobs) < SERIAL_THRESHOLD or workers == 1:
+        results = [compress_file(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            results = list(pool.map(compress_file, *zip(*jobs), chunksize=8))
+    updated = {
+        Path(item["path"]).relative_to(root).as_posix(): item["hash"] for item in results if item["hash"] is not None
+    }
+    merged: dict[str, str] = {}
+    for key, value in manifest.items():
+        if (root / key).exists():
+            merged[key] = value
+            continue
+        for fmt in ("gz", "br"):
+            (root / f"{key}.{fmt}").unlink(missing_ok=True)
+    merged.update(updated)
+    if merged != manifest:
+        (root / MANIFEST_NAME).write_text(json.dumps(merged, sort_keys=True), encoding="utf-8")
+    written = sum(item["written"] for item in results)
+    result = PrecompressResult(
+        root=root,
+        compressed=written,
+        skipped=len(results) - written,
+        bytes_in=sum(item["bytes_in"] for item in results),
+        bytes_out=sum(item["bytes_out"] for item in results),
+        duration_ms=int((time.monotonic() - start) * 1000),
+    )
+    log_event(
+        "DEPLOY",
+        f"action=precompress status=success root={root} formats={','.join(formats)} compressed={result.compressed} "
+        f"skipped={result.skipped} bytes_in={result.bytes_in} bytes_out={result.bytes_out} "
+        f"duration_ms={result.duration_ms}",
+        site=root.name,
+    )
+    return result
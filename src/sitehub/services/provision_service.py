@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import shlex
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from sitehub.config import Settings
+from sitehub.coordination import PROVISION_LOCK, get_coordinator
+from sitehub.event_log import log_event
+from sitehub.models.apps import APP_PORT_MAX, APP_PORT_MIN
+from sitehub.models.site_config import PortRangeError
+from sitehub.models.sites import SiteProvisionResult, is_valid_site_name
+from sitehub.pocketbase import PocketBaseClient
+from sitehub.services.deploy_service import _run_ssh_command
+from sitehub.services.venv_service import VenvProvisioner
+
+PROC_NET_TCP_FILES = ("/proc/net/tcp", "/proc/net/tcp6")
+TCP_LISTEN_STATE = "0A"
+ENV_FILE_NAME = "sitehub.env"
+LOCK_FILE_NAME = ".sitehub-provision.lock"
+ENV_MARKER = "--- sitehub.env ---"
+DEFAULT_SITES_BASE = "/vol1/1000/MyDocker/web-cluster/sites"
+
+
+class PortUnavailableError(RuntimeError):
+    def __init__(self, port: int, reason: str = "port_unavailable") -> None:
+        super().__init__(f"{reason}: {port}")
+        self.port = port
+
+
+class NoPortAvailableError(RuntimeError):
+    def __init__(self) -> None:
+        super().__init__(f"no_port_available: {APP_PORT_MIN}-{APP_PORT_MAX}")
+
+
+def parse_proc_net_listening(content: str) -> set[int]:
+    ports: set[int] = set()
+    for line in content.splitlines():
+        parts = line.split()
+        if len(parts) < 4 or parts[3] != TCP_LISTEN_STATE:
+            continue
+        _, _, port_hex = parts[1].rpartition(":")
+        try:
+            ports.add(int(port_hex, 16))
+        except ValueError:
+            continue
+    return ports
+
+
+def parse_env_file(content: str) -> dict[str, str]:
+    data: dict[str, str] = {}
+    for raw in content.splitlines():
+        key, sep, value = raw.strip().partition("=")
+        if sep and key:
+            data[key] = value
+    return data
+
+
+def render_env_file(name: str, port: int) -> str:
+    return f"SITE_NAME={name}\nPORT={port}\n"
+
+
+@dataclass(frozen=True)
+class PortBitmap:
+    low: int
+    high: int
+    taken: int = 0
+
+    @classmethod
+    def from_ports(cls, low: int, high: int, ports: Iterable[int]) -> PortBitmap:
+        taken = 0
+        for port in ports:
+            if low <= port <= high:
+                taken |= 1 << (port - low)
+        return cls(low=low, high=high, taken=taken)
+
+    def is_free(self, port: int) -> bool:
+        if not self.low <= port <= self.high:
+            return False
+        return not self.taken & (1 << (port - self.low))
+
+    def first_free(self) -> int | None:
+        free = ~self.taken & ((1 << (self.high - self.low + 1)) - 1)
+        if not free:
+            return None
+        return self.low + (free & -free).bit_length() - 1
+
+
+class ProvisionService:
+    def __init__(
+        self,
+        settings: Settings,
+        pocketbase: PocketBaseClient | None = None,
+        sites_base: str | None = None,
+    ) -> None:
+        self.settings = settings
+        self.pocketbase = pocketbase
+        self.sites_base = (sites_base or settings.app_root_dir or DEFAULT_SITES_BASE).rstrip("/")
+        self.ssh_timeout_s = settings.env_probe_timeout_s
+
+    @property
+    def is_local(self) -> bool:
+        return Path(self.sites_base).is_dir()
+
+    async def _registry_ports(self, name: str) -> set[int]:
+        if self.pocketbase is None:
+            return set()
+        records = await self.pocketbase.list_apps()
+        return {record.port for record in records if record.name != name}
+
+    def _read_local_snapshot(self, env_file: Path) -> tuple[set[int], str | None]:
+        listening: set[int] = set()
+        for proc_file in PROC_NET_TCP_FILES:
+            try:
+                listening |= parse_proc_net_listening(Path(proc_file).read_text(encoding="ascii"))
+            except OSError:
+                continue
+        try:
+            env_text: str | None = env_file.read_text(encoding="utf-8")
+        except OSError:
+            env_text = None
+        return listening, env_text
+
+    async def _read_remote_snapshot(self, env_file: str) -> tuple[set[int], str | None]:
+        command = (
+            f"cat {' '.join(PROC_NET_TCP_FILES)} 2>/dev/null; "
+            f"echo {shlex.quote(ENV_MARKER)}; "
+            f"cat {shlex.quote(env_file)} 2>/dev/null || true"
+        )
+        rc, stdout, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+        if rc != 0:
+            raise RuntimeError(f"remote_port_scan_failed: {stderr.strip() or rc}")
+        proc_text, _, env_text = stdout.partition(ENV_MARKER)
+        return parse_proc_net_listening(proc_text), env_text.strip() or None
+
+    def _select_port(self, requested: int | None, bitmap: PortBitmap, existing: str | None) -> int:
+        if requested is not None:
+            if not APP_PORT_MIN <= requested <= APP_PORT_MAX:
+                raise PortRangeError(f"port_out_of_range: expected {APP_PORT_MIN}-{APP_PORT_MAX}")
+            current = parse_env_file(existing).get("PORT") if existing else None
+            if current == str(requested):
+                return requested
+            if not bitmap.is_free(requested):
+                raise PortUnavailableError(requested)
+            return requested
+        if existing:
+            current = parse_env_file(existing).get("PORT", "")
+            if current.isdigit() and APP_PORT_MIN <= int(current) <= APP_PORT_MAX:
+                return int(current)
+        port = bitmap.first_free()
+        if port is None:
+            raise NoPortAvailableError()
+        return port
+
+    def _lease_port(self, name: str, port: int) -> None:
+        if not get_coordinator(self.settings).lease_port(name, port):
+            raise PortUnavailableError(port, "port_leased")
+
+    async def provision(
+        self,
+        name: str,
+        port: int | None = None,
+        *,
+        init_venv: bool = False,
+        requirements: str | None = None,
+    ) -> SiteProvisionResult:
+        if not is_valid_site_name(name):
+            raise ValueError(f"site_name_invalid: {name}")
+        coordinator = get_coordinator(self.settings)
+        async with coordinator.lock(PROVISION_LOCK):
+            reserved = await self._registry_ports(name) | coordinator.leased_ports(exclude=name)
+            if not self.is_local:
+                if init_venv:
+                    raise RuntimeError("venv_remote_unsupported: run provision-site.sh on the env host")
+                result = await self._provision_remote(name, port, reserved)
+            else:
+                result = await asyncio.to_thread(self._provision_local, name, port, reserved)
+        if result.method == "ssh" or not init_venv:
+            return result
+        site_dir = Path(result.site_dir)
+        requirements_path = site_dir / requirements if requirements else None
+        if requirements_path is not None and not requirements_path.is_file():
+            raise RuntimeError(f"requirements_missing: {requirements_path}")
+        venv = await asyncio.to_thread(VenvProvisioner(self.settings).provision, site_dir, requirements_path)
+        return result.model_copy(update={"venv": venv.path, "venv_layer": venv.layer})
+
+    def _provision_local(self, name: str, port: int | None, reserved: set[int]) -> SiteProvisionResult:
+        base = Path(self.sites_base)
+        site_dir = base / name
+        env_file = site_dir / ENV_FILE_NAME
+        with (base / LOCK_FILE_NAME).open("a") as lock_handle:
+            fcntl.flock(lock_handle.fileno(), fcntl.LOCK_EX)
+            try:
+                listening, existing = self._read_local_snapshot(env_file)
+                bitmap = PortBitmap.from_ports(APP_PORT_MIN, APP_PORT_MAX, listening | reserved)
+                selected = self._select_port(port, bitmap, existing)
+                self._lease_port(name, selected)
+                content = render_env_file(name, selected)
+                changed = existing != content
+                if changed:
+                    try:
+                        site_dir.mkdir(parents=True, exist_ok=True)
+                        tmp_file = env_file.with_name(f".{ENV_FILE_NAME}.{os.getpid()}")
+                        tmp_file.write_text(content, encoding="utf-8")
+                        os.replace(tmp_file, env_file)
+                    except OSError:
+                        get_coordinator(self.settings).release_port(name)
+                        raise
+            finally:
+                fcntl.flock(lock_handle.fileno(), fcntl.LOCK_UN)
+        log_event(
+            "PROVISION",
+            f"status=success method=local site_dir={site_dir} port={selected}",
+            site=name,
+        )
+        return SiteProvisionResult(
+            name=name,
+            port=selected,
+            site_dir=str(site_dir),
+            env_file=str(env_file),
+            method="local",
+            changed=changed,
+        )
+
+    async def _provision_remote(self, name: str, port: int | None, reserved: set[int]) -> SiteProvisionResult:
+        site_dir = f"{self.sites_base}/{name}"
+        env_file = f"{site_dir}/{ENV_FILE_NAME}"
+        listening, existing = await self._read_remote_snapshot(env_file)
+        bitmap = PortBitmap.from_ports(APP_PORT_MIN, APP_PORT_MAX, listening | reserved)
+        selected = self._select_port(port, bitmap, existing)
+        self._lease_port(name, selected)
+        content = render_env_file(name, selected)
+        changed = (existing or "").strip() != content.strip()
+        if changed:
+            tmp_file = f"{site_dir}/.{ENV_FILE_NAME}.tmp"
+            command = (
+                f"mkdir -p {shlex.quote(site_dir)} && "
+                f"printf %s {shlex.quote(content)} > {shlex.quote(tmp_file)} && "
+                f"mv -f {shlex.quote(tmp_file)} {shlex.quote(env_file)}"
+            )
+            rc, _, stderr = await _run_ssh_command(self.settings, command, self.ssh_timeout_s)
+            if rc != 0:
+                get_coordinator(self.settings).release_port(name)
+                raise RuntimeError(f"remote_provision_failed: {stderr.strip() or rc}")
+        log_event(
+            "PROVISION",
+            f"status=success method=ssh site_dir={site_dir} port={selected}",
+            site=name,
+        )
+        return SiteProvisionResult(
+            name=name,
+            port=selected,
+            site_dir=site_dir,
+            env_file=env_file,
+            method="ssh",
+            changed=changed,
+        )
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import PurePosixPath
+from typing import Any
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.models.apps import AppRecord
+from sitehub.models.site_config import PerformanceConfig, SiteConfig
+from sitehub.models.sites import ReconcileAction, ReconcileResult
+from sitehub.nginx_templates import ROUTES_CONF_NAME, is_generated, parse_routes, render_routes
+from sitehub.pocketbase import PocketBaseClient
+from sitehub.services.deploy_service import LISTEN_PORT_RE, PROXY_PASS_PORT_RE, NginxEngine
+from sitehub.services.inventory_service import InventoryService, get_inventory
+
+
+def _conf_ports(content: str) -> tuple[set[int], set[int]]:
+    listen = {int(match.group(1)) for match in LISTEN_PORT_RE.finditer(content)}
+    upstream = {int(match.group(1)) for match in PROXY_PASS_PORT_RE.finditer(content)}
+    return listen, upstream
+
+
+def _site_config(record: AppRecord) -> SiteConfig:
+    config: dict[str, Any] = record.sitehub_config or {}
+    external_port = config.get("external_port")
+    performance = config.get("performance")
+    return SiteConfig.model_construct(
+        name=record.name,
+        port=record.port,
+        mode=str(config.get("mode") or "proxy"),
+        external_port=int(external_port) if isinstance(external_port, (int, str)) else None,
+        nginx_template=config.get("nginx_template"),
+        performance=PerformanceConfig.model_validate(performance) if isinstance(performance, dict) else None,
+        fingerprint=config.get("fingerprint"),
+    )
+
+
+def _site_dir_name(record: AppRecord) -> str:
+    parts = PurePosixPath(record.path).parts
+    return parts[0] if parts else record.name
+
+
+class Reconciler:
+    def __init__(
+        self,
+        settings: Settings,
+        pocketbase: PocketBaseClient,
+        nginx: NginxEngine | None = None,
+        sites_base: str | None = None,
+        inventory: InventoryService | None = None,
+    ) -> None:
+        self.settings = settings
+        self.pocketbase = pocketbase
+        self.nginx = nginx or NginxEngine(settings)
+        self.inventory = inventory or get_inventory(settings, sites_base)
+        self.sites_base = self.inventory.root
+
+    async def _list_site_dirs(self) -> set[str]:
+        return {entry.name for entry in await self.inventory.sites()}
+
+    async def snapshot(self) -> tuple[list[AppRecord], dict[str, str], set[str]]:
+        records, confs, site_dirs = await asyncio.gather(
+            self.pocketbase.list_apps(), self.nginx.conf_snapshot(), self._list_site_dirs()
+        )
+        by_name = {PurePosixPath(path).name[: -len(".conf")]: content for path, content in confs.items()}
+        return records, by_name, site_dirs
+
+    def _desired(self, record: AppRecord, text: str) -> tuple[set[int], set[int]]:
+        config: dict[str, Any] = record.sitehub_config or {}
+        listen, upstream = _conf_ports(text)
+        supervisor = config.get("supervisor")
+        if upstream and isinstance(supervisor, dict) and isinstance(supervisor.get("ports"), (list, tuple)):
+            upstream = {int(port) for port in supervisor["ports"]}
+        return listen, upstream
+
+    def plan(
+        self, records: list[AppRecord], confs: dict[str, str], site_dirs: set[str], prune: bool = False
+    ) -> tuple[list[ReconcileAction], dict[str, str], list[str]]:
+        actions: list[ReconcileAction] = []
+        writes: dict[str, str] = {}
+        removals: list[str] = []
+        registered: set[str] = set()
+        configs = {record.name: _site_config(record) for record in records}
+        routed = {
+            record.name
+            for record in records
+            if not (record.sitehub_config or {}).get("supervisor") and self.nginx.routes_enabled(configs[record.name])
+        }
+        rendered = self.nginx.render_all([config for name, config in configs.items() if name not in routed])
+        for record in records:
+            registered.add(record.name)
+            site_dir = _site_dir_name(record)
+            if site_dir not in site_dirs:
+                actions.append(
+                    ReconcileAction(kind="missing_site_dir", name=record.name, detail=f"{self.sites_base}/{site_dir}")
+                )
+            if record.name in routed:
+                if record.name in confs:
+                    detail = f"routed via {ROUTES_CONF_NAME}"
+                    actions.append(ReconcileAction(kind="superseded_conf", name=record.name, detail=detail))
+                    removals.append(record.name)
+                continue
+            text = rendered[record.name]
+            listen, upstream = self._desired(record, text)
+            current = confs.get(record.name)
+            if current is None:
+                actions.append(ReconcileAction(kind="missing_conf", name=record.name, detail=f"port={record.port}"))
+                writes[record.name] = text
+            else:
+                current_listen, current_upstream = _conf_ports(current)
+                if current_listen != listen or (current_upstream and not current_upstream <= upstream):
+                    actions.append(
+                        ReconcileAction(
+                            kind="port_drift",
+                            name=record.name,
+                            detail=(
+                                f"listen={sorted(current_listen)} upstream={sorted(current_upstream)} "
+                                f"expected_listen={sorted(listen)} expected_upstream={sorted(upstream)}"
+                            ),
+                        )
+                    )
+                    writes[record.name] = text
+        if self.nginx.settings.nginx_routing == "map":
+            registered.add(ROUTES_CONF_NAME)
+            routes = {name: configs[name].port for name in routed}
+            current = confs.get(ROUTES_CONF_NAME)
+            text = render_routes(routes)
+            if current is None or current.rstrip("\n") != text.rstrip("\n"):
+                previous = parse_routes(current or "")
+                changed = sorted(name for name in set(routes) | set(previous) if routes.get(name) != previous.get(name))
+                actions.append(
+                    ReconcileAction(
+                        kind="route_drift", name=ROUTES_CONF_NAME, detail=f"routes={len(routes)} changed={changed}"
+                    )
+                )
+                writes[ROUTES_CONF_NAME] = text
+        for name in sorted(set(confs) - registered):
+            if not is_generated(confs[name]):
+                actions.append(ReconcileAction(kind="foreign_conf", name=name, detail="kept: not generated by sitehub"))
+                continue
+            actions.append(
+                ReconcileAction(kind="orphaned_conf", name=name, detail="removed" if prune else "kept: prune disabled")
+            )
+            if prune:
+                removals.append(name)
+        return actions, writes, removals
+
+    async def reconcile(self, dry_run: bool = True, prune: bool = False) -> ReconcileResult:
+        start = time.monotonic()
+        records, confs, site_dirs = await self.snapshot()
+        actions, writes, removals = self.plan(records, confs, site_dirs, prune)
+        applied = False
+        if not dry_run and (writes or removals):
+            await self.nginx.apply_configs(writes, removals)
+            applied = True
+        duration_ms = int((time.monotonic() - start) * 1000)
+        log_event(
+            "NGINX",
+            f"action=reconcile status=success dry_run={str(dry_run).lower()} apps={len(records)} "
+            f"confs={len(confs)} actions={len(actions)} written={len(writes) if applied else 0} "
+            f"removed={len(removals) if applied else 0} duration_ms={duration_ms}",
+        )
+        return ReconcileResult(
+            dry_run=dry_run,
+            applied=applied,
+            actions=actions,
+            written=sorted(writes) if applied else [],
+            removed=removals if applied else [],
+            duration_ms=duration_ms,
+        )
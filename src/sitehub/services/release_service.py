@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from sitehub.event_log import log_event
+
+RELEASE_EXCLUDES = (".git", ".venv", "releases", "current", "openspec", ".trae", "sitehub.log", "sitehub.log.*")
+RELEASE_META = "release.json"
+RELEASE_MANIFEST = ".sitehub-manifest.json"
+RELEASE_ID_FORMAT = "%Y%m%d%H%M%S"
+RELEASE_ID_RE = re.compile(r"^\d{14}(?:-\d+)?$")
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_KEEP = 5
+
+
+@dataclass(frozen=True)
+class ReleaseInfo:
+    release_id: str
+    path: str
+    current: bool
+    meta: dict[str, Any] | None
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReleaseManager:
+    def __init__(self, site_root: Path, excludes: Iterable[str] | None = None) -> None:
+        self.site_root = site_root
+        self.releases_dir = site_root / "releases"
+        self.current_link = site_root / "current"
+        self.excludes = tuple(excludes or RELEASE_EXCLUDES)
+        self._prune_thread: threading.Thread | None = None
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.excludes)
+
+    def current_release(self) -> str | None:
+        if not self.current_link.is_symlink():
+            return None
+        target = Path(os.readlink(self.current_link))
+        if not target.is_absolute():
+            target = self.current_link.parent / target
+        return target.name if target.parent.resolve() == self.releases_dir.resolve() else None
+
+    def _release_ids(self) -> list[str]:
+        if not self.releases_dir.is_dir():
+            return []
+        return sorted(
+            entry.name for entry in self.releases_dir.iterdir() if entry.is_dir() and not entry.name.startswith(".")
+        )
+
+    def _load_manifest(self, release_id: str | None) -> dict[str, list[Any]]:
+        if release_id is None:
+            return {}
+        try:
+            data = json.loads((self.releases_dir / release_id / RELEASE_MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _new_release_id(self) -> str:
+        base = time.strftime(RELEASE_ID_FORMAT)
+        release_id = base
+        suffix = 0
+        while (self.releases_dir / release_id).exists():
+            suffix += 1
+            release_id = f"{base}-{suffix}"
+        return release_id
+
+    def _walk_source(self, source: Path) -> Iterable[tuple[str, Path]]:
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(name for name in dirs if not self._excluded(name))
+            root_path = Path(root)
+            for name in sorted(files):
+                if self._excluded(name):
+                    continue
+                path = root_path / name
+                yield path.relative_to(source).as_posix(), path
+            for name in dirs:
+                path = root_path / name
+                if path.is_symlink():
+                    yield path.relative_to(source).as_posix(), path
+
+    def deploy(self, source: Path, keep: int = DEFAULT_KEEP) -> ReleaseInfo:
+        start = time.monotonic()
+        source = source.resolve()
+        release_ids = self._release_ids()
+        previous = self.current_release() or (release_ids[-1] if release_ids else None)
+        previous_manifest = self._load_manifest(previous)
+        previous_dir = self.releases_dir / previous if previous else None
+        release_id = self._new_release_id()
+        staging = self.releases_dir / f".{release_id}.tmp"
+        staging.mkdir(parents=True)
+
+        manifest: dict[str, list[Any]] = {}
+        total_bytes = 0
+        linked = 0
+        copied = 0
+        for rel, path in self._walk_source(source):
+            dest = staging / rel
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            stat = path.lstat()
+            if path.is_symlink():
+                target = os.readlink(path)
+                os.symlink(target, dest)
+                manifest[rel] = ["link", target]
+                continue
+            entry = previous_manifest.get(rel)
+            if entry and entry[0] == "file" and entry[1] == stat.st_size and entry[2] == stat.st_mtime_ns:
+                digest = str(entry[3])
+            else:
+                digest = _file_digest(path)
+                if not (entry and entry[0] == "file" and entry[3] == digest):
+                    entry = None
+            if entry and previous_dir is not None:
+                try:
+                    os.link(previous_dir / rel, dest)
+                    linked += 1
+                except OSError:
+                    shutil.copy2(path, dest)
+                    copied += 1
+            else:
+                shutil.copy2(path, dest)
+                copied += 1
+            manifest[rel] = ["file", stat.st_size, stat.st_mtime_ns, digest]
+            total_bytes += stat.st_size
+
+        source_hash = hashlib.sha256(
+            "".join(f"{rel}\0{value[-1]}\n" for rel, value in sorted(manifest.items())).encode("utf-8")
+        ).hexdigest()
+        meta = {
+            "release_id": release_id,
+            "source": str(source),
+            "source_hash": source_hash,
+            "previous": previous,
+            "file_count": len(manifest),
+            "bytes": total_bytes,
+            "linked": linked,
+            "copied": copied,
+            "duration_ms": int((time.monotonic() - start) * 1000),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        (staging / RELEASE_MANIFEST).write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+        (staging / RELEASE_META).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        release_dir = self.releases_dir / release_id
+        staging.rename(release_dir)
+        self._switch_current(release_dir)
+        log_event(
+            "DEPLOY",
+            f"action=deploy status=success release={release_id} site_root={self.site_root} source={source} "
+            f"files={len(manifest)} linked={linked} copied={copied} duration_ms={meta['duration_ms']}",
+            site=self.site_root.name,
+        )
+        self.prune(keep, background=True)
+        return ReleaseInfo(release_id=release_id, path=str(release_dir), current=True, meta=meta)
+
+    def _switch_current(self, release_dir: Path) -> None:
+        tmp_link = self.site_root / "current.tmp"
+        if tmp_link.is_symlink() or tmp_link.exists():
+            tmp_link.unlink()
+        os.symlink(release_dir, tmp_link)
+        os.replace(tmp_link, self.current_link)
+
+    def rollback(self, release_id: str) -> ReleaseInfo:
+        if not RELEASE_ID_RE.fullmatch(release_id):
+            raise ValueError(f"release_id_invalid: {release_id}")
+        release_dir = self.releases_dir / release_id
+        if not release_dir.is_dir():
+            raise FileNotFoundError(f"release_not_found: {release_dir}")
+        self._switch_current(release_dir)
+        log_event(
+            "DEPLOY",
+            f"action=rollback status=success release={release_id} site_root={self.site_root}",
+            site=self.site_root.name,
+        )
+        return ReleaseInfo(
+            release_id=release_id, path=str(release_dir), current=True, meta=self._load_meta(release_id)
+        )
+
+    def _load_meta(self, release_id: str) -> dict[str, Any] | None:
+        try:
+            data = json.loads((self.releases_dir / release_id / RELEASE_META).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def prune(self, keep: int = DEFAULT_KEEP, background: bool = False) -> list[str]:
+        if keep < 1:
+            raise ValueError("keep must be a positive integer")
+        current = self.current_release()
+        release_ids = [release_id for release_id in self._release_ids() if release_id != current]
+        kept_slots = keep - 1 if current else keep
+        doomed = release_ids[: max(len(release_ids) - kept_slots, 0)]
+        if not doomed:
+            return []
+        if background:
+            self.wait_for_prune()
+            self._prune_thread = threading.Thread(
+                target=self._remove_releases, args=(doomed,), name="sitehub-release-prune"
+            )
+            self._prune_thread.start()
+        else:
+            self._remove_releases(doomed)
+        return doomed
+
+    def wait_for_prune(self) -> None:
+        if self._prune_thread is not None:
+            self._prune_thread.join()
+            self._prune_thread = None
+
+    def _remove_releases(self, release_ids: list[str]) -> None:
+        for release_id in release_ids:
+            doomed_dir = self.releases_dir / release_id
+            trash_dir = self.releases_dir / f".{release_id}.trash"
+            try:
+                doomed_dir.rename(trash_dir)
+            except OSError:
+                continue
+            shutil.rmtree(trash_dir, ignore_errors=True)
+            log_event(
+                "DEPLOY",
+                f"action=cleanup status=success release={release_id} site_root={self.site_root}",
+                site=self.site_root.name,
+            )
+
+    def list(self) -> list[ReleaseInfo]:
+        current = self.current_release()
+        return [
+            ReleaseInfo(
+                release_id=release_id,
+                path=str(self.releases_dir / release_id),
+                current=release_id == current,
+                meta=self._load_meta(release_id),
+            )
+            for release_id in self._release_ids()
+        ]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import shlex
+import time
+from dataclasses import dataclass
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.models.site_config import SiteConfig, SupervisorConfig
+from sitehub.services.deploy_service import NginxEngine, _run_ssh_command
+
+STATE_DIR_NAME = ".sitehub"
+ACTIVE_PORT_FILE = "active_port"
+READY_BACKOFF_INITIAL_S = 0.2
+READY_BACKOFF_MAX_S = 2.0
+READY_PROBE_TIMEOUT_S = 2
+STOP_GRACE_S = 10
+# Remote commands that wait on the app get the ssh connect budget plus their own worst-case runtime.
+STOP_COMMAND_SLACK_S = 5
+INSTANCE_EXITED_RC = 3
+LOG_TAIL_LINES = 20
+
+
+class SupervisorError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class SupervisorResult:
+    name: str
+    previous_port: int | None
+    active_port: int
+    pid: int
+    duration_ms: int
+
+
+class AppSupervisor:
+    def __init__(
+        self,
+        settings: Settings,
+        nginx: NginxEngine | None = None,
+        ssh_timeout_s: float | None = None,
+    ) -> None:
+        self.settings = settings
+        self.nginx = nginx or NginxEngine(settings)
+        self.ssh_timeout_s = ssh_timeout_s or settings.ssh_connect_timeout_s
+
+    @staticmethod
+    def _state_dir(site_root: str) -> str:
+        return f"{site_root.rstrip('/')}/{STATE_DIR_NAME}"
+
+    def _pid_file(self, site_root: str, port: int) -> str:
+        return f"{self._state_dir(site_root)}/app-{port}.pid"
+
+    def _log_file(self, site_root: str, port: int) -> str:
+        return f"{self._state_dir(site_root)}/app-{port}.log"
+
+    async def _ssh(self, command: str, timeout_s: float | None = None) -> tuple[int, str, str]:
+        return await _run_ssh_command(self.settings, command, timeout_s or self.ssh_timeout_s)
+
+    async def active_port(self, site_root: str) -> int | None:
+        path = f"{self._state_dir(site_root)}/{ACTIVE_PORT_FILE}"
+        rc, stdout, _ = await self._ssh(f"cat {shlex.quote(path)} 2>/dev/null || true")
+        value = stdout.strip()
+        return int(value) if rc == 0 and value.isdigit() else None
+
+    async def _set_active_port(self, site_root: str, port: int) -> None:
+        path = f"{self._state_dir(site_root)}/{ACTIVE_PORT_FILE}"
+        tmp_path = f"{path}.tmp"
+        command = (
+            f"printf '%s\\n' {port} > {shlex.quote(tmp_path)} && "
+            f"mv -f {shlex.quote(tmp_path)} {shlex.quote(path)}"
+        )
+        rc, _, stderr = await self._ssh(command)
+        if rc != 0:
+            raise SupervisorError(f"active_port_write_failed: {stderr.strip() or rc}")
+
+    async def start(self, site_root: str, name: str, supervisor: SupervisorConfig, port: int) -> int:
+        await self.stop(site_root, port)
+        pid_file = self._pid_file(site_root, port)
+        # setsid makes the app its own process group so stop() can signal every child it spawns.
+        command = (
+            f"cd {shlex.quote(site_root)} && mkdir -p {STATE_DIR_NAME} && "
+            f"PORT={port} APP_DIR={shlex.quote(site_root)} SITE_NAME={shlex.quote(name)} "
+            f"setsid nohup sh -c {shlex.quote(supervisor.command)} "
+            f"> {shlex.quote(self._log_file(site_root, port))} 2>&1 < /dev/null & "
+            f"echo $! > {shlex.quote(pid_file)} && cat {shlex.quote(pid_file)}"
+        )
+        rc, stdout, stderr = await self._ssh(command)
+        pid = stdout.strip()
+        if rc != 0 or not pid.isdigit():
+            raise SupervisorError(f"instance_start_failed: port={port} {stderr.strip() or rc}")
+        return int(pid)
+
+    async def wait_ready(self, site_root: str, port: int, health_path: str, timeout_s: float) -> None:
+        pid_file = shlex.quote(self._pid_file(site_root, port))
+        url = shlex.quote(f"http://127.0.0.1:{port}{health_path}")
+        command = (
+            f"kill -0 \"$(cat {pid_file})\" 2>/dev/null || exit {INSTANCE_EXITED_RC}; "
+            f"curl -fsS -o /dev/null --max-time {READY_PROBE_TIMEOUT_S} {url}"
+        )
+        deadline = time.monotonic() + timeout_s
+        delay = READY_BACKOFF_INITIAL_S
+        while True:
+            rc, _, stderr = await self._ssh(command, self.ssh_timeout_s + READY_PROBE_TIMEOUT_S)
+            if rc == 0:
+                return
+            if rc == INSTANCE_EXITED_RC:
+                raise SupervisorError(f"instance_exited: port={port} {await self._log_tail(site_root, port)}")
+            if time.monotonic() + delay > deadline:
+                raise SupervisorError(f"instance_not_ready: port={port} {stderr.strip() or rc}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, READY_BACKOFF_MAX_S)
+
+    async def _log_tail(self, site_root: str, port: int) -> str:
+        path = shlex.quote(self._log_file(site_root, port))
+        _, stdout, _ = await self._ssh(f"tail -n {LOG_TAIL_LINES} {path} 2>/dev/null || true")
+        return stdout.strip()
+
+    async def stop(self, site_root: str, port: int, drain_s: float = 0.0) -> None:
+        if drain_s > 0:
+            await asyncio.sleep(drain_s)
+        pid_file = shlex.quote(self._pid_file(site_root, port))
+        command = (
+            f"pid=$(cat {pid_file} 2>/dev/null) || exit 0; "
+            "kill -TERM -- -$pid 2>/dev/null || kill -TERM $pid 2>/dev/null; "
+            f"for _ in $(seq 1 {STOP_GRACE_S}); do kill -0 $pid 2>/dev/null || break; sleep 1; done; "
+            "kill -KILL -- -$pid 2>/dev/null || true; "
+            f"rm -f {pid_file}"
+        )
+        rc, _, stderr = await self._ssh(command, self.ssh_timeout_s + STOP_GRACE_S + STOP_COMMAND_SLACK_S)
+        if rc != 0:
+            raise SupervisorError(f"instance_stop_failed: port={port} {stderr.strip() or rc}")
+
+    async def _restore_conf(self, config: SiteConfig, previous: int | None) -> None:
+        try:
+            if previous is not None:
+                conf_text = self.nginx.render_config(config.name, previous, "proxy", performance=config.performance)
+                await self.nginx.publish_conf(conf_text, config.name)
+            else:
+                await self.nginx.apply_configs({}, [config.name])
+        except Exception as exc:
+            log_event(
+                "DEPLOY",
+                f"action=restart status=rollback_failed previous_port={previous} error={exc}",
+                site=config.name,
+            )
+
+    async def restart(self, site_root: str, config: SiteConfig) -> SupervisorResult:
+        supervisor = config.supervisor
+        if supervisor is None:
+            raise ValueError("supervisor_config_missing")
+        if config.mode != "proxy":
+            raise ValueError("supervisor_requires_proxy_mode")
+        start = time.monotonic()
+        previous = await self.active_port(site_root)
+        if previous not in supervisor.ports:
+            previous = None
+        low, high = supervisor.ports
+        if previous is not None:
+            standby = high if previous == low else low
+        else:
+            standby = high if config.port == low else low
+
+        pid = await self.start(site_root, config.name, supervisor, standby)
+        pushed = False
+        try:
+            await self.wait_ready(site_root, standby, supervisor.health_path, supervisor.ready_timeout_s)
+            conf_text = self.nginx.render_config(config.name, standby, "proxy", performance=config.performance)
+            await self.nginx.publish_conf(conf_text, config.name)
+            pushed = True
+            await self._set_active_port(site_root, standby)
+        except Exception as exc:
+            if pushed:
+                await self._restore_conf(config, previous)
+            await self.stop(site_root, standby)
+            log_event(
+                "DEPLOY",
+                f"action=restart status=failed site_root={site_root} standby={standby} error={exc}",
+                site=config.name,
+            )
+            raise
+        if previous is not None:
+            await self.stop(site_root, previous, drain_s=supervisor.drain_s)
+        duration_ms = int((time.monotonic() - start) * 1000)
+        log_event(
+            "DEPLOY",
+            f"action=restart status=success site_root={site_root} previous_port={previous} "
+            f"active_port={standby} pid={pid} duration_ms={duration_ms}",
+            site=config.name,
+        )
+        return SupervisorResult(
+            name=config.name, previous_port=previous, active_port=standby, pid=pid, duration_ms=duration_ms
+        )
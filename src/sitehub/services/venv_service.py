@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+
+VENV_DIR_NAME = ".venv"
+LAYER_MARKER = ".sitehub-layer"
+COMPLETE_MARKER = ".sitehub-complete"
+TEMPLATE_KEY = "template"
+PIP_TIMEOUT_S = 900.0
+REQUIREMENTS_COMMENT_RE = re.compile(r"(^|\s+)#.*$")
+
+
+class VenvProvisionError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class VenvResult:
+    path: str
+    layer: str
+    method: str
+    duration_ms: int
+
+
+def requirements_key(requirements: Path) -> str:
+    lines = []
+    for raw in requirements.read_text(encoding="utf-8").splitlines():
+        line = REQUIREMENTS_COMMENT_RE.sub("", raw).strip()
+        if line:
+            lines.append(line)
+    interpreter = f"{platform.python_implementation()}-{sys.version_info[0]}.{sys.version_info[1]}-{platform.machine()}"
+    payload = "\n".join([interpreter, *sorted(lines)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def clone_venv(source: Path, dest: Path) -> str:
+    method = "hardlink"
+    source_prefix = str(source).encode()
+    dest_prefix = str(dest).encode()
+    for root, dirs, files in os.walk(source):
+        root_path = Path(root)
+        rel = root_path.relative_to(source)
+        target_dir = dest / rel
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in list(dirs):
+            if (root_path / name).is_symlink():
+                os.symlink(os.readlink(root_path / name), target_dir / name)
+                dirs.remove(name)
+        for name in files:
+            src = root_path / name
+            dst = target_dir / name
+            if rel == Path(".") and name in (COMPLETE_MARKER, LAYER_MARKER):
+                continue
+            if src.is_symlink():
+                os.symlink(os.readlink(src), dst)
+                continue
+            if rel == Path("bin") or (rel == Path(".") and name == "pyvenv.cfg"):
+                data = src.read_bytes()
+                if source_prefix in data:
+                    dst.write_bytes(data.replace(source_prefix, dest_prefix))
+                    shutil.copymode(src, dst)
+                    continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+                method = "copy"
+    return method
+
+
+class VenvProvisioner:
+    def __init__(self, settings: Settings, python_bin: str | None = None) -> None:
+        cache_root = Path(settings.cache_dir or ".sitehub-cache").resolve() / "venvs"
+        self.template_dir = cache_root / TEMPLATE_KEY
+        self.layers_dir = cache_root / "layers"
+        self.wheelhouse = cache_root / "wheelhouse"
+        self.lock_path = cache_root / ".lock"
+        self.python_bin = python_bin or sys.executable
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _run(self, args: list[str], action: str) -> None:
+        try:
+            proc = subprocess.run(args, check=False, capture_output=True, text=True, timeout=PIP_TIMEOUT_S)
+        except subprocess.TimeoutExpired as exc:
+            raise VenvProvisionError(f"{action}_timeout") from exc
+        if proc.returncode != 0:
+            detail = proc.stderr.strip().splitlines()[-1:] or [str(proc.returncode)]
+            raise VenvProvisionError(f"{action}_failed: {detail[0]}")
+
+    def ensure_template(self) -> Path:
+        if (self.template_dir / COMPLETE_MARKER).exists():
+            return self.template_dir
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+        self._run([self.python_bin, "-m", "venv", str(self.template_dir)], "template_venv")
+        (self.template_dir / COMPLETE_MARKER).touch()
+        return self.template_dir
+
+    def ensure_wheelhouse(self, requirements: Path) -> None:
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
+        pip = [str(self.template_dir / "bin" / "python"), "-m", "pip"]
+        self._run(
+            [*pip, "wheel", "--quiet", "--find-links", str(self.wheelhouse), "-w", str(self.wheelhouse),
+             "-r", str(requirements)],
+            "wheelhouse_build",
+        )
+
+    def ensure_layer(self, requirements: Path) -> str:
+        key = requirements_key(requirements)
+        layer_dir = self.layers_dir / key
+        if (layer_dir / COMPLETE_MARKER).exists():
+            return key
+        shutil.rmtree(layer_dir, ignore_errors=True)
+        self.layers_dir.mkdir(parents=True, exist_ok=True)
+        clone_venv(self.template_dir, layer_dir)
+        self.ensure_wheelhouse(requirements)
+        self._run(
+            [str(layer_dir / "bin" / "python"), "-m", "pip", "install", "--quiet", "--no-index",
+             "--find-links", str(self.wheelhouse), "-r", str(requirements)],
+            "layer_install",
+        )
+        (layer_dir / COMPLETE_MARKER).write_text(requirements.read_text(encoding="utf-8"), encoding="utf-8")
+        return key
+
+    def provision(self, site_dir: Path, requirements: Path | None = None) -> VenvResult:
+        start = time.monotonic()
+        with self._locked():
+            self.ensure_template()
+            if requirements is not None:
+                key = self.ensure_layer(requirements)
+                source = self.layers_dir / key
+            else:
+                key = TEMPLATE_KEY
+                source = self.template_dir
+        dest = site_dir / VENV_DIR_NAME
+        marker = dest / LAYER_MARKER
+        if dest.exists():
+            if marker.exists() and marker.read_text(encoding="utf-8").strip() == key:
+                return VenvResult(str(dest), key, "existing", int((time.monotonic() - start) * 1000))
+            stale = dest.with_name(f"{VENV_DIR_NAME}.old-{int(time.time())}")
+            dest.rename(stale)
+        else:
+            stale = None
+        method = clone_venv(source, dest)
+        marker.write_text(key + "\n", encoding="utf-8")
+        if stale is not None:
+            shutil.rmtree(stale, ignore_errors=True)
+        duration_ms = int((time.monotonic() - start) * 1000)
+        log_event(
+            "PROVISION",
+            f"action=venv status=success path={dest} layer={key} method={method} duration_ms={duration_ms}",
+            site=site_dir.name,
+        )
+        return VenvResult(str(dest), key, method, duration_ms)
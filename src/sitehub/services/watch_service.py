@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import shlex
+import time
+from pathlib import PurePosixPath
+
+from sitehub.config import Settings
+from sitehub.event_log import log_event
+from sitehub.events import ChangeAction, ChangeEvent, EventBus
+from sitehub.services.deploy_service import DEFAULT_NGINX_REMOTE_CONF_DIR, _run_ssh_command
+from sitehub.services.provision_service import DEFAULT_SITES_BASE
+from sitehub.ssh import ssh_base_args, ssh_target
+
+INOTIFY_EVENTS = "create,close_write,delete,moved_to,moved_from"
+INOTIFY_MISSING_RC = 127
+SNAPSHOT_MARKER = "--- sitehub-sites"
+COALESCE_WINDOW_S = 0.2
+RECONNECT_BACKOFF_S = 1.0
+RECONNECT_BACKOFF_MAX_S = 30.0
+STABLE_SESSION_S = 60.0
+
+logger = logging.getLogger("sitehub.watch")
+
+Snapshot = dict[tuple[str, str], str]
+
+
+def _event_action(flags: str) -> ChangeAction:
+    names = set(flags.split(","))
+    if names & {"DELETE", "MOVED_FROM", "DELETE_SELF"}:
+        return "deleted"
+    if names & {"CREATE", "MOVED_TO"}:
+        return "created"
+    return "modified"
+
+
+def parse_inotify_line(line: str, conf_dir: str, sites_root: str) -> ChangeEvent | None:
+    flags, _, path = line.rstrip("\n").partition("\t")
+    if not path:
+        return None
+    posix = PurePosixPath(path.rstrip("/"))
+    parent = str(posix.parent)
+    if parent == conf_dir and posix.suffix == ".conf":
+        return ChangeEvent(kind="conf", action=_event_action(flags), name=posix.stem, path=str(posix))
+    if parent == sites_root and "ISDIR" in flags.split(","):
+        return ChangeEvent(kind="site", action=_event_action(flags), name=posix.name, path=str(posix))
+    return None
+
+
+def parse_snapshot(output: str, conf_dir: str, sites_root: str) -> Snapshot:
+    conf_text, _, sites_text = output.partition(SNAPSHOT_MARKER)
+    snapshot: Snapshot = {}
+    for kind, text, base in (("conf", conf_text, conf_dir), ("site", sites_text, sites_root)):
+        for line in text.splitlines():
+            name, _, mtime = line.partition("\t")
+            if name and mtime:
+                snapshot[(kind, f"{base}/{name}")] = mtime
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> list[ChangeEvent]:
+    events: list[ChangeEvent] = []
+    for key in sorted(old.keys() | new.keys()):
+        kind, path = key
+        if key not in new:
+            action: ChangeAction = "deleted"
+        elif key not in old:
+            action = "created"
+        elif old[key] != new[key]:
+            action = "modified"
+        else:
+            continue
+        posix = PurePosixPath(path)
+        name = posix.stem if kind == "conf" else posix.name
+        events.append(ChangeEvent(kind="conf" if kind == "conf" else "site", action=action, name=name, path=path))
+    return events
+
+
+class RemoteWatcher:
+    def __init__(
+        self,
+        settings: Settings,
+        bus: EventBus,
+        conf_dir: str | None = None,
+        sites_root: str | None = None,
+    ) -> None:
+        self.settings = settings
+        self.bus = bus
+        self.conf_dir = (conf_dir or DEFAULT_NGINX_REMOTE_CONF_DIR).rstrip("/")
+        self.sites_root = (sites_root or settings.app_root_dir or DEFAULT_SITES_BASE).rstrip("/")
+        self.poll_interval_s = settings.watch_poll_interval_s
+        self.mode = "inotify"
+        self._task: asyncio.Task[None] | None = None
+        self._proc: asyncio.subprocess.Process | None = None
+
+    def _inotify_command(self) -> str:
+        return (
+            f"command -v inotifywait >/dev/null 2>&1 || exit {INOTIFY_MISSING_RC}; "
+            f"exec inotifywait -m -q -e {INOTIFY_EVENTS} --format '%e\t%w%f' "
+            f"{shlex.quote(self.conf_dir)} {shlex.quote(self.sites_root)}"
+        )
+
+    def _snapshot_command(self) -> str:
+        return (
+            f"find {shlex.quote(self.conf_dir)} -maxdepth 1 -type f -name '*.conf' -printf '%f\\t%T@\\n' 2>/dev/null; "
+            f"echo {shlex.quote(SNAPSHOT_MARKER)}; "
+            f"find {shlex.quote(self.sites_root)} -mindepth 1 -maxdepth 1 -type d -printf '%f\\t%T@\\n' 2>/dev/null; "
+            "true"
+        )
+
+    async def _publish(self, events: list[ChangeEvent]) -> None:
+        latest: dict[tuple[str, str], ChangeEvent] = {}
+        for event in events:
+            latest[(event.kind, event.path)] = event
+        for event in latest.values():
+            await self.bus.publish(event)
+
+    async def _watch_inotify(self) -> int:
+        target = ssh_target(self.settings)
+        if not target:
+            return INOTIFY_MISSING_RC
+        self._proc = await asyncio.create_subprocess_exec(
+            *ssh_base_args(self.settings),
+            target,
+            "bash",
+            "-lc",
+            self._inotify_command(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout = self._proc.stdout
+        assert stdout is not None
+        try:
+            while True:
+                line = await stdout.readline()
+                if not line:
+                    break
+                batch = [line]
+                while True:
+                    try:
+                        more = await asyncio.wait_for(stdout.readline(), timeout=COALESCE_WINDOW_S)
+                    except asyncio.TimeoutError:
+                        break
+                    if not more:
+                        break
+                    batch.append(more)
+                events = [
+                    event
+                    for raw in batch
+                    if (event := parse_inotify_line(raw.decode(errors="replace"), self.conf_dir, self.sites_root))
+                ]
+                await self._publish(events)
+        finally:
+            if self._proc.returncode is None:
+                self._proc.kill()
+            rc = await self._proc.wait()
+            self._proc = None
+        return rc
+
+    async def poll_once(self, previous: Snapshot | None) -> Snapshot:
+        rc, stdout, stderr = await _run_ssh_command(
+            self.settings, self._snapshot_command(), self.settings.env_probe_timeout_s
+        )
+        if rc != 0:
+            raise RuntimeError(f"watch_snapshot_failed: {stderr.strip() or rc}")
+        snapshot = parse_snapshot(stdout, self.conf_dir, self.sites_root)
+        if previous is not None:
+            await self._publish(diff_snapshots(previous, snapshot))
+        return snapshot
+
+    async def _watch_polling(self) -> None:
+        snapshot: Snapshot | None = None
+        while True:
+            try:
+                snapshot = await self.poll_once(snapshot)
+            except RuntimeError as exc:
+                logger.warning("watch_poll_failed error=%s", exc)
+            except Exception:
+                logger.exception("watch_poll_failed")
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def run(self) -> None:
+        backoff = RECONNECT_BACKOFF_S
+        while True:
+            started = time.monotonic()
+            rc: int | None
+            try:
+                rc = await self._watch_inotify()
+            except Exception:
+                logger.exception("watch_channel_failed")
+                rc = None
+            if rc == INOTIFY_MISSING_RC:
+                self.mode = "polling"
+                log_event(
+                    "SSH", f"action=watch mode=polling reason=inotifywait_missing interval_s={self.poll_interval_s}"
+                )
+                await self._watch_polling()
+                return
+            if time.monotonic() - started > STABLE_SESSION_S:
+                backoff = RECONNECT_BACKOFF_S
+            logger.warning("watch_channel_closed rc=%s retry_in=%s", rc, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX_S)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="sitehub-remote-watcher")
+
+    async def stop(self) -> None:
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.kill()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,26 +1,155 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Hashable, Sequence
 
-import yaml
 from pydantic import ValidationError
 
+from sitehub.lazy import lazy_import
 from sitehub.models.site_config import SiteConfig
 
+if TYPE_CHECKING:
+    import yaml
+else:
+    yaml = lazy_import("yaml")
+
+SITEHUB_YAML_CACHE_SIZE = 512
+BATCH_SERIAL_THRESHOLD = 16
+
 
 class SitehubYaml(SiteConfig):
     pass
 
 
-def load_sitehub_yaml(file_path: Path) -> dict[str, Any]:
-    data = yaml.safe_load(file_path.read_text(encoding="utf-8"))
+def _copy(config: SitehubYaml | None) -> SitehubYaml | None:
+    return config.model_copy(deep=True) if config is not None else None
+
+
+class SitehubYamlCache:
+    def __init__(self, max_entries: int = SITEHUB_YAML_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, SitehubYaml | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, SitehubYaml | None]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, _copy(self._entries[key])
+
+    def put(self, key: Hashable, value: SitehubYaml | None) -> None:
+        value = _copy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = SitehubYamlCache()
+
+
+def sitehub_yaml_cache() -> SitehubYamlCache:
+    return _cache
+
+
+def _safe_loader() -> Any:
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_sitehub_yaml_text(text: str) -> SitehubYaml | None:
+    data = yaml.load(text, Loader=_safe_loader())
     if data is None:
-        return {}
+        return None
     if not isinstance(data, dict):
         raise ValueError("sitehub.yaml must be a YAML mapping")
     try:
-        validated = SitehubYaml.model_validate(data)
+        return SitehubYaml.model_validate(data)
     except ValidationError as exc:
         raise ValueError(str(exc)) from exc
-    return validated.model_dump(mode="python", exclude_none=True)
+
+
+def _file_key(file_path: Path) -> tuple[str, int, int]:
+    stat = file_path.stat()
+    return str(file_path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def load_sitehub_config(file_path: Path) -> SitehubYaml | None:
+    key = _file_key(file_path)
+    found, config = _cache.get(key)
+    if found:
+        return config
+    config = parse_sitehub_yaml_text(file_path.read_text(encoding="utf-8"))
+    _cache.put(key, config)
+    return config
+
+
+def parse_remote_sitehub_yaml(location: str, text: str) -> SitehubYaml | None:
+    key = (location, hashlib.sha256(text.encode("utf-8")).hexdigest())
+    found, config = _cache.get(key)
+    if found:
+        return config
+    config = parse_sitehub_yaml_text(text)
+    _cache.put(key, config)
+    return config
+
+
+def _load_for_batch(path_text: str) -> tuple[SitehubYaml | None, str | None]:
+    try:
+        return parse_sitehub_yaml_text(Path(path_text).read_text(encoding="utf-8")), None
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        return None, str(exc)
+
+
+def load_sitehub_configs(
+    paths: Sequence[Path], workers: int = 0
+) -> tuple[dict[Path, SitehubYaml | None], dict[Path, str]]:
+    configs: dict[Path, SitehubYaml | None] = {}
+    errors: dict[Path, str] = {}
+    pending: list[tuple[Path, tuple[str, int, int]]] = []
+    for path in paths:
+        try:
+            key = _file_key(path)
+        except OSError as exc:
+            errors[path] = str(exc)
+            continue
+        found, config = _cache.get(key)
+        if found:
+            configs[path] = config
+        else:
+            pending.append((path, key))
+    jobs = [str(path) for path, _ in pending]
+    if len(jobs) < BATCH_SERIAL_THRESHOLD or workers == 1:
+        results = [_load_for_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            results = list(pool.map(_load_for_batch, jobs, chunksize=8))
+    for (path, key), (config, error) in zip(pending, results):
+        if error is not None:
+            errors[path] = error
+            continue
+        _cache.put(key, config)
+        configs[path] = config
+    return configs, errors
+
+
+def load_sitehub_yaml(file_path: Path) -> dict[str, Any]:
+    config = load_sitehub_config(file_path)
+    if config is None:
+        return {}
+    return config.model_dump(mode="python", exclude_none=True)
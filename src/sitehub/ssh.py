@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Literal, TypeVar
+
+from sitehub.config import Settings
+from sitehub.metrics import REGISTRY, Sample
+
+SSH_CONTROL_PERSIST_S = 600
+SSH_MAX_ATTEMPTS = 2
+SSH_RETRY_BACKOFF_S = 0.2
+SSH_CHECK_TIMEOUT_S = 5.0
+SSH_CONNECT_FAILURE_RC = 255
+SSH_TIMEOUT_RC = 124
+HOST_UNAVAILABLE = "host_unavailable"
+BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+T = TypeVar("T")
+
+logger = logging.getLogger("sitehub.ssh")
+
+
+@dataclass(frozen=True)
+class SSHResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    elapsed_s: float
+
+
+def ssh_target(settings: Settings) -> str | None:
+    host = settings.env_host
+    if not host:
+        return None
+    if settings.ssh_user:
+        return f"{settings.ssh_user}@{host}"
+    return host
+
+
+def ssh_control_path(settings: Settings) -> str:
+    target = ssh_target(settings) or "unknown"
+    port = settings.ssh_port or 22
+    digest = hashlib.sha1(f"{target}:{port}".encode("utf-8")).hexdigest()[:12]
+    return f"/tmp/sitehub-ssh-{digest}"
+
+
+@lru_cache(maxsize=64)
+def _cached_base_args(settings: Settings, control_master: str) -> tuple[str, ...]:
+    args = [
+        "ssh",
+        "-o",
+        "BatchMode=yes",
+        "-o",
+        f"ConnectTimeout={int(settings.ssh_connect_timeout_s)}",
+        "-o",
+        "ConnectionAttempts=1",
+        "-o",
+        "PasswordAuthentication=no",
+        "-o",
+        "IdentitiesOnly=yes",
+        "-o",
+        "StrictHostKeyChecking=no",
+        "-o",
+        "UserKnownHostsFile=/dev/null",
+        "-o",
+        "LogLevel=ERROR",
+        "-o",
+        f"ControlMaster={control_master}",
+        "-o",
+        f"ControlPersist={SSH_CONTROL_PERSIST_S}s",
+        "-o",
+        f"ControlPath={ssh_control_path(settings)}",
+        "-o",
+        "ServerAliveInterval=15",
+    ]
+    if settings.ssh_private_key_path:
+        args.extend(["-i", settings.ssh_private_key_path])
+    if settings.ssh_port:
+        args.extend(["-p", str(settings.ssh_port)])
+    return tuple(args)
+
+
+def ssh_base_args(settings: Settings) -> tuple[str, ...]:
+    return _cached_base_args(settings, "auto")
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, threshold: int, reset_s: float) -> None:
+        self.host = host
+        self.threshold = max(threshold, 1)
+        self.reset_s = reset_s
+        self.state: BreakerState = "closed"
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.last_error: str | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_s:
+                    return False
+                self.state = "half_open"
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record(self, ok: bool, error: str | None = None) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                if self.state != "closed":
+                    logger.info("ssh_breaker_closed host=%s", self.host)
+                self.state = "closed"
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            self.last_error = error
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    logger.warning("ssh_breaker_open host=%s failures=%s error=%s", self.host, self.failures, error)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            retry_in = None
+            if self.state == "open" and self.opened_at is not None:
+                retry_in = round(max(self.reset_s - (time.monotonic() - self.opened_at), 0.0), 3)
+            return {
+                "host": self.host,
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "retry_in_s": retry_in,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(settings: Settings) -> CircuitBreaker:
+    key = ssh_control_path(settings)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                ssh_target(settings) or "unknown", settings.ssh_breaker_threshold, settings.ssh_breaker_reset_s
+            )
+            _breakers[key] = breaker
+        return breaker
+
+
+def _breaker_samples() -> Iterator[Sample]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        yield "sitehub_ssh_breaker_state", {"host": breaker.host}, float(BREAKER_STATE_VALUES[breaker.state])
+        yield "sitehub_ssh_breaker_failures", {"host": breaker.host}, float(breaker.failures)
+
+
+REGISTRY.register_collector("ssh_breaker", "gauge", _breaker_samples)
+
+
+_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def loop_scoped(registry: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, T]]) -> dict[str, T]:
+    for loop in [loop for loop in list(registry) if loop.is_closed()]:
+        registry.pop(loop, None)
+    return registry.setdefault(asyncio.get_running_loop(), {})
+
+
+def session_semaphore(settings: Settings) -> asyncio.Semaphore:
+    semaphores = loop_scoped(_semaphores)
+    key = ssh_control_path(settings)
+    semaphore = semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(settings.ssh_max_sessions, 1))
+        semaphores[key] = semaphore
+    return semaphore
+
+
+async def kill_process(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        proc.kill()
+    await proc.wait()
+
+
+async def run_ssh(
+    settings: Settings,
+    command: str,
+    timeout_s: float | None,
+    *,
+    stdin: str | None = None,
+    attempts: int = SSH_MAX_ATTEMPTS,
+) -> SSHResult:
+    target = ssh_target(settings)
+    if not target:
+        return SSHResult(255, "", "ssh_target_missing", 0.0)
+    breaker = circuit_breaker(settings)
+    args = ssh_base_args(settings)
+    payload = stdin.encode() if stdin is not None else None
+    async with session_semaphore(settings):
+        if not breaker.allow():
+            REGISTRY.inc("sitehub_ssh_rejected_total", {"host": breaker.host})
+            return SSHResult(SSH_CONNECT_FAILURE_RC, "", HOST_UNAVAILABLE, 0.0)
+        for attempt in range(attempts):
+            start = time.monotonic()
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                target,
+                "bash",
+                "-lc",
+                command,
+                stdin=asyncio.subprocess.PIPE if payload is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(payload), timeout=timeout_s)
+                rc = proc.returncode or 0
+            except asyncio.TimeoutError:
+                await kill_process(proc)
+                rc, stdout, stderr = SSH_TIMEOUT_RC, b"", b"ssh_timeout"
+            except asyncio.CancelledError:
+                breaker.release()
+                await kill_process(proc)
+                raise
+            elapsed = time.monotonic() - start
+            connect_failed = rc in (SSH_CONNECT_FAILURE_RC, SSH_TIMEOUT_RC)
+            breaker.record(not connect_failed, stderr.decode(errors="replace").strip()[-200:] or str(rc))
+            REGISTRY.inc(
+                "sitehub_ssh_commands_total",
+                {"host": breaker.host, "result": "unreachable" if connect_failed else "ok"},
+            )
+            if rc == 0 or attempt == attempts - 1 or breaker.state != "closed":
+                return SSHResult(rc, stdout.decode(), stderr.decode(), elapsed)
+            await asyncio.sleep(SSH_RETRY_BACKOFF_S * (attempt + 1))
+    return SSHResult(255, "", "ssh_failed", 0.0)
+
+
+class SSHMaster:
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.interval_s = settings.ssh_keepalive_interval_s
+        self.alive = False
+        self.last_check: float | None = None
+        self.reopen_count = 0
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+
+    async def _exec(self, *args: str, timeout_s: float = SSH_CHECK_TIMEOUT_S) -> int:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            await kill_process(proc)
+            return SSH_TIMEOUT_RC
+        except asyncio.CancelledError:
+            await kill_process(proc)
+            raise
+
+    async def check(self) -> bool:
+        target = ssh_target(self.settings)
+        if not target:
+            return False
+        rc = await self._exec(*ssh_base_args(self.settings), "-O", "check", target)
+        self.alive = rc == 0
+        self.last_check = time.time()
+        return self.alive
+
+    async def open(self) -> bool:
+        target = ssh_target(self.settings)
+        if not target:
+            return False
+        args = _cached_base_args(self.settings, "yes")
+        rc = await self._exec(
+            *args, "-N", "-f", target, timeout_s=self.settings.ssh_connect_timeout_s + SSH_CHECK_TIMEOUT_S
+        )
+        self.alive = rc == 0
+        self.last_check = time.time()
+        circuit_breaker(self.settings).record(self.alive, None if self.alive else "master_open_failed")
+        if self.alive:
+            self.reopen_count += 1
+        else:
+            logger.warning("ssh_master_open_failed target=%s rc=%s", target, rc)
+        return self.alive
+
+    async def ensure(self) -> bool:
+        if await self.check():
+            return True
+        return await self.open()
+
+    async def close(self) -> None:
+        target = ssh_target(self.settings)
+        if target:
+            await self._exec(*ssh_base_args(self.settings), "-O", "exit", target)
+        self.alive = False
+
+    async def _keepalive(self, stopping: asyncio.Event) -> None:
+        while not stopping.is_set():
+            try:
+                await self.ensure()
+            except OSError as exc:
+                logger.warning("ssh_master_check_failed error=%s", exc)
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None and self.interval_s > 0:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._keepalive(self._stopping), name="sitehub-ssh-master")
+
+    async def stop(self, close: bool = False) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if close:
+            await self.close()
+
+    def status(self) -> dict[str, object]:
+        return {
+            "control_path": ssh_control_path(self.settings),
+            "alive": self.alive,
+            "last_check": self.last_check,
+            "reopen_count": self.reopen_count,
+            "breaker": circuit_breaker(self.settings).snapshot(),
+        }
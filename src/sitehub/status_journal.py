@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+from sitehub.config import Settings
+from sitehub.coordination import LockTimeoutError, get_coordinator
+from sitehub.metrics import REGISTRY, Sample
+from sitehub.models.apps import AppRecord
+from sitehub.pocketbase import PocketBaseClient
+
+STATUS_JOURNAL_DB_NAME = "status-journal.sqlite"
+FLUSH_LOCK = "status-journal"
+FLUSH_BATCH_SIZE = 200
+FLUSH_RETRY_MAX_S = 30.0
+DROPPED_STATUS_CODES = (404, 410)
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS updates (seq INTEGER PRIMARY KEY AUTOINCREMENT, record_id TEXT NOT NULL, "
+    "fields TEXT NOT NULL, written_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS updates_record ON updates (record_id, seq)",
+)
+
+logger = logging.getLogger("sitehub.status_journal")
+
+
+class StatusJournal:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(self, updates: Mapping[str, Mapping[str, Any]]) -> None:
+        if not updates:
+            return
+        now = time.time()
+        rows = [(record_id, json.dumps(dict(fields), sort_keys=True), now) for record_id, fields in updates.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT INTO updates (record_id, fields, written_at) VALUES (?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def pending(self) -> dict[str, tuple[int, dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, record_id, fields FROM updates ORDER BY seq").fetchall()
+        merged: dict[str, tuple[int, dict[str, Any]]] = {}
+        for seq, record_id, fields in rows:
+            _, current = merged.get(record_id, (0, {}))
+            current.update(json.loads(fields))
+            merged[record_id] = (int(seq), current)
+        return merged
+
+    def pending_count(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(DISTINCT record_id) FROM updates").fetchone()
+        return int(row[0])
+
+    def acknowledge(self, applied: Mapping[str, int]) -> None:
+        if not applied:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM updates WHERE record_id = ? AND seq <= ?", list(applied.items())
+            )
+
+    def overlay(self, records: list[AppRecord]) -> list[AppRecord]:
+        pending = self.pending()
+        if not pending:
+            return records
+        merged: list[AppRecord] = []
+        for record in records:
+            entry = pending.get(record.id)
+            if entry is None:
+                merged.append(record)
+            else:
+                merged.append(AppRecord.model_validate({**record.model_dump(mode="json"), **entry[1]}))
+        return merged
+
+
+class StatusFlusher:
+    def __init__(
+        self,
+        settings: Settings,
+        journal: StatusJournal,
+        pocketbase: PocketBaseClient | None = None,
+    ) -> None:
+        self.settings = settings
+        self.journal = journal
+        self.interval_s = settings.status_journal_flush_interval_s
+        self.pocketbase = pocketbase or PocketBaseClient.from_settings(settings)
+        self.failures = 0
+        self._task: asyncio.Task[None] | None = None
+
+    async def flush_once(self) -> tuple[int, int]:
+        try:
+            async with get_coordinator(self.settings).lock(FLUSH_LOCK, timeout_s=0):
+                return await self._flush()
+        except LockTimeoutError:
+            return 0, 0
+
+    async def _flush(self) -> tuple[int, int]:
+        batch = dict(islice(self.journal.pending().items(), FLUSH_BATCH_SIZE))
+        if not batch:
+            return 0, 0
+        codes = await self.pocketbase.patch_apps(
+            {record_id: fields for record_id, (_, fields) in batch.items()}, self.settings.health_poll_concurrency
+        )
+        applied: dict[str, int] = {}
+        retrying = 0
+        for record_id, (seq, _) in batch.items():
+            code = codes.get(record_id)
+            if code in DROPPED_STATUS_CODES:
+                logger.warning("status_journal_dropped record=%s status_code=%s", record_id, code)
+            elif code is None or code >= 400:
+                retrying += 1
+                if code is not None:
+                    logger.warning("status_journal_rejected record=%s status_code=%s", record_id, code)
+                continue
+            applied[record_id] = seq
+        self.journal.acknowledge(applied)
+        return len(applied), retrying
+
+    def _delay(self) -> float:
+        if self.failures == 0:
+            return self.interval_s
+        return min(self.interval_s * 2 ** self.failures, FLUSH_RETRY_MAX_S)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                _, retrying = await self.flush_once()
+                self.failures = self.failures + 1 if retrying else 0
+            except Exception:
+                self.failures += 1
+                logger.exception("status_journal_flush_failed")
+            await asyncio.sleep(self._delay())
+
+    def start(self) -> None:
+        if self._task is None and self.interval_s > 0:
+            self._task = asyncio.create_task(self.run(), name="sitehub-status-flusher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush_once()
+        except Exception:
+            logger.exception("status_journal_final_flush_failed")
+
+
+_journals: dict[Path, StatusJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_status_journal(settings: Settings) -> StatusJournal | None:
+    if settings.status_journal_flush_interval_s <= 0:
+        return None
+    db_path = Path(settings.cache_dir or ".sitehub-cache") / STATUS_JOURNAL_DB_NAME
+    with _journals_lock:
+        journal = _journals.get(db_path)
+        if journal is None:
+            journal = StatusJournal(db_path)
+            _journals[db_path] = journal
+        return journal
+
+
+def _journal_samples() -> Iterator[Sample]:
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        yield "sitehub_status_journal_pending", {"path": str(journal.db_path)}, float(journal.pending_count())
+
+
+REGISTRY.register_collector("status_journal", "gauge", _journal_samples)
@@ -1,8 +1,22 @@
 import sys
 from pathlib import Path
+from typing import Iterator
+
+import pytest
 
 
 def pytest_configure() -> None:
     root = Path(__file__).resolve().parents[1]
     src = root / "src"
     sys.path.insert(0, str(src))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    # create_app and log_event otherwise write leases, locks and sitehub.log into the checkout.
+    monkeypatch.setenv("SITEHUB_CACHE_DIR", str(tmp_path / ".sitehub-cache"))
+    monkeypatch.setenv("SITEHUB_LOG_FILE", str(tmp_path / "sitehub.log"))
+    yield
+    from sitehub.event_log import shutdown_event_log
+
+    shutdown_event_log()
@@ -0,0 +1,126 @@
+import asyncio
+import dataclasses
+
+import httpx
+import pytest
+
+import sitehub.api.v1.env as env_api
+from sitehub import admission
+from sitehub.admission import AdmissionController, AdmissionRejectedError
+from sitehub.config import load_settings
+from sitehub.main import create_app
+
+
+def test_deploy_waiters_are_admitted_before_health() -> None:
+    controller = AdmissionController("nas", limit=1, max_queue=8, max_wait_s=5.0)
+    order: list[str] = []
+
+    async def work(tag: str, priority: str) -> None:
+        async with controller.admit(priority):  # type: ignore[arg-type]
+            order.append(tag)
+            await asyncio.sleep(0.01)
+
+    async def main() -> None:
+        async with controller.admit("health"):
+            tasks = [asyncio.create_task(work("health-1", "health"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(work("deploy", "deploy")))
+            tasks.append(asyncio.create_task(work("health-2", "health")))
+            await asyncio.sleep(0)
+            assert controller.queued == 3
+        await asyncio.gather(*tasks)
+        assert controller.active == 0 and controller.queued == 0
+
+    asyncio.run(main())
+    assert order == ["deploy", "health-1", "health-2"]
+
+
+def test_full_queue_rejects_or_preempts_lower_priority() -> None:
+    controller = AdmissionController("nas", limit=1, max_queue=1, max_wait_s=5.0)
+
+    async def main() -> None:
+        async with controller.admit("deploy"):
+            queued_health = asyncio.create_task(controller._acquire("health"))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejectedError, match="reason=queue_full") as exc_info:
+                await controller._acquire("health")
+            assert exc_info.value.retry_after_s == 5
+            queued_deploy = asyncio.create_task(controller._acquire("deploy"))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejectedError, match="priority=health reason=preempted"):
+                await queued_health
+        await queued_deploy
+        assert controller.active == 1
+        controller._release()
+
+    asyncio.run(main())
+
+
+def test_wait_timeout_leaves_no_slot_behind() -> None:
+    controller = AdmissionController("nas", limit=1, max_queue=4, max_wait_s=0.05)
+
+    async def main() -> None:
+        async with controller.admit("deploy"):
+            with pytest.raises(AdmissionRejectedError, match="reason=wait_timeout"):
+                async with controller.admit("health"):
+                    pass
+        assert controller.active == 0 and controller.queued == 0
+        async with controller.admit("health"):
+            assert controller.active == 1
+
+    asyncio.run(main())
+
+
+def test_controllers_are_dropped_once_their_loop_closes() -> None:
+    settings = load_settings()
+
+    async def run() -> None:
+        assert admission.admission_controller(settings) is admission.admission_controller(settings)
+        assert list(admission._controllers) == [asyncio.get_running_loop()]
+
+    for _ in range(3):
+        asyncio.run(run())
+
+
+def test_saturated_env_health_returns_503_with_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SITEHUB_ADMISSION_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("SITEHUB_ADMISSION_MAX_QUEUE", "0")
+    monkeypatch.setenv("SITEHUB_ADMISSION_MAX_WAIT", "3")
+    app = create_app()
+    app.state.settings = dataclasses.replace(load_settings(), env_host="10.9.9.90")
+    release = asyncio.Event()
+
+    async def slow_report(settings: object) -> dict[str, str]:
+        await release.wait()
+        return {"status": "ok"}
+
+    monkeypatch.setattr(env_api, "build_env_report", slow_report)
+
+    async def main() -> tuple[httpx.Response, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/env/health"))
+            await asyncio.sleep(0.05)
+            second = await client.get("/env/health")
+            release.set()
+            return await first, second
+
+    first, second = asyncio.run(main())
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "3"
+    assert second.json()["error"]["reason"] == "queue_full"
+
+
+def test_workers_split_the_per_host_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SITEHUB_WORKERS", "4")
+    settings = dataclasses.replace(load_settings(), admission_max_concurrent=8, admission_max_queue=32)
+
+    async def run() -> tuple[int, int]:
+        controller = admission.admission_controller(settings)
+        return controller.limit, controller.max_queue
+
+    assert settings.workers == 4
+    assert asyncio.run(run()) == (2, 8)
+    assert admission.worker_share(2, 4) == 1
+    assert admission.worker_share(0, 4) == 0
@@ -1,7 +1,13 @@
+import asyncio
 import os
 from pathlib import Path
 
-from sitehub.config import load_settings
+import pytest
+from fastapi.testclient import TestClient
+
+from sitehub import config
+from sitehub.config import Settings, SettingsProvider, load_settings
+from sitehub.main import create_app
 
 
 def test_env_overrides_dotenv(tmp_path: Path) -> None:
@@ -59,3 +65,111 @@ def test_dotenv_used_when_env_missing(tmp_path: Path) -> None:
 
     assert settings.port == 7777
     assert settings.pocketbase_url == "http://dotenv:8090"
+
+
+def test_dotenv_parsed_once_until_file_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dotenv = tmp_path / ".env"
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.1\n", encoding="utf-8")
+    monkeypatch.setenv("SITEHUB_DOTENV_PATH", str(dotenv))
+    monkeypatch.delenv("SITEHUB_ENV_HOST", raising=False)
+    parsed: list[Path] = []
+    parse = config._parse_dotenv
+
+    def counting_parse(path: Path) -> dict[str, str]:
+        parsed.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(config, "_parse_dotenv", counting_parse)
+    assert load_settings().env_host == "10.0.0.1"
+    assert load_settings().env_host == "10.0.0.1"
+    assert len(parsed) == 1
+
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.22\n", encoding="utf-8")
+    assert load_settings().env_host == "10.0.0.22"
+    assert len(parsed) == 2
+
+
+def test_settings_provider_notifies_listeners_on_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dotenv = tmp_path / ".env"
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.1\n", encoding="utf-8")
+    monkeypatch.setenv("SITEHUB_DOTENV_PATH", str(dotenv))
+    monkeypatch.delenv("SITEHUB_ENV_HOST", raising=False)
+    changes: list[tuple[str, str]] = []
+
+    async def listener(previous: Settings, current: Settings) -> None:
+        changes.append((previous.env_host, current.env_host))
+
+    provider = SettingsProvider(interval_s=0)
+    provider.subscribe(listener)
+    assert not asyncio.run(provider.reload())
+
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.2\n", encoding="utf-8")
+    assert asyncio.run(provider.reload())
+    assert provider.get().env_host == "10.0.0.2"
+    assert changes == [("10.0.0.1", "10.0.0.2")]
+
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.2\n# comment\n", encoding="utf-8")
+    assert not asyncio.run(provider.reload())
+    assert len(changes) == 1
+
+
+def test_settings_provider_keeps_polling_after_unexpected_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts: list[int] = []
+
+    def broken_stamp(path: Path) -> None:
+        attempts.append(1)
+        raise PermissionError(f"cannot stat {path}")
+
+    async def run() -> None:
+        provider = SettingsProvider(interval_s=0.01)
+        monkeypatch.setattr(config, "_dotenv_stamp", broken_stamp)
+        provider.start()
+        await asyncio.sleep(0.1)
+        assert provider._task is not None and not provider._task.done()
+        await provider.stop()
+
+    asyncio.run(run())
+    assert len(attempts) > 1
+
+
+def test_app_swaps_settings_and_ssh_master_on_reload(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dotenv = tmp_path / ".env"
+    dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.1\nSITEHUB_SSH_KEEPALIVE_INTERVAL=0\n", encoding="utf-8")
+    monkeypatch.setenv("SITEHUB_DOTENV_PATH", str(dotenv))
+    monkeypatch.setenv("SITEHUB_SETTINGS_RELOAD_INTERVAL", "0")
+    monkeypatch.delenv("SITEHUB_ENV_HOST", raising=False)
+    monkeypatch.delenv("SITEHUB_SSH_KEEPALIVE_INTERVAL", raising=False)
+
+    app = create_app()
+    with TestClient(app) as client:
+        master = app.state.ssh_master
+        dotenv.write_text("SITEHUB_ENV_HOST=10.0.0.9\nSITEHUB_SSH_KEEPALIVE_INTERVAL=0\n", encoding="utf-8")
+        assert client.portal.call(app.state.settings_provider.reload)
+        assert app.state.settings.env_host == "10.0.0.9"
+        assert app.state.ssh_master is not master
+        assert app.state.ssh_master.settings.env_host == "10.0.0.9"
+
+
+def test_app_rebuilds_poller_and_flusher_on_reload(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dotenv = tmp_path / ".env"
+    base = "SITEHUB_SSH_KEEPALIVE_INTERVAL=0\nSITEHUB_HEALTH_POLL_INTERVAL=3600\n"
+    dotenv.write_text(base + "SITEHUB_ENV_HOST=127.0.0.1\nPOCKETBASE_URL=http://127.0.0.1:9\n", encoding="utf-8")
+    monkeypatch.setenv("SITEHUB_DOTENV_PATH", str(dotenv))
+    monkeypatch.setenv("SITEHUB_SETTINGS_RELOAD_INTERVAL", "0")
+    monkeypatch.setenv("SITEHUB_STATUS_JOURNAL_FLUSH_INTERVAL", "3600")
+    for name in ("SITEHUB_ENV_HOST", "SITEHUB_SSH_KEEPALIVE_INTERVAL", "SITEHUB_HEALTH_POLL_INTERVAL",
+                 "POCKETBASE_URL"):
+        monkeypatch.delenv(name, raising=False)
+
+    app = create_app()
+    with TestClient(app) as client:
+        poller = app.state.health_poller
+        assert poller is not None and poller.settings.env_host == "127.0.0.1"
+        dotenv.write_text(base + "SITEHUB_ENV_HOST=127.0.0.2\nPOCKETBASE_URL=http://127.0.0.2:9\n", encoding="utf-8")
+        assert client.portal.call(app.state.settings_provider.reload)
+
+        rebuilt = app.state.health_poller
+        assert rebuilt is not poller and poller._task is None
+        assert rebuilt.settings.env_host == "127.0.0.2"
+        assert rebuilt.pocketbase._base_url == "http://127.0.0.2:9"
+        assert app.state.status_flusher.pocketbase._base_url == "http://127.0.0.2:9"
@@ -0,0 +1,91 @@
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from sitehub.coordination import Coordinator, LockTimeoutError, deploy_lock
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+HOLDER = """
+import asyncio, sys
+from pathlib import Path
+from sitehub.coordination import Coordinator
+
+async def main():
+    async with Coordinator(Path(sys.argv[1])).lock(sys.argv[2]):
+        print("locked", flush=True)
+        await asyncio.sleep(float(sys.argv[3]))
+
+asyncio.run(main())
+"""
+
+
+def test_lock_excludes_other_processes(tmp_path: Path) -> None:
+    name = deploy_lock("10.8.8.80", "demo")
+    proc = subprocess.Popen(
+        [sys.executable, "-c", HOLDER, str(tmp_path), name, "0.6"],
+        env={"PYTHONPATH": str(SRC)},
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert proc.stdout is not None and proc.stdout.readline().strip() == "locked"
+        coordinator = Coordinator(tmp_path)
+
+        async def attempt(timeout_s: float) -> float:
+            start = time.monotonic()
+            async with coordinator.lock(name, timeout_s=timeout_s):
+                return time.monotonic() - start
+
+        with pytest.raises(LockTimeoutError, match=f"held_by_pid={proc.pid}"):
+            asyncio.run(attempt(0.1))
+        assert asyncio.run(attempt(5.0)) > 0.1
+        assert coordinator.holder(name) is None
+    finally:
+        proc.wait(timeout=10)
+
+
+def test_lock_serialises_coroutines_in_one_process(tmp_path: Path) -> None:
+    coordinator = Coordinator(tmp_path)
+    events: list[str] = []
+
+    async def deploy(tag: str) -> None:
+        async with coordinator.lock("nginx-host"):
+            events.append(f"{tag}:start")
+            await asyncio.sleep(0.05)
+            events.append(f"{tag}:end")
+
+    async def main() -> None:
+        await asyncio.gather(deploy("a"), deploy("b"))
+
+    asyncio.run(main())
+    assert events in (["a:start", "a:end", "b:start", "b:end"], ["b:start", "b:end", "a:start", "a:end"])
+
+
+def test_port_leases_are_shared_and_expire(tmp_path: Path) -> None:
+    first = Coordinator(tmp_path)
+    second = Coordinator(tmp_path)
+    assert first.lease_port("alpha", 8081)
+    assert not second.lease_port("beta", 8081)
+    assert second.leased_ports(exclude="beta") == {8081}
+    assert second.leased_ports(exclude="alpha") == set()
+
+    assert first.lease_port("alpha", 8082)
+    assert second.leased_ports() == {8082}
+    assert second.lease_port("beta", 8081, ttl_s=-1)
+    assert first.lease_port("gamma", 8081)
+    first.release_port("gamma")
+    assert second.leased_ports() == {8082}
+
+
+def test_try_hold_elects_one_leader(tmp_path: Path) -> None:
+    first = Coordinator(tmp_path)
+    second = Coordinator(tmp_path)
+    assert first.try_hold("leader")
+    assert not second.try_hold("leader")
+    first.release_hold("leader")
+    assert second.try_hold("leader")
+    second.close()
@@ -0,0 +1,81 @@
+import json
+import logging
+import queue
+import time
+from pathlib import Path
+
+import pytest
+
+from sitehub.event_log import EventLog, EventLogWriter
+
+
+def test_event_log_writes_json_lines(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    event_log = EventLog(log_path)
+    event_log.emit("SSH", "command=true")
+    event_log.emit("NGINX", "action=apply status=success", site="demo-site")
+    event_log.close()
+
+    lines = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert [line["category"] for line in lines] == ["SSH", "NGINX"]
+    assert lines[0]["message"] == "command=true"
+    assert "site" not in lines[0]
+    assert lines[1]["site"] == "demo-site"
+
+
+def test_event_log_rotates_by_size(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    log_path.write_text("x" * 200 + "\n", encoding="utf-8")
+    event_log = EventLog(log_path, max_bytes=100)
+    event_log.emit("DEPLOY", "action=deploy status=success")
+    event_log.close()
+
+    backups = list(tmp_path.glob("sitehub.log.*"))
+    assert len(backups) == 1
+    assert json.loads(log_path.read_text(encoding="utf-8"))["category"] == "DEPLOY"
+
+
+def test_rotations_within_one_second_keep_every_backup(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log_path = tmp_path / "sitehub.log"
+    writer = EventLogWriter(queue.SimpleQueue(), log_path)
+    monkeypatch.setattr(time, "time", lambda: 1_800_000_000.5)
+    for index in range(3):
+        log_path.write_text(f"old-{index}\n" * 5, encoding="utf-8")
+        writer._rotate()
+
+    backups = sorted(tmp_path.glob("sitehub.log.*"), key=lambda path: path.name)
+    assert [path.read_text(encoding="utf-8").split()[0] for path in backups] == ["old-0", "old-1", "old-2"]
+
+
+def _record(message: str) -> logging.LogRecord:
+    record = logging.LogRecord("sitehub.events", logging.INFO, __file__, 0, message, None, None)
+    record.category = "DEPLOY"
+    return record
+
+
+def test_workers_sharing_a_log_rotate_once(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    first = EventLogWriter(queue.SimpleQueue(), log_path, max_bytes=1000)
+    second = EventLogWriter(queue.SimpleQueue(), log_path, max_bytes=1000)
+    for writer, fill in ((first, "a"), (second, "b"), (first, "c"), (second, "d")):
+        writer._write_batch([_record(fill * 150)])
+
+    first._write_batch([_record("e" * 150)])
+    second._write_batch([_record("f" * 150)])
+
+    backups = list(tmp_path.glob("sitehub.log.*"))
+    assert len(backups) == 1
+    assert [json.loads(line)["message"][0] for line in log_path.read_text(encoding="utf-8").splitlines()] == ["e", "f"]
+
+
+def test_failed_batches_are_kept_for_the_next_write(tmp_path: Path) -> None:
+    blocked = tmp_path / "blocked"
+    blocked.write_text("", encoding="utf-8")
+    writer = EventLogWriter(queue.SimpleQueue(), blocked / "sitehub.log")
+    writer._write_batch([_record("first")])
+    assert writer.dropped == 0
+
+    blocked.unlink()
+    writer._write_batch([_record("second")])
+    messages = [json.loads(line)["message"] for line in (blocked / "sitehub.log").read_text().splitlines()]
+    assert messages == ["first", "second"]
@@ -0,0 +1,98 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from sitehub.config import Settings, load_settings
+from sitehub.services import deploy_service, fanout_service
+from sitehub.services.deploy_service import NginxEngine
+from sitehub.services.fanout_service import FanoutDeployer, required_successes, settings_for_host
+from sitehub.ssh import ssh_control_path
+
+
+def test_settings_for_host_and_quorum_policy() -> None:
+    settings = settings_for_host(load_settings(), "deploy@10.0.0.2:2222")
+    assert (settings.env_host, settings.ssh_user, settings.ssh_port) == ("10.0.0.2", "deploy", 2222)
+    assert ssh_control_path(settings) != ssh_control_path(load_settings())
+    assert required_successes("all", 3) == 3
+    assert required_successes("quorum", 3) == 2
+    assert required_successes("1", 3) == 1
+    with pytest.raises(ValueError):
+        required_successes("most", 3)
+
+
+def test_fanout_relay_syncs_once_and_reports_per_host(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    (tmp_path / "sitehub.yaml").write_text("name: demo\nport: 8081\n", encoding="utf-8")
+    local_calls: list[list[str]] = []
+    ssh_calls: list[tuple[str, str]] = []
+
+    async def fake_local(args: list[str], timeout_s: float) -> tuple[int, str, str]:
+        local_calls.append(args)
+        return 0, "", ""
+
+    async def fake_ssh(settings: Settings, command: str, timeout_s: float) -> tuple[int, str, str]:
+        ssh_calls.append((settings.env_host, command))
+        if settings.env_host == "10.0.0.3" and "nginx -t" in command:
+            return 1, "", "emerg"
+        return 0, "", ""
+
+    async def fake_stdin(self: NginxEngine, command: str, content: str) -> tuple[int, str, str]:
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_local_command", fake_local)
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(fanout_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(NginxEngine, "_run_ssh_with_stdin", fake_stdin)
+
+    hosts = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    result = asyncio.run(
+        FanoutDeployer(load_settings(), hosts=hosts, policy="quorum", relay=True).deploy(tmp_path, "/sites/demo")
+    )
+
+    assert [item.status for item in result.hosts] == ["ok", "ok", "error"]
+    assert result.hosts[2].failed_step == "precheck"
+    assert result.ok and result.succeeded == 2
+    assert len([args for args in local_calls if args[0] == "rsync"]) == 1
+    relays = [command for host, command in ssh_calls if command.startswith("rsync")]
+    assert all(host == "10.0.0.1" for host, command in ssh_calls if command.startswith("rsync"))
+    assert any("10.0.0.2:/sites/demo" in command for command in relays)
+
+    strict = asyncio.run(FanoutDeployer(load_settings(), hosts=hosts, policy="all").deploy(tmp_path, "/sites/demo"))
+    assert not strict.ok
+
+
+def test_relay_peers_survive_source_host_precheck_failure(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    (tmp_path / "sitehub.yaml").write_text("name: demo\nport: 8081\n", encoding="utf-8")
+    local_calls: list[list[str]] = []
+    relays: list[str] = []
+
+    async def fake_local(args: list[str], timeout_s: float) -> tuple[int, str, str]:
+        local_calls.append(args)
+        await asyncio.sleep(0.05)
+        return 0, "", ""
+
+    async def fake_ssh(settings: Settings, command: str, timeout_s: float) -> tuple[int, str, str]:
+        if command.startswith("rsync"):
+            relays.append(command)
+        if settings.env_host == "10.0.0.1" and "nginx -t" in command:
+            return 1, "", "emerg"
+        return 0, "", ""
+
+    async def fake_stdin(self: NginxEngine, command: str, content: str) -> tuple[int, str, str]:
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_local_command", fake_local)
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(fanout_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(NginxEngine, "_run_ssh_with_stdin", fake_stdin)
+
+    hosts = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    result = asyncio.run(
+        FanoutDeployer(load_settings(), hosts=hosts, policy="all", relay=True).deploy(tmp_path, "/sites/demo")
+    )
+
+    assert [item.status for item in result.hosts] == ["error", "ok", "ok"]
+    assert result.hosts[0].failed_step == "precheck"
+    assert len([args for args in local_calls if args[0] == "rsync"]) == 1
+    assert len(relays) == 2
+    assert not result.ok and result.status == "partial"
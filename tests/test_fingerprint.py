@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+from sitehub.config import load_settings
+from sitehub.models.site_config import SiteConfig
+from sitehub.services.deploy_service import NginxEngine
+from sitehub.services.fingerprint_service import ASSET_MANIFEST_NAME, build_fingerprinted, fingerprint_name
+
+
+def test_build_fingerprinted_rewrites_html_and_css(tmp_path: Path) -> None:
+    source = tmp_path / "site"
+    (source / "css").mkdir(parents=True)
+    (source / "img").mkdir()
+    (source / "img" / "bg.png").write_bytes(b"png-bytes")
+    (source / "app.js").write_text("console.log(1)", encoding="utf-8")
+    (source / "css" / "main.css").write_text("body { background: url('../img/bg.png?v=1'); }", encoding="utf-8")
+    (source / "index.html").write_text(
+        '<link href="/css/main.css" rel="stylesheet"><script src="app.js"></script>'
+        '<a href="https://example.com/app.js">x</a><img src="#top">',
+        encoding="utf-8",
+    )
+    staging = tmp_path / "staging"
+
+    result = build_fingerprinted(source, staging)
+    png = fingerprint_name("img/bg.png", b"png-bytes")
+    css = result.manifest["css/main.css"]
+    assert result.manifest["img/bg.png"] == png
+    assert (staging / png).read_bytes() == b"png-bytes"
+    assert (staging / css).read_text(encoding="utf-8") == f"body {{ background: url('../{png}?v=1'); }}"
+    html = (staging / "index.html").read_text(encoding="utf-8")
+    assert f'href="/{css}"' in html
+    assert f'src="{result.manifest["app.js"]}"' in html
+    assert 'href="https://example.com/app.js"' in html
+    assert json.loads((staging / ASSET_MANIFEST_NAME).read_text(encoding="utf-8")) == result.manifest
+    assert (source / "index.html").read_text(encoding="utf-8").startswith('<link href="/css/main.css"')
+
+    (source / "img" / "bg.png").write_bytes(b"png-bytes-v2")
+    second = build_fingerprinted(source, staging)
+    assert not (staging / png).exists()
+    assert second.manifest["css/main.css"] != css
+    assert not (staging / css).exists()
+    assert second.manifest["css/main.css"] in (staging / "index.html").read_text(encoding="utf-8")
+
+
+def test_static_config_sets_immutable_cache_for_fingerprinted_assets() -> None:
+    engine = NginxEngine(load_settings())
+    text = engine.render_site(SiteConfig(name="demo", port=1, mode="static", fingerprint=True))
+    assert 'add_header Cache-Control "public, max-age=31536000, immutable";' in text
+    assert 'add_header Cache-Control "public, max-age=60, must-revalidate";' in text
+    assert '"\\.[0-9a-f]{10}\\.(?:css|js' in text
+    assert "immutable" not in engine.render_site(SiteConfig(name="demo", port=1, mode="static"))
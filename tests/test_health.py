@@ -0,0 +1,84 @@
+import asyncio
+import dataclasses
+import socket
+
+import httpx
+
+from sitehub.config import load_settings
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.services.health_service import HealthPoller
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def test_health_poller_batches_only_changed_statuses() -> None:
+    closed_port = _free_port()
+    records = [
+        AppRecord(id="rec_up", name="up", port=8081, path="up", status=AppStatus.stopped,
+                  sitehub_config={"health_path": "/healthz"}),
+        AppRecord(id="rec_same", name="same", port=8082, path="same", status=AppStatus.running,
+                  sitehub_config={"health_path": "/healthz"}),
+        AppRecord(id="rec_broken", name="broken", port=8083, path="broken", status=AppStatus.running,
+                  sitehub_config={"health_path": "/healthz"}),
+        AppRecord(id="rec_down", name="down", port=closed_port, path="down", status=AppStatus.running),
+        AppRecord(id="rec_deploying", name="deploying", port=8084, path="deploying",
+                  status=AppStatus.deploying),
+    ]
+
+    class DummyPocketBase:
+        def __init__(self) -> None:
+            self.updates: list[dict[str, AppStatus]] = []
+
+        async def list_apps(self) -> list[AppRecord]:
+            return records
+
+        async def update_app_statuses(self, statuses: dict[str, AppStatus], concurrency: int = 16) -> list[str]:
+            self.updates.append(dict(statuses))
+            return []
+
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host + str(request.url.port))
+        return httpx.Response(500 if request.url.port == 8083 else 200)
+
+    async def run() -> dict[str, AppStatus]:
+        settings = dataclasses.replace(load_settings(), env_host="127.0.0.1", health_poll_timeout_s=0.5)
+        pocketbase = DummyPocketBase()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            poller = HealthPoller(settings, pocketbase=pocketbase, client=client)  # type: ignore[arg-type]
+            changes = await poller.poll_once()
+        assert pocketbase.updates == [changes]
+        return changes
+
+    changes = asyncio.run(run())
+    assert changes == {
+        "rec_up": AppStatus.running,
+        "rec_broken": AppStatus.error,
+        "rec_down": AppStatus.stopped,
+    }
+    assert sorted(seen) == ["127.0.0.18081", "127.0.0.18082", "127.0.0.18083"]
+
+
+def test_health_poller_survives_unexpected_errors() -> None:
+    calls: list[int] = []
+
+    class BrokenPocketBase:
+        async def list_apps(self) -> list[AppRecord]:
+            calls.append(1)
+            raise ValueError("unexpected payload")
+
+    async def run() -> None:
+        settings = dataclasses.replace(load_settings(), health_poll_interval_s=0.01)
+        poller = HealthPoller(settings, pocketbase=BrokenPocketBase())  # type: ignore[arg-type]
+        poller.start()
+        await asyncio.sleep(0.1)
+        assert poller._task is not None and not poller._task.done()
+        await poller.stop()
+
+    asyncio.run(run())
+    assert len(calls) > 1
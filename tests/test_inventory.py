@@ -0,0 +1,74 @@
+import asyncio
+import dataclasses
+from pathlib import Path
+
+from sitehub.config import load_settings
+from sitehub.services.deploy_service import SyncEngine
+from sitehub.services.inventory_service import InventoryService, get_inventory, reset_inventories
+from sitehub.services.pipeline import DeployPipeline
+
+
+def test_inventory_sweep_indexes_sites_and_serves_cached_lookups(tmp_path: Path) -> None:
+    root = tmp_path / "sites"
+    (root / "alpha").mkdir(parents=True)
+    (root / "alpha" / "sitehub.yaml").write_text("name: alpha\nport: 8081\n", encoding="utf-8")
+    (root / "alpha" / "index.html").write_text("x" * 5000, encoding="utf-8")
+    (root / "beta").mkdir()
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"))
+    inventory = InventoryService(settings, str(root))
+    assert inventory.host == "local"
+
+    async def run() -> None:
+        entries = await inventory.sites()
+        assert [entry.name for entry in entries] == ["alpha", "beta"]
+        alpha = entries[0]
+        assert alpha.sitehub_yaml == "name: alpha\nport: 8081\n"
+        assert alpha.size_bytes >= 5000
+        assert alpha.mode and alpha.owner
+        assert entries[1].sitehub_yaml is None
+
+        (root / "gamma").mkdir()
+        assert not (await inventory.get("gamma")).present
+        assert (await inventory.get("gamma", max_age_s=0)).present
+
+        engine = SyncEngine(settings, inventory=inventory)
+        config, error = await engine.read_remote_sitehub_yaml(str(root / "alpha"))
+        assert error is None and config is not None and config["port"] == 8081
+        try:
+            await engine.ensure_remote_absent(str(root / "beta"))
+        except FileExistsError:
+            pass
+        else:
+            raise AssertionError("expected FileExistsError")
+
+    asyncio.run(run())
+    inventory.close()
+
+
+def test_deploy_paths_use_inventory_without_trusting_stale_absence(tmp_path: Path) -> None:
+    root = tmp_path / "sites"
+    (root / "alpha").mkdir(parents=True)
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"), app_root_dir=str(root))
+    assert DeployPipeline(settings).sync_engine.inventory is get_inventory(settings)
+    inventory = InventoryService(settings, str(root))
+    engine = SyncEngine(settings, inventory=inventory)
+
+    async def run() -> None:
+        await inventory.sites()
+        (root / "fresh").mkdir()
+        try:
+            await engine.ensure_remote_absent(str(root / "fresh"))
+        except FileExistsError:
+            pass
+        else:
+            raise AssertionError("absence check must not trust the cached sweep")
+
+        (root / "synced").mkdir()
+        (root / "synced" / "sitehub.yaml").write_text("name: synced\nport: 8082\n", encoding="utf-8")
+        inventory.invalidate("synced")
+        config, error = await engine.read_remote_sitehub_yaml(str(root / "synced"))
+        assert error is None and config is not None and config["port"] == 8082
+
+    asyncio.run(run())
+    inventory.close()
+    reset_inventories()
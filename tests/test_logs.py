@@ -0,0 +1,87 @@
+import json
+import os
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from sitehub.event_log import format_event
+from sitehub.log_index import LogIndex
+from sitehub.main import create_app
+
+
+def _write_log(path: Path) -> None:
+    lines = [
+        "2026-02-01T10:00:00+0000 [DEPLOY] action=deploy status=success release=1 site_root=/sites/demo-site",
+        format_event("NGINX", "action=apply status=failed dest=/conf.d/demo-site.conf", site="demo-site",
+                     created=1769940000.0),
+        format_event("NGINX", "action=apply status=success dest=/conf.d/other.conf", site="other",
+                     created=1769940060.0),
+        format_event("SSH", "command=true", created=1769940120.0),
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_log_index_filters_by_category_and_site(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    _write_log(log_path)
+    index = LogIndex(log_path)
+
+    nginx_demo = list(index.query(category="NGINX", site="demo-site"))
+    assert len(nginx_demo) == 1
+    assert json.loads(nginx_demo[0])["message"].startswith("action=apply status=failed")
+
+    legacy = list(index.query(site="demo-site", category="DEPLOY"))
+    assert len(legacy) == 1
+
+    with log_path.open("a", encoding="utf-8") as handle:
+        handle.write(format_event("NGINX", "action=reload status=failed", site="demo-site") + "\n")
+    assert index.refresh() == 1
+    assert len(list(index.query(category="NGINX", site="demo-site"))) == 2
+    assert list(index.query(category="NGINX", since=1769940030.0, until=1769940090.0))[0].startswith(b"{")
+    index.close()
+
+
+def test_logs_endpoint_streams_matching_lines(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    _write_log(log_path)
+
+    env = os.environ.copy()
+    env["SITEHUB_LOG_FILE"] = str(log_path)
+
+    old = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        app = create_app()
+    finally:
+        os.environ.clear()
+        os.environ.update(old)
+
+    with TestClient(app) as client:
+        resp = client.get("/logs", params={"category": "nginx", "site": "other"})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["site"] for line in lines] == ["other"]
+
+
+def test_log_index_covers_rotated_backups_and_merges_runs(tmp_path: Path) -> None:
+    log_path = tmp_path / "sitehub.log"
+    lines = [
+        format_event(category, "action=apply", site=site, created=1769940000.0 + index)
+        for index, (category, site) in enumerate([("NGINX", "demo"), ("SSH", None), ("NGINX", "demo")] * 20)
+    ]
+    log_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    index = LogIndex(log_path, tmp_path / "index.idx")
+    assert index.refresh() == 60
+    assert index._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 2
+
+    log_path.rename(tmp_path / "sitehub.log.20260201100000000000")
+    log_path.write_text(format_event("NGINX", "action=reload", site="demo", created=1769943700.0) + "\n",
+                        encoding="utf-8")
+    found = [json.loads(line)["message"] for line in index.query(category="NGINX", site="demo")]
+    assert found == ["action=apply"] * 40 + ["action=reload"]
+
+    (tmp_path / "sitehub.log.20260201100000000000").unlink()
+    assert len(list(index.query(category="NGINX", site="demo"))) == 1
+    assert index._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 1
+    index.close()
@@ -0,0 +1,81 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.models.site_config import SiteConfig
+from sitehub.nginx_templates import TemplateEngine, TemplateError, compile_template
+from sitehub.services.deploy_service import PROXY_PASS_PORT_RE, NginxEngine
+
+
+def test_builtin_templates_match_previous_output() -> None:
+    engine = NginxEngine(load_settings())
+    assert engine.render_config("demo", 8081) == (
+        "server {\n"
+        "  listen 80;\n"
+        "  server_name demo;\n"
+        "  location / {\n"
+        "    proxy_pass http://127.0.0.1:8081;\n"
+        "    proxy_set_header Host $host;\n"
+        "    proxy_set_header X-Real-IP $remote_addr;\n"
+        "    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
+        "  }\n"
+        "}\n"
+    )
+    assert "  root /usr/share/nginx/sites/demo;\n  index index.html;\n" in engine.render_config("demo", 1, "static")
+    external = engine.render_config("demo", 1, external_port=8410)
+    assert "  listen 8410;\n  server_name _;\n" in external
+    assert "index index.html index.htm;" in external
+
+
+def test_user_template_from_site_dir(tmp_path: Path) -> None:
+    (tmp_path / "nginx.conf.tmpl").write_text(
+        "server { listen {{ listen }}; location /api { proxy_pass {{upstream}}; set $x {}; } }\n", encoding="utf-8"
+    )
+    config = SiteConfig(name="demo", port=8082, nginx_template="nginx.conf.tmpl")
+    text = TemplateEngine().render_site(config, base_dir=tmp_path)
+    assert text == "server { listen 80; location /api { proxy_pass http://127.0.0.1:8082; set $x {}; } }\n"
+
+    with pytest.raises(TemplateError, match="nginx_template_not_found"):
+        TemplateEngine().render_site(config)
+    with pytest.raises(TemplateError, match="nginx_template_variable_missing"):
+        compile_template("listen {{ nope }};").render({})
+
+
+def test_render_all_fleet_under_a_second() -> None:
+    engine = TemplateEngine()
+    configs = [
+        SiteConfig.model_construct(
+            name=f"site-{i}", port=8000 + i % 100, mode="static" if i % 3 == 0 else "proxy",
+            external_port=8400 + i % 100 if i % 7 == 0 else None, nginx_template=None,
+        )
+        for i in range(10_000)
+    ]
+    start = time.perf_counter()
+    rendered = engine.render_all(configs)
+    elapsed = time.perf_counter() - start
+    assert len(rendered) == 10_000
+    assert "proxy_pass http://127.0.0.1:8001;" in rendered["site-1"]
+    assert elapsed < 1.0
+
+
+def test_performance_profile_renders_upstream_cache_and_gzip() -> None:
+    config = SiteConfig.model_validate(
+        {
+            "name": "demo-app",
+            "port": 8081,
+            "performance": {"keepalive": 32, "buffer_size": "16k", "cache_ttl_s": 60, "gzip": True},
+        }
+    )
+    text = NginxEngine(load_settings()).render_site(config)
+    assert text.startswith("upstream sitehub_demo_app {\n  server 127.0.0.1:8081;\n  keepalive 32;\n")
+    assert "keys_zone=sitehub_demo_app:10m max_size=1g" in text
+    assert "    proxy_pass http://sitehub_demo_app;\n" in text
+    assert '    proxy_set_header Connection "";\n' in text
+    assert "    proxy_cache_valid 200 301 302 60s;\n" in text
+    assert "  gzip on;\n" in text
+    assert {int(m.group(1)) for m in PROXY_PASS_PORT_RE.finditer(text)} == {8081}
+
+    with pytest.raises(ValueError, match="performance_size_invalid"):
+        SiteConfig.model_validate({"name": "x", "port": 1, "performance": {"buffer_size": "16 kb"}})
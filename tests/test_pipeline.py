@@ -0,0 +1,183 @@
+import asyncio
+import dataclasses
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.services import deploy_service
+from sitehub.services.deploy_service import SyncEngine
+from sitehub.services.pipeline import DeployPipeline, PipelineError, TaskGraph
+
+
+def test_task_graph_runs_independent_steps_concurrently() -> None:
+    def sleeper(value: str, delay: float) -> Any:
+        async def _step(results: dict[str, Any]) -> str:
+            await asyncio.sleep(delay)
+            return value
+
+        return _step
+
+    async def run() -> None:
+        graph = TaskGraph()
+        graph.add("a", sleeper("a", 0.2))
+        graph.add("b", sleeper("b", 0.2))
+        graph.add("c", sleeper("c", 0.0), ("a", "b"))
+        start = time.monotonic()
+        result = await graph.run()
+        assert time.monotonic() - start < 0.35
+        assert result.results == {"a": "a", "b": "b", "c": "c"}
+        assert result.timings_ms["c"][0] >= result.timings_ms["a"][1]
+
+    asyncio.run(run())
+
+
+def test_task_graph_rejects_cycles_and_cancels_on_failure() -> None:
+    graph = TaskGraph()
+
+    async def noop(results: dict[str, Any]) -> None:
+        return None
+
+    graph.add("a", noop, ("b",))
+    graph.add("b", noop, ("a",))
+    with pytest.raises(ValueError, match="cycle_detected"):
+        graph.order()
+
+    cancelled: list[str] = []
+
+    async def boom(results: dict[str, Any]) -> None:
+        raise RuntimeError("nope")
+
+    async def slow(results: dict[str, Any]) -> None:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    failing = TaskGraph()
+    failing.add("boom", boom)
+    failing.add("slow", slow)
+    with pytest.raises(PipelineError, match="step_failed: boom"):
+        asyncio.run(failing.run())
+    assert cancelled == ["slow"]
+
+
+def test_deploy_pipeline_overlaps_sync_with_nginx_prep(tmp_path: Path) -> None:
+    (tmp_path / "sitehub.yaml").write_text("name: demo\nport: 8081\n", encoding="utf-8")
+    events: list[str] = []
+
+    class FakeSync:
+        async def sync(self, local_path: Path, remote_path: str, allow_existing: bool = False) -> None:
+            events.append("sync:start")
+            await asyncio.sleep(0.2)
+            events.append("sync:end")
+
+    class FakeNginx:
+        def render_site(self, config: Any, external_port: int | None = None, base_dir: Path | None = None) -> str:
+            events.append("render")
+            return f"{config.name}:{config.port}"
+
+        def routes_enabled(self, config: Any) -> bool:
+            return False
+
+        async def test_config(self) -> None:
+            events.append("precheck")
+
+        async def publish_conf(self, config_text: str, app_name: str) -> None:
+            events.append(f"push:{config_text}")
+            events.append("reload")
+
+    pipeline = DeployPipeline(
+        load_settings(), sync_engine=FakeSync(), nginx_engine=FakeNginx()  # type: ignore[arg-type]
+    )
+    asyncio.run(pipeline.run(tmp_path, "/sites/demo"))
+
+    assert events.index("render") < events.index("sync:end")
+    assert events.index("precheck") < events.index("sync:end")
+    assert events[-2:] == ["push:demo:8081", "reload"]
+
+
+def test_precompress_never_writes_into_the_source_tree(tmp_path: Path) -> None:
+    source = tmp_path / "site"
+    source.mkdir()
+    (source / "sitehub.yaml").write_text("name: demo\nport: 8081\nmode: static\n", encoding="utf-8")
+    (source / "app.js").write_text("console.log('hello');\n" * 100, encoding="utf-8")
+    synced: list[Path] = []
+
+    class FakeSync:
+        async def sync(self, local_path: Path, remote_path: str, allow_existing: bool = False) -> None:
+            synced.append(local_path)
+
+    class FakeNginx:
+        def render_site(self, config: Any, external_port: int | None = None, base_dir: Path | None = None) -> str:
+            return config.name
+
+        def routes_enabled(self, config: Any) -> bool:
+            return False
+
+        async def test_config(self) -> None:
+            return None
+
+        async def publish_conf(self, config_text: str, app_name: str) -> None:
+            return None
+
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"))
+    pipeline = DeployPipeline(settings, sync_engine=FakeSync(), nginx_engine=FakeNginx())  # type: ignore[arg-type]
+    asyncio.run(pipeline.run(source, "/sites/demo"))
+
+    assert sorted(path.name for path in source.iterdir()) == ["app.js", "sitehub.yaml"]
+    assert synced == [tmp_path / "cache" / "builds" / "demo"]
+    assert (synced[0] / "app.js.gz").exists() and (synced[0] / "sitehub.yaml").exists()
+
+    (source / "app.js").unlink()
+    asyncio.run(pipeline.run(source, "/sites/demo"))
+    assert sorted(path.name for path in synced[1].iterdir()) == [".sitehub-precompress.json", "sitehub.yaml"]
+
+
+def test_redeploy_updates_an_existing_remote_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "sitehub.yaml").write_text("name: demo\nport: 8081\n", encoding="utf-8")
+    remote_files = {"/sites/demo": "dir"}
+    commands: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        commands.append(command)
+        if command.startswith("test -e /sites/demo &&"):
+            if "echo exists" in command:
+                return 0, "exists\n", ""
+            return 0, "file\n" if remote_files["/sites/demo"] == "file" else "", ""
+        return 0, "", ""
+
+    async def fake_local(args: list[str], timeout_s: float) -> tuple[int, str, str]:
+        commands.append(" ".join(args[:1]))
+        return 0, "", ""
+
+    class FakeNginx:
+        def render_site(self, config: Any, external_port: int | None = None, base_dir: Path | None = None) -> str:
+            return config.name
+
+        def routes_enabled(self, config: Any) -> bool:
+            return False
+
+        async def test_config(self) -> None:
+            return None
+
+        async def publish_conf(self, config_text: str, app_name: str) -> None:
+            commands.append("publish")
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(deploy_service, "_run_local_command", fake_local)
+    settings = dataclasses.replace(load_settings(), env_host="example.test", cache_dir=str(tmp_path / "cache"))
+    engine = SyncEngine(settings)
+    pipeline = DeployPipeline(settings, sync_engine=engine, nginx_engine=FakeNginx())  # type: ignore[arg-type]
+
+    asyncio.run(pipeline.run(tmp_path, "/sites/demo"))
+    assert commands[-2:] == ["rsync", "publish"]
+    with pytest.raises(FileExistsError, match="remote_path_exists"):
+        asyncio.run(engine.sync(tmp_path, "/sites/demo"))
+
+    remote_files["/sites/demo"] = "file"
+    with pytest.raises(PipelineError, match="remote_path_not_directory"):
+        asyncio.run(pipeline.run(tmp_path, "/sites/demo"))
@@ -0,0 +1,50 @@
+import gzip
+import os
+from pathlib import Path
+
+from sitehub.config import load_settings
+from sitehub.services.deploy_service import NginxEngine
+from sitehub.services.precompress_service import MANIFEST_NAME, SERIAL_THRESHOLD, precompress_tree
+
+
+def test_precompress_writes_gz_siblings_and_skips_fresh(tmp_path: Path) -> None:
+    body = ("body { color: red; }\n" * 200).encode()
+    (tmp_path / "assets").mkdir()
+    for i in range(SERIAL_THRESHOLD + 4):
+        (tmp_path / "assets" / f"app{i}.css").write_bytes(body)
+    (tmp_path / "small.js").write_text("x=1", encoding="utf-8")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" * 1000)
+
+    first = precompress_tree(tmp_path, workers=2)
+    assert first.compressed == SERIAL_THRESHOLD + 4
+    sibling = tmp_path / "assets" / "app0.css.gz"
+    assert gzip.decompress(sibling.read_bytes()) == body
+    assert sibling.stat().st_mtime_ns == (tmp_path / "assets" / "app0.css").stat().st_mtime_ns
+    assert not (tmp_path / "small.js.gz").exists()
+    assert not (tmp_path / "logo.png.gz").exists()
+    assert (tmp_path / MANIFEST_NAME).exists()
+
+    second = precompress_tree(tmp_path, workers=1)
+    assert (second.compressed, second.skipped) == (0, SERIAL_THRESHOLD + 4)
+
+    source = tmp_path / "assets" / "app1.css"
+    os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+    touched = precompress_tree(tmp_path, workers=1)
+    assert touched.compressed == 0
+    assert (tmp_path / "assets" / "app1.css.gz").stat().st_mtime_ns == source.stat().st_mtime_ns
+
+    source.write_bytes(body + b"/* changed */\n" * 100)
+    changed = precompress_tree(tmp_path, workers=1)
+    assert changed.compressed == 1
+    assert gzip.decompress((tmp_path / "assets" / "app1.css.gz").read_bytes()).endswith(b"/* changed */\n")
+
+    source.unlink()
+    precompress_tree(tmp_path, workers=1)
+    assert not (tmp_path / "assets" / "app1.css.gz").exists()
+
+
+def test_static_templates_enable_gzip_static() -> None:
+    engine = NginxEngine(load_settings())
+    assert "  gzip_static on;\n" in engine.render_config("demo", 1, "static")
+    assert "  gzip_static on;\n" in engine.render_config("demo", 1, external_port=8410)
+    assert "gzip_static" not in engine.render_config("demo", 8081)
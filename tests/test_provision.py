@@ -0,0 +1,109 @@
+import asyncio
+import dataclasses
+import os
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from sitehub.config import load_settings
+from sitehub.coordination import get_coordinator
+from sitehub.main import create_app
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.pocketbase import get_pocketbase_client
+from sitehub.services.provision_service import (
+    PortBitmap,
+    PortUnavailableError,
+    ProvisionService,
+    parse_proc_net_listening,
+)
+
+PROC_NET_TCP = (
+    "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+    "   0: 00000000:1F91 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 1 1\n"
+    "   1: 0100007F:1F92 0100007F:9C40 01 00000000:00000000 00:00000000 00000000  1000        0 2 1\n"
+)
+
+
+def test_parse_proc_net_listening_only_returns_listen_sockets() -> None:
+    assert parse_proc_net_listening(PROC_NET_TCP) == {8081}
+
+
+def test_port_bitmap_first_free() -> None:
+    bitmap = PortBitmap.from_ports(8081, 8090, {8081, 8082, 8084, 9000})
+    assert bitmap.first_free() == 8083
+    assert not bitmap.is_free(8084)
+    assert PortBitmap.from_ports(8081, 8082, {8081, 8082}).first_free() is None
+
+
+def test_sites_provision_skips_registry_ports(tmp_path: Path) -> None:
+    class DummyPocketBase:
+        async def list_apps(self) -> list[AppRecord]:
+            return [
+                AppRecord(id=f"rec_{port}", name=f"app-{port}", port=port, path=f"apps/{port}",
+                          status=AppStatus.stopped)
+                for port in (8081, 8082)
+            ]
+
+    env = os.environ.copy()
+    env["APP_ROOT_DIR"] = str(tmp_path)
+
+    old = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        app = create_app()
+    finally:
+        os.environ.clear()
+        os.environ.update(old)
+
+    app.dependency_overrides[get_pocketbase_client] = lambda: DummyPocketBase()
+    with TestClient(app) as client:
+        resp = client.post("/sites/provision", json={"name": "demo-site"})
+        conflict = client.post("/sites/provision", json={"name": "other-site", "port": 8082})
+        again = client.post("/sites/provision", json={"name": "demo-site"})
+
+    assert resp.status_code == 201
+    port = resp.json()["port"]
+    assert port not in (8081, 8082)
+    assert (tmp_path / "demo-site" / "sitehub.env").read_text(encoding="utf-8") == (
+        f"SITE_NAME=demo-site\nPORT={port}\n"
+    )
+    assert conflict.status_code == 409
+    assert again.json()["port"] == port
+    assert again.json()["changed"] is False
+
+
+def test_failed_port_lease_aborts_before_writing_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"))
+    sites = tmp_path / "sites"
+    sites.mkdir()
+    service = ProvisionService(settings, sites_base=str(sites))
+    monkeypatch.setattr(get_coordinator(settings), "lease_port", lambda name, port: False)
+
+    with pytest.raises(PortUnavailableError, match="port_leased: 8081"):
+        asyncio.run(service.provision("demo-site", 8081))
+    assert not (sites / "demo-site" / "sitehub.env").exists()
+
+
+def test_provision_rejects_names_that_escape_sites_base(tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"))
+    sites = tmp_path / "sites"
+    sites.mkdir()
+    service = ProvisionService(settings, sites_base=str(sites))
+
+    with pytest.raises(ValueError, match="site_name_invalid"):
+        asyncio.run(service.provision("../escaped", 8081))
+    assert not (tmp_path / "escaped").exists()
+
+
+def test_failed_env_write_releases_the_port_lease(tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path / "cache"))
+    sites = tmp_path / "sites"
+    sites.mkdir()
+    (sites / "demo-site").write_text("not a directory", encoding="utf-8")
+    service = ProvisionService(settings, sites_base=str(sites))
+
+    with pytest.raises(OSError):
+        asyncio.run(service.provision("demo-site", 8081))
+    assert 8081 not in get_coordinator(settings).leased_ports()
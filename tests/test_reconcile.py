@@ -0,0 +1,72 @@
+import asyncio
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.services import deploy_service, inventory_service
+from sitehub.services.deploy_service import CONF_BULK_MARKER, NginxEngine
+from sitehub.services.inventory_service import DU_MARKER, STAT_MARKER, InventoryService
+from sitehub.services.reconcile_service import Reconciler
+
+
+class DummyPocketBase:
+    async def list_apps(self) -> list[AppRecord]:
+        return [
+            AppRecord(id="rec_a", name="alpha", port=8081, path="alpha", status=AppStatus.running),
+            AppRecord(id="rec_b", name="beta", port=8082, path="beta", status=AppStatus.running),
+            AppRecord(id="rec_c", name="gamma", port=8083, path="gamma", status=AppStatus.running),
+        ]
+
+
+def test_reconciler_plans_and_applies_deltas_in_one_batch(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path))
+    engine = NginxEngine(settings, remote_conf_dir="/conf.d")
+    ssh_calls: list[str] = []
+    scripts: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        ssh_calls.append(command)
+        if STAT_MARKER in command:
+            return 0, f"{STAT_MARKER}\nalpha\t1.0\tapp\t755\nbeta\t1.0\tapp\t755\n{DU_MARKER}\n", ""
+        return 0, (
+            f"{CONF_BULK_MARKER}/conf.d/alpha.conf\n{engine.render_config('alpha', 8081)}\n"
+            f"{CONF_BULK_MARKER}/conf.d/beta.conf\n{engine.render_config('beta', 8099)}\n"
+            f"{CONF_BULK_MARKER}/conf.d/stale.conf\n# generated by sitehub: stale\nserver {{ listen 80; }}\n\n"
+            f"{CONF_BULK_MARKER}/conf.d/default.conf\nserver {{ listen 80 default_server; }}\n\n"
+        ), ""
+
+    async def fake_stdin(command: str, content: str) -> tuple[int, str, str]:
+        scripts.append(content)
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(inventory_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(engine, "_run_ssh_with_stdin", fake_stdin)
+    inventory = InventoryService(settings, "/sites")
+    reconciler = Reconciler(settings, DummyPocketBase(), nginx=engine, inventory=inventory)  # type: ignore[arg-type]
+
+    plan = asyncio.run(reconciler.reconcile(dry_run=True))
+    assert sorted((action.kind, action.name) for action in plan.actions) == [
+        ("foreign_conf", "default"),
+        ("missing_conf", "gamma"),
+        ("missing_site_dir", "gamma"),
+        ("orphaned_conf", "stale"),
+        ("port_drift", "beta"),
+    ]
+    assert not plan.applied and not scripts
+    assert len(ssh_calls) == 2
+
+    result = asyncio.run(reconciler.reconcile(dry_run=False, prune=True))
+    assert result.applied
+    assert result.written == ["beta", "gamma"]
+    assert result.removed == ["stale"]
+    assert len(ssh_calls) == 3
+    assert len(scripts) == 1
+    assert "proxy_pass http://127.0.0.1:8082;" in scripts[0]
+    assert "rm -f stale.conf" in scripts[0]
+    assert "default.conf" not in scripts[0]
+    assert "# generated by sitehub: gamma\n" in scripts[0]
+    assert scripts[0].count("nginx -s reload") == 1
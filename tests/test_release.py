@@ -0,0 +1,75 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from sitehub.services.release_service import RELEASE_META, ReleaseManager
+
+
+def test_release_manager_links_unchanged_files(tmp_path: Path) -> None:
+    source = tmp_path / "source"
+    (source / "pkg").mkdir(parents=True)
+    (source / "pkg" / "app.py").write_text("print('v1')\n", encoding="utf-8")
+    (source / "static.txt").write_text("static\n", encoding="utf-8")
+    (source / ".git").mkdir()
+    (source / ".git" / "HEAD").write_text("ref\n", encoding="utf-8")
+    site_root = tmp_path / "site"
+    site_root.mkdir()
+    manager = ReleaseManager(site_root)
+
+    first = manager.deploy(source)
+    (source / "pkg" / "app.py").write_text("print('v2')\n", encoding="utf-8")
+    second = manager.deploy(source)
+    manager.wait_for_prune()
+
+    assert first.meta is not None and second.meta is not None
+    assert first.meta["copied"] == 2
+    assert second.meta["linked"] == 1
+    assert second.meta["copied"] == 1
+    assert second.meta["source_hash"] != first.meta["source_hash"]
+    second_dir = Path(second.path)
+    assert (second_dir / "static.txt").stat().st_ino == (Path(first.path) / "static.txt").stat().st_ino
+    assert not (second_dir / ".git").exists()
+    assert json.loads((second_dir / RELEASE_META).read_text(encoding="utf-8"))["file_count"] == 2
+    assert os.readlink(site_root / "current") == str(second_dir)
+
+    manager.rollback(first.release_id)
+    assert manager.current_release() == first.release_id
+
+
+def test_release_manager_prune_keeps_current(tmp_path: Path) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "index.html").write_text("ok\n", encoding="utf-8")
+    site_root = tmp_path / "site"
+    site_root.mkdir()
+    manager = ReleaseManager(site_root)
+    releases = [manager.deploy(source, keep=10).release_id for _ in range(3)]
+
+    manager.rollback(releases[0])
+    assert manager.prune(keep=1) == releases[1:]
+    assert [item.release_id for item in manager.list()] == [releases[0]]
+
+
+def test_current_release_follows_relative_links_and_rollback_rejects_paths(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "index.html").write_text("ok\n", encoding="utf-8")
+    site_root = tmp_path / "site"
+    site_root.mkdir()
+    manager = ReleaseManager(site_root)
+    release_id = manager.deploy(source).release_id
+
+    (site_root / "current").unlink()
+    os.symlink(f"releases/{release_id}", site_root / "current")
+    monkeypatch.chdir(tmp_path)
+    assert manager.current_release() == release_id
+
+    (site_root / "releases" / "escape").mkdir()
+    for bad in ("../site/releases/escape", "escape", f"{release_id}/..", f"{release_id}\n"):
+        with pytest.raises(ValueError, match="release_id_invalid"):
+            manager.rollback(bad)
+    assert manager.current_release() == release_id
@@ -0,0 +1,137 @@
+import asyncio
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.models.site_config import SiteConfig
+from sitehub.nginx_templates import ROUTES_CONF_NAME, parse_routes, render_routes, routable
+from sitehub.services import deploy_service, inventory_service
+from sitehub.services.deploy_service import CONF_BULK_MARKER, PROXY_PASS_PORT_RE, NginxEngine
+from sitehub.services.inventory_service import DU_MARKER, STAT_MARKER, InventoryService
+from sitehub.services.reconcile_service import Reconciler
+
+
+def test_routes_file_round_trips_and_exposes_ports() -> None:
+    text = render_routes({"beta": 8082, "alpha-app": 8081})
+    assert parse_routes(text) == {"alpha-app": 8081, "beta": 8082}
+    assert "  alpha-app sitehub_alpha_app;\n  beta sitehub_beta;\n" in text
+    assert "upstream sitehub_beta {\n  server 127.0.0.1:8082;\n  keepalive 16;\n}\n" in text
+    assert "    proxy_pass http://$sitehub_upstream;\n" in text
+    assert {int(m.group(1)) for m in PROXY_PASS_PORT_RE.finditer(text)} == {8081, 8082}
+    assert parse_routes(render_routes({})) == {}
+
+    assert routable(SiteConfig(name="a", port=1))
+    assert not routable(SiteConfig(name="a", port=1, mode="static"))
+    assert not routable(SiteConfig(name="a", port=1, external_port=8410))
+    assert not routable(SiteConfig.model_validate({"name": "a", "port": 1, "performance": {"gzip": True}}))
+
+
+def test_publish_route_updates_only_the_routes_file(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = dataclasses.replace(load_settings(), nginx_routing="map")
+    engine = NginxEngine(settings, remote_conf_dir="/conf.d")
+    scripts: list[str] = []
+    confs = {
+        f"/conf.d/{ROUTES_CONF_NAME}.conf": render_routes({"alpha": 8081}),
+        "/conf.d/beta.conf": engine.render_config("beta", 8082),
+    }
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        return 0, "".join(f"{CONF_BULK_MARKER}{path}\n{text}\n" for path, text in confs.items()), ""
+
+    async def fake_stdin(command: str, content: str) -> tuple[int, str, str]:
+        scripts.append(content)
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(engine, "_run_ssh_with_stdin", fake_stdin)
+
+    assert engine.routes_enabled(SiteConfig(name="beta", port=8082))
+    assert asyncio.run(engine.publish_route(SiteConfig(name="beta", port=8083)))
+    assert len(scripts) == 1
+    assert f"cat > {ROUTES_CONF_NAME}.conf" in scripts[0]
+    assert "# route alpha 8081\n" in scripts[0] and "# route beta 8083\n" in scripts[0]
+    assert "rm -f beta.conf" in scripts[0]
+
+    assert not asyncio.run(engine.publish_route(SiteConfig(name="alpha", port=8081)))
+    assert len(scripts) == 1
+
+    with pytest.raises(ValueError, match="nginx_routing_invalid"):
+        NginxEngine(dataclasses.replace(settings, nginx_routing="maps")).routes_enabled(SiteConfig(name="a", port=1))
+
+
+def test_publish_conf_withdraws_the_route_in_the_same_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = dataclasses.replace(load_settings(), nginx_routing="map")
+    engine = NginxEngine(settings, remote_conf_dir="/conf.d")
+    scripts: list[str] = []
+    routes = {"alpha": 8081, "beta": 8082}
+    commands: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        commands.append(command)
+        return 0, render_routes(routes), ""
+
+    async def fake_stdin(command: str, content: str) -> tuple[int, str, str]:
+        scripts.append(content)
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(engine, "_run_ssh_with_stdin", fake_stdin)
+
+    config = SiteConfig.model_validate({"name": "beta", "port": 8082, "performance": {"gzip": True}})
+    assert not engine.routes_enabled(config)
+    asyncio.run(engine.publish_conf(engine.render_site(config), "beta"))
+    assert len(scripts) == 1
+    assert "cat > beta.conf" in scripts[0] and f"cat > {ROUTES_CONF_NAME}.conf" in scripts[0]
+    assert "# route alpha 8081\n" in scripts[0] and "# route beta" not in scripts[0]
+    assert scripts[0].index("nginx -t") > scripts[0].index(f"cat > {ROUTES_CONF_NAME}.conf")
+    assert commands == [f"if [ -f /conf.d/{ROUTES_CONF_NAME}.conf ]; then cat /conf.d/{ROUTES_CONF_NAME}.conf; fi"]
+
+    routes.pop("beta")
+    asyncio.run(engine.publish_conf(engine.render_site(config), "beta"))
+    assert "cat > beta.conf" in scripts[1] and ROUTES_CONF_NAME not in scripts[1]
+
+
+class DummyPocketBase:
+    async def list_apps(self) -> list[AppRecord]:
+        return [
+            AppRecord(id="rec_a", name="alpha", port=8081, path="alpha", status=AppStatus.running),
+            AppRecord(
+                id="rec_b", name="beta", port=8082, path="beta", status=AppStatus.running,
+                sitehub_config={"mode": "static"},
+            ),
+        ]
+
+
+def test_reconciler_moves_proxy_apps_into_the_route_map(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path), nginx_routing="map")
+    engine = NginxEngine(settings, remote_conf_dir="/conf.d")
+    scripts: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        if STAT_MARKER in command:
+            return 0, f"{STAT_MARKER}\nalpha\t1.0\tapp\t755\nbeta\t1.0\tapp\t755\n{DU_MARKER}\n", ""
+        return 0, f"{CONF_BULK_MARKER}/conf.d/alpha.conf\n{engine.render_config('alpha', 8081)}\n", ""
+
+    async def fake_stdin(command: str, content: str) -> tuple[int, str, str]:
+        scripts.append(content)
+        return 0, "", ""
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(inventory_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(engine, "_run_ssh_with_stdin", fake_stdin)
+    inventory = InventoryService(settings, "/sites")
+    reconciler = Reconciler(settings, DummyPocketBase(), nginx=engine, inventory=inventory)  # type: ignore[arg-type]
+
+    result = asyncio.run(reconciler.reconcile(dry_run=False))
+    assert sorted((action.kind, action.name) for action in result.actions) == [
+        ("missing_conf", "beta"),
+        ("route_drift", ROUTES_CONF_NAME),
+        ("superseded_conf", "alpha"),
+    ]
+    assert result.written == ["beta", ROUTES_CONF_NAME]
+    assert result.removed == ["alpha"]
+    assert "# route alpha 8081\n" in scripts[0]
+    assert "rm -f alpha.conf" in scripts[0]
@@ -66,7 +66,7 @@ def test_provision_site_allocates_port_and_writes_env(tmp_path: Path) -> None:
     env_text = env_file.read_text(encoding="utf-8")
     port_line = [line for line in env_text.splitlines() if line.startswith("PORT=")][0]
     port = int(port_line.split("=", 1)[1])
-    assert 8085 <= port <= 8095
+    assert 8081 <= port <= 8090
 
     proc2 = run_script(
         [
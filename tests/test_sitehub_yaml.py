@@ -0,0 +1,100 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from sitehub import sitehub_yaml
+from sitehub.config import load_settings
+from sitehub.services.deploy_service import NginxEngine
+from sitehub.sitehub_yaml import (
+    BATCH_SERIAL_THRESHOLD,
+    SitehubYamlCache,
+    load_sitehub_config,
+    load_sitehub_configs,
+    parse_remote_sitehub_yaml,
+    sitehub_yaml_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache() -> None:
+    sitehub_yaml_cache().clear()
+
+
+def test_local_config_cached_until_file_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "sitehub.yaml"
+    path.write_text("name: demo\nport: 8081\n", encoding="utf-8")
+    parsed: list[str] = []
+    parse = sitehub_yaml.parse_sitehub_yaml_text
+
+    def counting_parse(text: str) -> object:
+        parsed.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(sitehub_yaml, "parse_sitehub_yaml_text", counting_parse)
+    first = load_sitehub_config(path)
+    assert first is not None and first.port == 8081
+    cached = load_sitehub_config(path)
+    assert cached == first and cached is not first
+    assert len(parsed) == 1
+    first.port = 9999
+    assert cached.port == 8081 and load_sitehub_config(path).port == 8081  # type: ignore[union-attr]
+
+    path.write_text("name: demo\nport: 8082\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = load_sitehub_config(path)
+    assert second is not None and second.port == 8082
+    assert len(parsed) == 2
+
+    text = "name: remote\nport: 9000\n"
+    assert parse_remote_sitehub_yaml("host:/sites/remote/sitehub.yaml", text) == parse_remote_sitehub_yaml(
+        "host:/sites/remote/sitehub.yaml", text
+    )
+    assert len(parsed) == 3
+
+    (tmp_path / "empty.yaml").write_text("", encoding="utf-8")
+    assert load_sitehub_config(tmp_path / "empty.yaml") is None
+    (tmp_path / "list.yaml").write_text("- a\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="YAML mapping"):
+        load_sitehub_config(tmp_path / "list.yaml")
+
+    engine = NginxEngine(load_settings())
+    (tmp_path / "bad.yaml").write_text("name: demo\nport: nope\n", encoding="utf-8")
+    for name in ("empty.yaml", "list.yaml", "bad.yaml"):
+        with pytest.raises(ValueError) as exc_info:
+            engine.parse_sitehub_yaml(tmp_path / name)
+        assert str(exc_info.value) == "sitehub_yaml_invalid"
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = SitehubYamlCache(max_entries=2)
+    cache.put("a", None)
+    cache.put("b", None)
+    assert cache.get("a") == (True, None)
+    cache.put("c", None)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a")[0] and cache.get("c")[0]
+
+
+def test_batch_validates_in_process_pool(tmp_path: Path) -> None:
+    paths = []
+    for i in range(BATCH_SERIAL_THRESHOLD + 4):
+        path = tmp_path / f"site-{i}.yaml"
+        path.write_text(f"name: site-{i}\nport: {8000 + i}\n", encoding="utf-8")
+        paths.append(path)
+    broken = tmp_path / "broken.yaml"
+    broken.write_text("name: broken\nport: nope\n", encoding="utf-8")
+    missing = tmp_path / "missing.yaml"
+
+    configs, errors = load_sitehub_configs([*paths, broken, missing], workers=2)
+    assert sorted(config.port for config in configs.values() if config is not None) == [
+        8000 + i for i in range(BATCH_SERIAL_THRESHOLD + 4)
+    ]
+    assert set(errors) == {broken, missing}
+
+    cache = sitehub_yaml_cache()
+    hits = cache.hits
+    again, _ = load_sitehub_configs(paths, workers=2)
+    assert cache.hits == hits + len(paths)
+    assert again[paths[0]] == configs[paths[0]]
@@ -0,0 +1,254 @@
+import asyncio
+import dataclasses
+import time
+from typing import Any, Iterator
+
+import pytest
+
+from sitehub import ssh
+from sitehub.config import load_settings
+from sitehub.metrics import REGISTRY
+from sitehub.ssh import SSHMaster, run_ssh, ssh_base_args
+
+
+class _FakeProc:
+    def __init__(self, rc: int, stdout: bytes = b"") -> None:
+        self.returncode = rc
+        self.stdout = stdout
+
+    async def communicate(self, payload: bytes | None = None) -> tuple[bytes, bytes]:
+        return self.stdout, b""
+
+    async def wait(self) -> int:
+        return self.returncode
+
+
+@pytest.fixture(autouse=True)
+def _reset_breakers() -> Iterator[None]:
+    ssh._breakers.clear()
+    yield
+    ssh._breakers.clear()
+
+
+def test_base_args_cached_per_settings() -> None:
+    settings = load_settings()
+    args = ssh_base_args(settings)
+    assert args is ssh_base_args(dataclasses.replace(settings))
+    assert "LogLevel=ERROR" in args
+    assert "ControlMaster=auto" in args
+    other = ssh_base_args(dataclasses.replace(settings, ssh_port=2222))
+    assert other is not args
+    assert other[-2:] == ("-p", "2222")
+
+
+def test_run_ssh_caps_concurrent_sessions(monkeypatch: Any) -> None:
+    settings = dataclasses.replace(load_settings(), ssh_max_sessions=2)
+    active = 0
+    peak = 0
+
+    class _SlowProc(_FakeProc):
+        async def communicate(self, payload: bytes | None = None) -> tuple[bytes, bytes]:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return payload or b"", b""
+
+    async def fake_exec(*args: str, **kwargs: Any) -> _SlowProc:
+        return _SlowProc(0)
+
+    monkeypatch.setattr(ssh.asyncio, "create_subprocess_exec", fake_exec)
+
+    async def run() -> list[ssh.SSHResult]:
+        return await asyncio.gather(*(run_ssh(settings, "true", 1.0, stdin=str(i)) for i in range(6)))
+
+    results = asyncio.run(run())
+    assert peak == 2
+    assert [item.stdout for item in results] == [str(i) for i in range(6)]
+
+
+def test_master_reopens_when_check_fails(monkeypatch: Any) -> None:
+    calls: list[tuple[str, ...]] = []
+
+    async def fake_exec(*args: str, **kwargs: Any) -> _FakeProc:
+        calls.append(args)
+        return _FakeProc(255 if "check" in args else 0)
+
+    monkeypatch.setattr(ssh.asyncio, "create_subprocess_exec", fake_exec)
+    master = SSHMaster(load_settings())
+    assert asyncio.run(master.ensure()) is True
+    assert "-O" in calls[0] and "check" in calls[0]
+    assert "ControlMaster=yes" in calls[1] and "-N" in calls[1]
+    assert master.status()["reopen_count"] == 1
+
+
+def test_breaker_fails_fast_and_probes_after_reset(monkeypatch: Any) -> None:
+    settings = dataclasses.replace(
+        load_settings(), env_host="10.9.9.9", ssh_breaker_threshold=2, ssh_breaker_reset_s=60.0
+    )
+    calls: list[tuple[str, ...]] = []
+    rc = 255
+
+    async def fake_exec(*args: str, **kwargs: Any) -> _FakeProc:
+        calls.append(args)
+        return _FakeProc(rc)
+
+    monkeypatch.setattr(ssh.asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setattr(ssh, "SSH_RETRY_BACKOFF_S", 0.0)
+    result = asyncio.run(run_ssh(settings, "true", 1.0))
+    assert result.returncode == 255 and len(calls) == 2
+    breaker = ssh.circuit_breaker(settings)
+    assert breaker.state == "open"
+
+    result = asyncio.run(run_ssh(settings, "true", 1.0))
+    assert result.stderr == ssh.HOST_UNAVAILABLE and len(calls) == 2
+    assert f'sitehub_ssh_breaker_state{{host="{breaker.host}"}} 2' in REGISTRY.render()
+
+    breaker.opened_at = time.monotonic() - 61.0
+    rc = 0
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.release()
+    assert asyncio.run(run_ssh(settings, "true", 1.0)).returncode == 0
+    assert breaker.state == "closed"
+
+
+def test_cancelled_commands_kill_their_child(monkeypatch: Any) -> None:
+    from sitehub.services.deploy_service import _run_local_command
+
+    settings = load_settings()
+    procs: list[Any] = []
+
+    class _HangingProc(_FakeProc):
+        killed = False
+
+        async def communicate(self, payload: bytes | None = None) -> tuple[bytes, bytes]:
+            await asyncio.sleep(30)
+            return b"", b""
+
+        def kill(self) -> None:
+            self.killed = True
+            self.returncode = -9
+
+    async def fake_exec(*args: str, **kwargs: Any) -> _HangingProc:
+        procs.append(_HangingProc(None))  # type: ignore[arg-type]
+        return procs[-1]
+
+    async def cancel_soon(coro: Any) -> None:
+        task = asyncio.create_task(coro)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    real_exec = asyncio.create_subprocess_exec
+
+    async def recording_exec(*args: Any, **kwargs: Any) -> asyncio.subprocess.Process:
+        procs.append(await real_exec(*args, **kwargs))
+        return procs[-1]
+
+    async def run() -> None:
+        with monkeypatch.context() as patched:
+            patched.setattr(ssh.asyncio, "create_subprocess_exec", recording_exec)
+            await cancel_soon(_run_local_command(["sleep", "30"], 60.0))
+        with monkeypatch.context() as patched:
+            patched.setattr(ssh.asyncio, "create_subprocess_exec", fake_exec)
+            await cancel_soon(run_ssh(settings, "sleep 30", None))
+
+    asyncio.run(run())
+    assert procs[0].returncode is not None
+    assert procs[1].killed
+
+
+def test_session_semaphores_are_dropped_once_their_loop_closes() -> None:
+    settings = load_settings()
+
+    async def run() -> None:
+        semaphore = ssh.session_semaphore(settings)
+        assert ssh.session_semaphore(settings) is semaphore
+        assert list(ssh._semaphores) == [asyncio.get_running_loop()]
+
+    for _ in range(3):
+        asyncio.run(run())
+
+
+def test_hanging_ssh_timeouts_open_the_breaker(monkeypatch: Any) -> None:
+    settings = dataclasses.replace(load_settings(), ssh_breaker_threshold=2)
+    spawned: list[int] = []
+
+    class _HangingSSH(_FakeProc):
+        async def communicate(self, payload: bytes | None = None) -> tuple[bytes, bytes]:
+            await asyncio.sleep(30)
+            return b"", b""
+
+        def kill(self) -> None:
+            self.returncode = 255
+
+    async def fake_exec(*args: str, **kwargs: Any) -> _HangingSSH:
+        spawned.append(1)
+        return _HangingSSH(None)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(ssh.asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setattr(ssh, "SSH_RETRY_BACKOFF_S", 0.0)
+
+    first = asyncio.run(run_ssh(settings, "true", 0.05))
+    assert (first.returncode, first.stderr) == (ssh.SSH_TIMEOUT_RC, "ssh_timeout")
+    snapshot = ssh.circuit_breaker(settings).snapshot()
+    assert snapshot["state"] == "open" and snapshot["failures"] == 2
+
+    rejected = asyncio.run(run_ssh(settings, "true", 0.05))
+    assert rejected.stderr == ssh.HOST_UNAVAILABLE and len(spawned) == 2
+
+
+def test_transfers_share_the_session_cap_and_breaker(monkeypatch: Any, tmp_path: Any) -> None:
+    from sitehub.services import deploy_service
+
+    settings = dataclasses.replace(
+        load_settings(), env_host="example.test", ssh_max_sessions=1, ssh_breaker_threshold=2
+    )
+    active = 0
+    peak = 0
+    spawned: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        return 0, "", ""
+
+    async def fake_local(args: list[str], timeout_s: float) -> tuple[int, str, str]:
+        nonlocal active, peak
+        spawned.append(args[0])
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return 255, "", "ssh: connect to host example.test port 22: Connection refused"
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+    monkeypatch.setattr(deploy_service, "_run_local_command", fake_local)
+    engine = deploy_service.SyncEngine(settings)
+
+    async def run() -> list[Any]:
+        return await asyncio.gather(
+            *(engine.sync(tmp_path, f"/sites/demo-{i}") for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert peak == 1 and spawned == ["rsync", "rsync"]
+    assert all(isinstance(item, RuntimeError) for item in results)
+    assert str(results[-1]) == f"rsync_failed: {ssh.HOST_UNAVAILABLE}"
+    assert ssh.circuit_breaker(settings).snapshot()["state"] == "open"
+
+
+def test_nginx_apply_runs_with_a_finite_timeout(monkeypatch: Any) -> None:
+    from sitehub.services import deploy_service
+
+    timeouts: list[float | None] = []
+
+    async def fake_run_ssh(settings: object, command: str, timeout_s: float | None, **kwargs: Any) -> ssh.SSHResult:
+        timeouts.append(timeout_s)
+        return ssh.SSHResult(0, "", "", 0.0)
+
+    monkeypatch.setattr(deploy_service, "run_ssh", fake_run_ssh)
+    engine = deploy_service.NginxEngine(load_settings())
+    asyncio.run(engine.apply_configs({"demo": "server { listen 8081; }"}, []))
+    assert timeouts and all(item is not None and item > 0 for item in timeouts)
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+PROBE = """
+import sys
+import sitehub.main as main
+assert "app" not in vars(main)
+main.app
+loaded = [
+    name
+    for name in (
+        "httpx",
+        "yaml",
+        "sitehub.coordination",
+        "sitehub.status_journal",
+        "sitehub.services.deploy_service",
+        "sitehub.services.inventory_service",
+        "sitehub.services.health_service",
+        "sitehub.services.watch_service",
+    )
+    if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"
+]
+print(",".join(loaded))
+"""
+
+
+def test_cold_start_defers_heavy_imports() -> None:
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env={"PYTHONPATH": str(SRC), "SITEHUB_DOTENV_PATH": "/nonexistent"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == ""
+
+
+def test_lazy_module_loads_on_first_attribute() -> None:
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from sitehub.lazy import lazy_import; m = lazy_import('yaml'); "
+            "print(type(m).__name__); m.safe_load('a: 1'); print(type(sys.modules['yaml']).__name__)",
+        ],
+        env={"PYTHONPATH": str(SRC)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.split() == ["_LazyModule", "module"]
@@ -0,0 +1,146 @@
+import asyncio
+import dataclasses
+import json
+from pathlib import Path
+from typing import Any, Mapping
+
+import httpx
+
+from sitehub.config import load_settings
+from sitehub.models.apps import AppRecord, AppStatus
+from sitehub.pocketbase import PocketBaseClient
+from sitehub.status_journal import StatusFlusher, StatusJournal
+
+
+def _record(record_id: str, status: AppStatus = AppStatus.stopped) -> dict[str, Any]:
+    return {"id": record_id, "name": record_id, "port": 8081, "path": record_id, "status": status.value}
+
+
+def test_journal_coalesces_updates_per_record(tmp_path: Path) -> None:
+    journal = StatusJournal(tmp_path / "journal.sqlite")
+    journal.append({"rec_a": {"status": "deploying"}, "rec_b": {"status": "running"}})
+    journal.append({"rec_a": {"sitehub_config": {"health_path": "/up"}}})
+    journal.append({"rec_a": {"status": "running"}})
+
+    pending = journal.pending()
+    assert pending["rec_a"][1] == {"status": "running", "sitehub_config": {"health_path": "/up"}}
+    assert pending["rec_a"][0] > pending["rec_b"][0]
+    assert journal.pending_count() == 2
+    assert journal._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    records = [AppRecord.model_validate(_record("rec_a")), AppRecord.model_validate(_record("rec_c"))]
+    overlaid = journal.overlay(records)
+    assert overlaid[0].status == AppStatus.running
+    assert overlaid[0].sitehub_config == {"health_path": "/up"}
+    assert overlaid[1] is records[1]
+
+    journal.acknowledge({"rec_a": pending["rec_a"][0]})
+    assert set(journal.pending()) == {"rec_b"}
+
+
+def test_flusher_retries_transient_failures_and_keeps_newer_writes(tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path))
+    journal = StatusJournal(tmp_path / "journal.sqlite")
+    journal.append(
+        {"rec_ok": {"status": "running"}, "rec_busy": {"status": "error"}, "rec_gone": {"status": "stopped"}}
+    )
+
+    class FakePocketBase:
+        def __init__(self) -> None:
+            self.batches: list[dict[str, dict[str, Any]]] = []
+            self.busy = True
+
+        async def patch_apps(self, updates: Mapping[str, Mapping[str, Any]], concurrency: int = 16) -> dict[str, int]:
+            self.batches.append({key: dict(value) for key, value in updates.items()})
+            if len(self.batches) == 1:
+                journal.append({"rec_ok": {"status": "stopped"}})
+            codes = {"rec_ok": 200, "rec_busy": 503 if self.busy else 200, "rec_gone": 404}
+            return {record_id: codes[record_id] for record_id in updates}
+
+    pocketbase = FakePocketBase()
+    flusher = StatusFlusher(settings, journal, pocketbase=pocketbase)  # type: ignore[arg-type]
+
+    assert asyncio.run(flusher.flush_once()) == (2, 1)
+    assert {key: value[1] for key, value in journal.pending().items()} == {
+        "rec_busy": {"status": "error"},
+        "rec_ok": {"status": "stopped"},
+    }
+    pocketbase.busy = False
+    assert asyncio.run(flusher.flush_once()) == (2, 0)
+    assert pocketbase.batches[1] == {"rec_busy": {"status": "error"}, "rec_ok": {"status": "stopped"}}
+    assert journal.pending() == {}
+
+
+def test_client_writes_behind_and_serves_overlay(tmp_path: Path) -> None:
+    settings = dataclasses.replace(load_settings(), cache_dir=str(tmp_path), pocketbase_token="token")
+    journal = StatusJournal(tmp_path / "journal.sqlite")
+    remote = {"rec_a": _record("rec_a"), "rec_b": _record("rec_b")}
+    patches: list[tuple[str, dict[str, Any]]] = []
+    state = {"down": True}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if state["down"]:
+            return httpx.Response(503)
+        if request.method == "PATCH":
+            record_id = request.url.path.rsplit("/", 1)[-1]
+            body = json.loads(request.content)
+            patches.append((record_id, body))
+            remote[record_id].update(body)
+            return httpx.Response(200, json=remote[record_id])
+        return httpx.Response(200, json={"items": list(remote.values()), "totalPages": 1})
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            client = PocketBaseClient.from_settings(settings, client=http, journal=journal)
+            assert await client.update_app_statuses({"rec_a": AppStatus.deploying}) == []
+            assert await client.update_app_statuses({"rec_a": AppStatus.running}) == []
+            flusher = StatusFlusher(settings, journal, pocketbase=PocketBaseClient.from_settings(settings, client=http))
+            assert await flusher.flush_once() == (0, 1)
+            state["down"] = False
+            records = {record.id: record.status for record in await client.list_apps()}
+            assert records == {"rec_a": AppStatus.running, "rec_b": AppStatus.stopped}
+            assert remote["rec_a"]["status"] == "stopped"
+            assert await flusher.flush_once() == (1, 0)
+
+    asyncio.run(main())
+    assert patches == [("rec_a", {"status": "running"})]
+    assert remote["rec_a"]["status"] == "running"
+    assert journal.pending() == {}
+
+
+def test_expired_token_is_refreshed_and_auth_errors_are_never_dropped(tmp_path: Path) -> None:
+    settings = dataclasses.replace(
+        load_settings(),
+        cache_dir=str(tmp_path),
+        pocketbase_token=None,
+        pocketbase_admin_email="admin@example.com",
+        pocketbase_admin_password="secret",
+    )
+    journal = StatusJournal(tmp_path / "journal.sqlite")
+    journal.append({"rec_a": {"status": "running"}})
+    state = {"logins": 0, "valid": "", "forbidden": True}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("auth-with-password"):
+            state["logins"] += 1
+            state["valid"] = f"token-{state['logins']}"
+            return httpx.Response(200, json={"token": state["valid"]})
+        if request.headers.get("Authorization") != f"Bearer {state['valid']}":
+            return httpx.Response(401)
+        if state["forbidden"]:
+            return httpx.Response(403)
+        return httpx.Response(200, json={})
+
+    async def main() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            client = PocketBaseClient.from_settings(settings, client=http)
+            flusher = StatusFlusher(settings, journal, pocketbase=client)
+            assert await flusher.flush_once() == (0, 1)
+            assert set(journal.pending()) == {"rec_a"}
+            state["valid"] = "rotated"
+            state["forbidden"] = False
+            assert await flusher.flush_once() == (1, 0)
+
+    asyncio.run(main())
+    assert state["logins"] == 2
+    assert journal.pending() == {}
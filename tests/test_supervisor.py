@@ -0,0 +1,131 @@
+import asyncio
+import dataclasses
+from typing import Any
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.models.site_config import SiteConfig
+from sitehub.services import supervisor_service
+from sitehub.services.supervisor_service import AppSupervisor, SupervisorError
+
+
+class FakeNginx:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    def render_config(
+        self, name: str, port: int, mode: str = "proxy", external_port: int | None = None, performance: Any = None
+    ) -> str:
+        return f"proxy_pass http://127.0.0.1:{port};"
+
+    async def push_config(self, config_text: str, app_name: str) -> None:
+        self.calls.append(f"push {config_text}")
+
+    async def publish_conf(self, config_text: str, app_name: str) -> None:
+        self.calls.append(f"push {config_text}")
+        self.calls.append("reload")
+
+    async def apply_configs(self, configs: dict[str, str], removals: list[str]) -> None:
+        self.calls.extend(f"remove {name}" for name in removals)
+        self.calls.append("reload")
+
+
+def _config() -> SiteConfig:
+    return SiteConfig.model_validate(
+        {
+            "name": "demo",
+            "port": 8081,
+            "supervisor": {"command": "python3 app.py", "ports": [8081, 8082], "health_path": "healthz",
+                           "drain_s": 0},
+        }
+    )
+
+
+def test_supervisor_flips_to_standby_then_stops_previous(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        calls.append(command)
+        if command.startswith("cat ") and "active_port" in command:
+            return 0, "8081\n", ""
+        if "setsid" in command:
+            return 0, "4242\n", ""
+        return 0, "", ""
+
+    monkeypatch.setattr(supervisor_service, "_run_ssh_command", fake_ssh)
+    supervisor = AppSupervisor(load_settings(), nginx=FakeNginx(calls))  # type: ignore[arg-type]
+    result = asyncio.run(supervisor.restart("/srv/demo", _config()))
+
+    assert (result.previous_port, result.active_port, result.pid) == (8081, 8082, 4242)
+    start = next(i for i, c in enumerate(calls) if "setsid" in c)
+    ready = next(i for i, c in enumerate(calls) if "http://127.0.0.1:8082/healthz" in c)
+    push = calls.index("push proxy_pass http://127.0.0.1:8082;")
+    active = next(i for i, c in enumerate(calls) if c.startswith("printf") and "8082" in c)
+    stop_old = next(i for i, c in enumerate(calls) if "app-8081.pid" in c and "kill -TERM" in c)
+    assert start < ready < push < calls.index("reload") < active < stop_old
+
+
+def test_supervisor_keeps_previous_when_standby_exits(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        calls.append(command)
+        if "setsid" in command:
+            return 0, "4242\n", ""
+        if "curl" in command:
+            return supervisor_service.INSTANCE_EXITED_RC, "", ""
+        return 0, "", ""
+
+    monkeypatch.setattr(supervisor_service, "_run_ssh_command", fake_ssh)
+    supervisor = AppSupervisor(load_settings(), nginx=FakeNginx(calls))  # type: ignore[arg-type]
+    with pytest.raises(SupervisorError, match="instance_exited"):
+        asyncio.run(supervisor.restart("/srv/demo", _config()))
+
+    assert "reload" not in calls
+    assert not any(c.startswith("printf") for c in calls)
+
+
+def test_supervisor_removes_pushed_conf_when_first_start_fails_late(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        calls.append(command)
+        if "setsid" in command:
+            return 0, "4242\n", ""
+        if command.startswith("printf"):
+            return 1, "", "read-only file system"
+        return 0, "", ""
+
+    monkeypatch.setattr(supervisor_service, "_run_ssh_command", fake_ssh)
+    supervisor = AppSupervisor(load_settings(), nginx=FakeNginx(calls))  # type: ignore[arg-type]
+    with pytest.raises(SupervisorError, match="active_port_write_failed"):
+        asyncio.run(supervisor.restart("/srv/demo", _config()))
+
+    push = calls.index("push proxy_pass http://127.0.0.1:8082;")
+    remove = calls.index("remove demo")
+    stop_standby = max(i for i, c in enumerate(calls) if "app-8082.pid" in c and "kill -TERM" in c)
+    assert push < remove < calls.index("reload", remove) < stop_standby
+
+
+def test_supervisor_waits_for_slow_exit_beyond_connect_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = dataclasses.replace(load_settings(), ssh_connect_timeout_s=0.05)
+    budgets: dict[str, float] = {}
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        if "kill -TERM" in command or "curl" in command:
+            budgets["stop" if "kill -TERM" in command else "ready"] = timeout_s
+            try:
+                # The old instance (or the health endpoint) takes longer than an ssh handshake to answer.
+                await asyncio.wait_for(asyncio.sleep(0.2), timeout_s)
+            except asyncio.TimeoutError:
+                return 124, "", "ssh_timeout"
+        return 0, "", ""
+
+    monkeypatch.setattr(supervisor_service, "_run_ssh_command", fake_ssh)
+    supervisor = AppSupervisor(settings, nginx=FakeNginx([]))  # type: ignore[arg-type]
+    asyncio.run(supervisor.stop("/srv/demo", 8081))
+    asyncio.run(supervisor.wait_ready("/srv/demo", 8081, "/healthz", timeout_s=0.1))
+
+    assert budgets["stop"] > supervisor_service.STOP_GRACE_S
+    assert budgets["ready"] > supervisor_service.READY_PROBE_TIMEOUT_S
@@ -0,0 +1,55 @@
+import dataclasses
+import os
+from pathlib import Path
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.services.venv_service import VenvProvisioner, clone_venv, requirements_key
+
+
+def test_requirements_key_ignores_comments_and_order(tmp_path: Path) -> None:
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("fastapi==0.110.0\n# pinned\nhttpx==0.27.0\n", encoding="utf-8")
+    second.write_text("httpx==0.27.0  # client\n\nfastapi==0.110.0\n", encoding="utf-8")
+    assert requirements_key(first) == requirements_key(second)
+
+    pinned = tmp_path / "pinned.txt"
+    pinned.write_text("pkg @ https://example.com/pkg-1.0.tar.gz#sha256=aaaa  # mirror\n", encoding="utf-8")
+    bumped = tmp_path / "bumped.txt"
+    bumped.write_text("pkg @ https://example.com/pkg-1.0.tar.gz#sha256=bbbb\n", encoding="utf-8")
+    egg = tmp_path / "egg.txt"
+    egg.write_text("git+https://example.com/repo.git#egg=other\n", encoding="utf-8")
+    keys = {requirements_key(path) for path in (pinned, bumped, egg)}
+    assert len(keys) == 3
+
+
+def test_clone_venv_hardlinks_and_rewrites_paths(tmp_path: Path) -> None:
+    source = tmp_path / "template"
+    (source / "bin").mkdir(parents=True)
+    (source / "lib" / "site-packages").mkdir(parents=True)
+    (source / "pyvenv.cfg").write_text(f"home = /usr/bin\ncommand = python -m venv {source}\n", encoding="utf-8")
+    (source / "bin" / "pip").write_text(f"#!{source}/bin/python\n", encoding="utf-8")
+    os.chmod(source / "bin" / "pip", 0o755)
+    os.symlink("/usr/bin/python3", source / "bin" / "python")
+    os.symlink("lib", source / "lib64")
+    (source / "lib" / "site-packages" / "mod.py").write_text("VALUE = 1\n", encoding="utf-8")
+
+    dest = tmp_path / "site" / ".venv"
+    assert clone_venv(source, dest) == "hardlink"
+
+    assert (dest / "bin" / "pip").read_text(encoding="utf-8") == f"#!{dest}/bin/python\n"
+    assert os.access(dest / "bin" / "pip", os.X_OK)
+    assert str(dest) in (dest / "pyvenv.cfg").read_text(encoding="utf-8")
+    assert os.readlink(dest / "bin" / "python") == "/usr/bin/python3"
+    assert (dest / "lib64").is_symlink()
+    assert (dest / "lib" / "site-packages" / "mod.py").stat().st_nlink == 2
+
+
+def test_relative_cache_dir_is_resolved(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    settings = dataclasses.replace(load_settings(), cache_dir="relative-cache")
+    provisioner = VenvProvisioner(settings)
+    assert provisioner.template_dir.is_absolute()
+    assert provisioner.template_dir.parent == tmp_path.resolve() / "relative-cache" / "venvs"
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from sitehub.config import load_settings
+from sitehub.events import ChangeEvent, EventBus
+from sitehub.services import deploy_service, watch_service
+from sitehub.services.deploy_service import CONF_BULK_MARKER, ConfIndex
+from sitehub.services.watch_service import RemoteWatcher, diff_snapshots, parse_inotify_line, parse_snapshot
+
+CONF_DIR = "/conf.d"
+SITES = "/sites"
+
+
+def test_parse_inotify_line_classifies_conf_and_site_events() -> None:
+    assert parse_inotify_line("CLOSE_WRITE,CLOSE\t/conf.d/a.conf\n", CONF_DIR, SITES) == ChangeEvent(
+        kind="conf", action="modified", name="a", path="/conf.d/a.conf"
+    )
+    assert parse_inotify_line("CREATE,ISDIR\t/sites/demo\n", CONF_DIR, SITES) == ChangeEvent(
+        kind="site", action="created", name="demo", path="/sites/demo"
+    )
+    assert parse_inotify_line("DELETE\t/conf.d/a.conf.bak\n", CONF_DIR, SITES) is None
+    assert parse_inotify_line("CREATE\t/sites/readme.txt\n", CONF_DIR, SITES) is None
+
+
+def test_polling_diff_reports_created_modified_deleted() -> None:
+    old = parse_snapshot("a.conf\t1.0\nb.conf\t1.0\n--- sitehub-sites\ndemo\t1.0\n", CONF_DIR, SITES)
+    new = parse_snapshot("a.conf\t2.0\nc.conf\t1.0\n--- sitehub-sites\ndemo\t1.0\nnew\t3.0\n", CONF_DIR, SITES)
+    events = {(event.kind, event.action, event.name) for event in diff_snapshots(old, new)}
+    assert events == {
+        ("conf", "modified", "a"),
+        ("conf", "deleted", "b"),
+        ("conf", "created", "c"),
+        ("site", "created", "new"),
+    }
+
+
+def test_conf_index_updates_incrementally_from_bus(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def fake_ssh(settings: object, command: str, timeout_s: float) -> tuple[int, str, str]:
+        calls.append(command)
+        if command.startswith("for f in"):
+            return 0, f"{CONF_BULK_MARKER}/conf.d/a.conf\nserver {{ listen 8401; }}\n\n", ""
+        return 0, "server { listen 8402; }\n", ""
+
+    monkeypatch.setattr(deploy_service, "_run_ssh_command", fake_ssh)
+
+    async def run() -> None:
+        index = ConfIndex(load_settings(), CONF_DIR)
+        bus = EventBus()
+        bus.subscribe(index.handle_event)
+        await index.load()
+        assert index.owners(8401) == ["/conf.d/a.conf"]
+        await bus.publish(ChangeEvent(kind="conf", action="created", name="b", path="/conf.d/b.conf"))
+        assert index.owners(8402) == ["/conf.d/b.conf"]
+        await bus.publish(ChangeEvent(kind="conf", action="deleted", name="a", path="/conf.d/a.conf"))
+        assert index.owners(8401) == []
+
+        engine = deploy_service.NginxEngine(load_settings(), CONF_DIR, conf_index=index)
+        assert await engine.conf_snapshot() == {"/conf.d/b.conf": "server { listen 8402; }\n"}
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_remote_watcher_reconnects_after_unexpected_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(watch_service, "RECONNECT_BACKOFF_S", 0.01)
+    attempts: list[int] = []
+
+    async def broken_channel() -> int:
+        attempts.append(1)
+        raise OSError("ssh binary missing")
+
+    async def run() -> None:
+        watcher = RemoteWatcher(load_settings(), EventBus())
+        monkeypatch.setattr(watcher, "_watch_inotify", broken_channel)
+        watcher.start()
+        await asyncio.sleep(0.1)
+        assert watcher._task is not None and not watcher._task.done()
+        await watcher.stop()
+
+    asyncio.run(run())
+    assert len(attempts) > 1
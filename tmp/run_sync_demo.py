@@ -5,6 +5,7 @@ from pathlib import Path
 
 from sitehub.config import load_settings
 from sitehub.services import deploy_service
+from sitehub.services.pipeline import DeployPipeline
 
 
 async def main() -> None:
@@ -14,11 +15,10 @@ async def main() -> None:
     remote_root = "/vol1/1000/MyDocker/web-cluster/sites"
     remote_path = f"{remote_root}/{app_name}"
 
-    engine = deploy_service.SyncEngine(settings)
-    await engine.sync(local_path, remote_path)
-
-    nginx_engine = deploy_service.NginxEngine(settings)
-    await nginx_engine.apply_from_sitehub(local_path / "sitehub.yaml")
+    result = await DeployPipeline(settings).run(local_path, remote_path)
+    print(f"OK: duration_ms={result.duration_ms} steps={result.timings_ms}")
+    if result.results["publish"] is not None:
+        return
 
     command = (
         f"cd '{remote_path}' && "